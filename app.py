@@ -2,16 +2,24 @@
 
 from flask import send_file # type: ignore
 from flask import Flask, render_template, request, redirect, url_for, session, flash, send_file # type: ignore
+from flask import Response, stream_template, stream_with_context # type: ignore
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user # type: ignore
 from models.inventario import Inventario
 from models.usuario import Usuario
 from database.db_manager import DatabaseManager
 from services.producto_service import ProductoService
+from services.cache import CacheLRU
 from services.reporte_service import ReporteService
-from forms.producto_form import ProductoForm, ProductoFiltroForm
+from services.carga_service import CargaProductosService
+from services.outbox_service import DespachadorOutbox
+from forms.producto_form import ProductoForm, ProductoFiltroForm, ProductoCargaForm
+from database import paginacion
+from database import instrumentacion
+from database.repositorio import crear_repositorio
 import os
 import json
 import csv
+import io
 from datetime import datetime
 
 app = Flask(__name__)
@@ -34,25 +42,58 @@ os.makedirs(DATA_FOLDER, exist_ok=True)
 # Inicializar componentes
 inventario = Inventario()
 db = DatabaseManager()
-producto_service = ProductoService()
+# Lecturas por id, categoría y bajo stock desde una caché LRU con TTL
+producto_service = ProductoService(cache=CacheLRU(
+    capacidad=int(os.environ.get('TIENDA_CACHE_PRODUCTOS', 2048)),
+    ttl=float(os.environ.get('TIENDA_CACHE_TTL', 30))
+))
 reporte_service = ReporteService()
+carga_service = CargaProductosService(producto_service)
+# Acceso a productos de las rutas (database/repositorio.py); MySQL comparte la caché del servicio.
+# /productos y el panel usan el motor de TIENDA_BACKEND_PRODUCTOS; /mysql, siempre MySQL
+repositorio_productos = crear_repositorio(db=db, servicio=producto_service)
+repositorio_mysql = crear_repositorio('mysql', servicio=producto_service)
+# Replica en MySQL, desde un hilo de fondo, lo que se encola en la outbox de SQLite.
+# El hilo no arranca al importar: lo hace iniciar_despachador_outbox (punto de
+# entrada) o el primer avisar() del proceso (p. ej. cada worker de gunicorn)
+despachador_outbox = DespachadorOutbox(db)
+
+def iniciar_despachador_outbox(recargador=True):
+    """
+    Arranca el despachador desde el punto de entrada. Con el recargador de
+    Flask (debug) solo lo hace el proceso hijo que atiende las peticiones,
+    no el que vigila los archivos.
+    """
+    if not recargador or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        despachador_outbox.iniciar()
+
+# Columnas de usuario necesarias para restaurar la sesión
+COLUMNAS_SESION = ('id', 'nombre', 'email', 'fecha_nacimiento', 'proveedor')
 
 @login_manager.user_loader
 def load_user(user_id):
     try:
-        usuario_data = db.obtener_usuario_por_id(int(user_id))
+        # En cada petición no hace falta leer el password
+        usuario_data = db.obtener_usuario_por_id(int(user_id), columnas=COLUMNAS_SESION)
         if usuario_data:
             return Usuario(
-                id=usuario_data[0],
-                nombre=usuario_data[1],
-                email=usuario_data[2],
-                password=usuario_data[3],
-                fecha_nacimiento=usuario_data[4]
+                id=usuario_data.id,
+                nombre=usuario_data.nombre,
+                email=usuario_data.email,
+                password=None,
+                fecha_nacimiento=usuario_data.fecha_nacimiento,
+                proveedor=usuario_data.proveedor
             )
     except Exception as e:
         print(f"Error cargando usuario: {e}")
     return None
 
+# Cada worker tiene su propio Inventario en memoria: antes de las peticiones
+# (como mucho una vez por segundo) aplica los cambios hechos por los demás
+@app.before_request
+def refrescar_inventario():
+    inventario.revisar_cambios()
+
 # ----- FUNCIONES PARA ARCHIVOS (Semana 12) -----
 def guardar_en_txt(producto):
     try:
@@ -139,29 +180,13 @@ def cargar_desde_csv():
         print(f"Error cargando CSV: {e}")
     return productos
 
-# ----- FUNCIONES PARA MYSQL (Semana 13) -----
-def conectar_mysql():
-    try:
-        from database.conexion import MySQLConnection
-        db_mysql = MySQLConnection()
-        conn = db_mysql.conectar()
-        return conn
-    except ImportError:
-        print("❌ Error importando MySQLConnection")
-        return None
-    except Exception as e:
-        print(f"❌ Error conectando a MySQL: {e}")
-        return None
-
 # ----- RUTAS PÚBLICAS (Semanas 9-10) -----
 @app.route('/')
 def inicio():
     if current_user.is_authenticated:
         try:
-            productos = producto_service.obtener_todos()
-            total_productos = len(productos) if productos else 0
-            usuarios_data = db.obtener_todos_usuarios()
-            total_usuarios = len(usuarios_data) if usuarios_data else 0
+            total_productos = repositorio_productos.contar()
+            total_usuarios = db.contar_usuarios()
             return render_template('dashboard.html', 
                                  total_productos=total_productos,
                                  total_usuarios=total_usuarios)
@@ -190,6 +215,20 @@ def producto(nombre):
         return render_template('producto.html', prod=prod_dict)
     return render_template('404_producto.html', nombre=nombre), 404
 
+@app.route('/productos/autocompletar')
+@login_required
+def autocompletar_productos():
+    """Sugerencias JSON para el buscador: ?q=texto&limit=n (índice de nombres en memoria)"""
+    termino = request.args.get('q', '')
+    limite = max(1, min(request.args.get('limit', 8, type=int), 20))
+    return {
+        'termino': termino,
+        'sugerencias': [
+            {'id': p.id, 'nombre': p.nombre, 'categoria': p.categoria, 'precio': p.precio}
+            for p in inventario.autocompletar(termino, limite)
+        ]
+    }
+
 @app.route('/categoria/<tipo>')
 @login_required
 def categoria(tipo):
@@ -233,33 +272,12 @@ def registro():
                 return render_template('registro.html')
             
             usuario = Usuario(None, nombre, email, password, fecha)
-            usuario_id = db.insertar_usuario(usuario)
+            # La copia en MySQL queda en la outbox (misma transacción) y la
+            # aplica el despachador en segundo plano
+            usuario_id = db.insertar_usuario(usuario, replicar=True)
             
             if usuario_id:
-                try:
-                    conn = conectar_mysql()
-                    if conn:
-                        with conn.cursor() as cursor:
-                            cursor.execute("SHOW TABLES LIKE 'usuarios'")
-                            if cursor.fetchone():
-                                sql = """INSERT INTO usuarios 
-                                         (id_usuario, nombre, mail, password, fecha_nacimiento, proveedor, rol) 
-                                         VALUES (%s, %s, %s, %s, %s, %s, %s)"""
-                                cursor.execute(sql, (
-                                    usuario_id,
-                                    usuario.nombre,
-                                    usuario.email,
-                                    usuario.password,
-                                    usuario.fecha_nacimiento,
-                                    usuario.proveedor,
-                                    'admin'
-                                ))
-                                conn.commit()
-                                print("✅ Usuario guardado en MySQL")
-                        conn.close()
-                except Exception as e:
-                    print(f"⚠️ Error guardando en MySQL: {e}")
-                
+                despachador_outbox.avisar()
                 usuario.id = usuario_id
                 login_user(usuario)
                 flash(f'¡Bienvenido {usuario.nombre}!', 'success')
@@ -286,11 +304,12 @@ def login():
         
         if usuario_data:
             usuario = Usuario(
-                id=usuario_data[0],
-                nombre=usuario_data[1],
-                email=usuario_data[2],
-                password=usuario_data[3],
-                fecha_nacimiento=usuario_data[4]
+                id=usuario_data.id,
+                nombre=usuario_data.nombre,
+                email=usuario_data.email,
+                password=usuario_data.password,
+                fecha_nacimiento=usuario_data.fecha_nacimiento,
+                proveedor=usuario_data.proveedor
             )
             
             if usuario.verificar_password(password):
@@ -514,41 +533,92 @@ def exportar_csv():
 @app.route('/mysql')
 @login_required
 def ver_mysql():
-    conn = conectar_mysql()
-    if conn:
-        try:
-            with conn.cursor() as cursor:
-                cursor.execute("SELECT * FROM productos")
-                productos = cursor.fetchall()
-            conn.close()
-            return render_template('mysql_datos.html', productos=productos)
-        except Exception as e:
-            flash(f'Error consultando MySQL: {str(e)}', 'error')
-    else:
-        flash('No se pudo conectar a MySQL', 'error')
+    limite = paginacion.normalizar_limite(request.args.get('limit', paginacion.LIMITE_POR_DEFECTO))
+    try:
+        # El listado no muestra la descripción: no se transfiere
+        productos, siguiente = repositorio_mysql.obtener_pagina(
+            request.args.get('after'), limite, 'id', columnas=COLUMNAS_EXPORTACION[:-1]
+        )
+        return render_template('mysql_datos.html', productos=productos,
+                             siguiente=siguiente, limite=limite)
+    except Exception as e:
+        flash(f'Error consultando MySQL: {str(e)}', 'error')
     return redirect(url_for('inicio'))
 
+# Columnas del listado y de las exportaciones de MySQL
+COLUMNAS_EXPORTACION = ('id', 'nombre', 'precio', 'cantidad', 'categoria', 'descripcion')
+# Filas por bloque enviado al cliente en las exportaciones
+FILAS_POR_BLOQUE = 500
+
+@app.route('/mysql/todos')
+@login_required
+def ver_mysql_todos():
+    """Listado completo sin paginar: la plantilla se envía a medida que llegan las filas"""
+    try:
+        productos = repositorio_mysql.iterar_todos(COLUMNAS_EXPORTACION[:-1])
+        # Adelanta la primera fila: la plantilla sabe si está vacío y un
+        # error de la consulta se informa aquí y no a mitad del envío
+        bool(productos)
+    except Exception as e:
+        flash(f'Error consultando MySQL: {str(e)}', 'error')
+        return redirect(url_for('inicio'))
+    return stream_template('mysql_datos.html', productos=productos, siguiente=None,
+                           limite=paginacion.LIMITE_POR_DEFECTO)
+
+@app.route('/mysql/exportar/<formato>')
+@login_required
+def exportar_mysql(formato):
+    """Exporta todos los productos de MySQL a CSV o JSON sin armar el archivo en memoria"""
+    if formato not in ('csv', 'json'):
+        flash('Formato de exportación no soportado', 'error')
+        return redirect(url_for('ver_mysql'))
+    try:
+        productos = repositorio_mysql.iterar_todos(COLUMNAS_EXPORTACION)
+    except Exception as e:
+        flash(f'Error consultando MySQL: {str(e)}', 'error')
+        return redirect(url_for('ver_mysql'))
+    
+    def generar_csv():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(COLUMNAS_EXPORTACION)
+        for i, p in enumerate(productos, start=1):
+            writer.writerow(p)
+            if i % FILAS_POR_BLOQUE == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+    
+    def generar_json():
+        bloque = ['[']
+        for i, p in enumerate(productos):
+            bloque.append((',\n' if i else '\n') + json.dumps(p._asdict(), ensure_ascii=False))
+            if len(bloque) >= FILAS_POR_BLOQUE:
+                yield ''.join(bloque)
+                bloque = []
+        bloque.append('\n]\n')
+        yield ''.join(bloque)
+    
+    generar, mimetype = (generar_csv, 'text/csv') if formato == 'csv' else (generar_json, 'application/json')
+    nombre = f"productos_mysql_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{formato}"
+    return Response(stream_with_context(generar()), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename={nombre}'})
+
 @app.route('/mysql/insertar', methods=['GET', 'POST'])
 @login_required
 def insertar_mysql():
     if request.method == 'POST':
         try:
-            nombre = request.form.get('nombre')
-            precio = float(request.form.get('precio'))
-            cantidad = int(request.form.get('cantidad'))
-            categoria = request.form.get('categoria')
-            descripcion = request.form.get('descripcion', '')
-            conn = conectar_mysql()
-            if conn:
-                with conn.cursor() as cursor:
-                    sql = "INSERT INTO productos (nombre, precio, cantidad, categoria, descripcion) VALUES (%s, %s, %s, %s, %s)"
-                    cursor.execute(sql, (nombre, precio, cantidad, categoria, descripcion))
-                    conn.commit()
-                conn.close()
-                flash('Producto insertado en MySQL', 'success')
-                return redirect(url_for('ver_mysql'))
-            else:
-                flash('Error conectando a MySQL', 'error')
+            repositorio_mysql.crear({
+                'nombre': request.form.get('nombre'),
+                'precio': float(request.form.get('precio')),
+                'cantidad': int(request.form.get('cantidad')),
+                'categoria': request.form.get('categoria'),
+                'descripcion': request.form.get('descripcion', '')
+            })
+            flash('Producto insertado en MySQL', 'success')
+            return redirect(url_for('ver_mysql'))
         except Exception as e:
             flash(f'Error: {str(e)}', 'error')
     return render_template('mysql_form.html')
@@ -559,15 +629,10 @@ def actualizar_mysql(id):
     try:
         precio = float(request.form.get('precio'))
         cantidad = int(request.form.get('cantidad'))
-        conn = conectar_mysql()
-        if conn:
-            with conn.cursor() as cursor:
-                cursor.execute("UPDATE productos SET precio=%s, cantidad=%s WHERE id=%s", (precio, cantidad, id))
-                conn.commit()
-            conn.close()
+        if repositorio_mysql.actualizar(id, precio=precio, cantidad=cantidad):
             flash('Producto actualizado en MySQL', 'success')
         else:
-            flash('Error conectando a MySQL', 'error')
+            flash('Producto no encontrado', 'error')
     except Exception as e:
         flash(f'Error: {str(e)}', 'error')
     return redirect(url_for('ver_mysql'))
@@ -576,15 +641,10 @@ def actualizar_mysql(id):
 @login_required
 def eliminar_mysql(id):
     try:
-        conn = conectar_mysql()
-        if conn:
-            with conn.cursor() as cursor:
-                cursor.execute("DELETE FROM productos WHERE id=%s", (id,))
-                conn.commit()
-            conn.close()
+        if repositorio_mysql.eliminar(id):
             flash('Producto eliminado de MySQL', 'success')
         else:
-            flash('Error conectando a MySQL', 'error')
+            flash('Producto no encontrado', 'error')
     except Exception as e:
         flash(f'Error: {str(e)}', 'error')
     return redirect(url_for('ver_mysql'))
@@ -596,14 +656,23 @@ def eliminar_mysql(id):
 @app.route('/productos')
 @login_required
 def listar_productos():
-    """Listar todos los productos con estadísticas"""
-    productos = producto_service.obtener_todos()
-    estadisticas = producto_service.obtener_estadisticas()
+    """Listar productos por páginas (?after=&limit=&orden=) con estadísticas"""
+    limite = paginacion.normalizar_limite(request.args.get('limit', paginacion.LIMITE_POR_DEFECTO))
+    orden = paginacion.normalizar_orden(request.args.get('orden', 'id'))
+    try:
+        productos, siguiente = repositorio_productos.obtener_pagina(request.args.get('after'), limite, orden)
+        estadisticas = repositorio_productos.obtener_estadisticas()
+    except Exception as e:
+        flash(f'Error consultando productos: {str(e)}', 'error')
+        return redirect(url_for('inicio'))
     form_filtro = ProductoFiltroForm()
     return render_template('productos_lista.html', 
                          productos=productos, 
                          estadisticas=estadisticas,
-                         form_filtro=form_filtro)
+                         form_filtro=form_filtro,
+                         siguiente=siguiente,
+                         limite=limite,
+                         orden=orden)
 
 @app.route('/productos/nuevo', methods=['GET', 'POST'])
 @login_required
@@ -619,12 +688,12 @@ def producto_nuevo():
             'categoria': form.categoria.data,
             'descripcion': form.descripcion.data
         }
-        nuevo_id = producto_service.crear(datos)
-        if nuevo_id:
+        try:
+            repositorio_productos.crear(datos)
             flash('Producto creado exitosamente', 'success')
             return redirect(url_for('listar_productos'))
-        else:
-            flash('Error al crear el producto', 'error')
+        except Exception as e:
+            flash(f'Error al crear el producto: {str(e)}', 'error')
     
     return render_template('producto_form.html', form=form, titulo='Nuevo Producto')
 
@@ -632,7 +701,11 @@ def producto_nuevo():
 @login_required
 def producto_editar(id):
     """Editar producto existente"""
-    producto = producto_service.obtener_por_id(id)
+    try:
+        producto = repositorio_productos.obtener_por_id(id)
+    except Exception as e:
+        flash(f'Error consultando productos: {str(e)}', 'error')
+        return redirect(url_for('listar_productos'))
     if not producto:
         flash('Producto no encontrado', 'error')
         return redirect(url_for('listar_productos'))
@@ -640,11 +713,11 @@ def producto_editar(id):
     form = ProductoForm()
     
     if request.method == 'GET':
-        form.nombre.data = producto['nombre']
-        form.precio.data = producto['precio']
-        form.cantidad.data = producto['cantidad']
-        form.categoria.data = producto['categoria']
-        form.descripcion.data = producto.get('descripcion', '')
+        form.nombre.data = producto.nombre
+        form.precio.data = producto.precio
+        form.cantidad.data = producto.cantidad
+        form.categoria.data = producto.categoria
+        form.descripcion.data = producto.descripcion or ''
     
     if form.validate_on_submit():
         datos = {
@@ -654,11 +727,13 @@ def producto_editar(id):
             'categoria': form.categoria.data,
             'descripcion': form.descripcion.data
         }
-        if producto_service.actualizar(id, datos):
-            flash('Producto actualizado exitosamente', 'success')
-            return redirect(url_for('listar_productos'))
-        else:
-            flash('Error al actualizar el producto', 'error')
+        try:
+            if repositorio_productos.actualizar(id, **datos):
+                flash('Producto actualizado exitosamente', 'success')
+                return redirect(url_for('listar_productos'))
+            flash('Producto no encontrado', 'error')
+        except Exception as e:
+            flash(f'Error al actualizar el producto: {str(e)}', 'error')
     
     return render_template('producto_form.html', form=form, titulo='Editar Producto', producto=producto)
 
@@ -666,17 +741,41 @@ def producto_editar(id):
 @login_required
 def producto_eliminar(id):
     """Eliminar producto"""
-    if producto_service.eliminar(id):
-        flash('Producto eliminado exitosamente', 'success')
-    else:
-        flash('Error al eliminar el producto', 'error')
+    try:
+        if repositorio_productos.eliminar(id):
+            flash('Producto eliminado exitosamente', 'success')
+        else:
+            flash('Producto no encontrado', 'error')
+    except Exception as e:
+        flash(f'Error al eliminar el producto: {str(e)}', 'error')
     return redirect(url_for('listar_productos'))
 
+@app.route('/productos/cargar', methods=['GET', 'POST'])
+@login_required
+def producto_cargar():
+    """Carga masiva desde CSV: crea, actualiza o elimina por lotes e informa cada fila"""
+    form = ProductoCargaForm()
+    resultado = None
+    
+    if form.validate_on_submit():
+        resultado = carga_service.procesar(form.archivo.data.stream)
+        resumen = resultado['resumen']
+        if resultado['error']:
+            flash(f"No se pudo leer todo el archivo: {resultado['error']}", 'error')
+        flash(f"Carga terminada: {resumen['ok']} filas aplicadas, {resumen['error']} con error",
+              'success' if not resumen['error'] else 'warning')
+    
+    return render_template('productos_carga.html', form=form, resultado=resultado)
+
 @app.route('/productos/reporte')
 @login_required
 def generar_reporte_productos():
     """Generar reporte PDF de todos los productos"""
-    productos = producto_service.obtener_todos()
+    try:
+        productos = list(repositorio_productos.iterar_todos())
+    except Exception as e:
+        flash(f'Error consultando productos: {str(e)}', 'error')
+        return redirect(url_for('listar_productos'))
     filename, filepath = reporte_service.generar_reporte_productos(productos)
     flash(f'Reporte generado: {filename}', 'success')
     return send_file(filepath, as_attachment=True, download_name=filename)
@@ -685,7 +784,11 @@ def generar_reporte_productos():
 @login_required
 def generar_reporte_bajo_stock():
     """Generar reporte de productos con bajo stock"""
-    productos = producto_service.obtener_con_bajo_stock(5)
+    try:
+        productos = repositorio_productos.obtener_con_bajo_stock(5)
+    except Exception as e:
+        flash(f'Error consultando productos: {str(e)}', 'error')
+        return redirect(url_for('listar_productos'))
     if not productos:
         flash('No hay productos con bajo stock', 'info')
         return redirect(url_for('listar_productos'))
@@ -702,7 +805,11 @@ def generar_reporte_categoria(categoria):
         flash('Categoría no válida', 'error')
         return redirect(url_for('listar_productos'))
     
-    productos = producto_service.obtener_por_categoria(categoria)
+    try:
+        productos = repositorio_productos.obtener_por_categoria(categoria)
+    except Exception as e:
+        flash(f'Error consultando productos: {str(e)}', 'error')
+        return redirect(url_for('listar_productos'))
     if not productos:
         flash(f'No hay productos en la categoría {categoria}', 'info')
         return redirect(url_for('listar_productos'))
@@ -714,25 +821,39 @@ def generar_reporte_categoria(categoria):
 @app.route('/productos/filtrar', methods=['POST'])
 @login_required
 def filtrar_productos():
-    """Filtrar productos"""
+    """Filtrar productos (paginado con ?after=&limit=)"""
     form = ProductoFiltroForm()
-    productos = producto_service.obtener_todos()
-    
-    if form.buscar.data:
-        productos = producto_service.buscar(form.buscar.data)
-    
-    if form.categoria.data:
-        productos = [p for p in productos if p['categoria'] == form.categoria.data]
-    
-    if form.stock_minimo.data and form.stock_minimo.data > 0:
-        productos = [p for p in productos if p['cantidad'] <= form.stock_minimo.data]
+    limite = paginacion.normalizar_limite(request.args.get('limit', paginacion.LIMITE_POR_DEFECTO))
+    stock_maximo = form.stock_minimo.data if form.stock_minimo.data and form.stock_minimo.data > 0 else None
+    siguiente = None
     
-    estadisticas = producto_service.obtener_estadisticas()
+    # La búsqueda por texto usa el índice de texto completo y devuelve los
+    # 'limite' más relevantes; sin texto, los filtros van en la consulta paginada
+    try:
+        if form.buscar.data:
+            productos = repositorio_productos.buscar(form.buscar.data, limite)
+            if form.categoria.data:
+                productos = [p for p in productos if p.categoria == form.categoria.data]
+            if stock_maximo is not None:
+                productos = [p for p in productos if p.cantidad <= stock_maximo]
+        else:
+            productos, siguiente = repositorio_productos.obtener_pagina(
+                request.args.get('after'), limite,
+                categoria=form.categoria.data or None,
+                stock_maximo=stock_maximo
+            )
+        estadisticas = repositorio_productos.obtener_estadisticas()
+    except Exception as e:
+        flash(f'Error consultando productos: {str(e)}', 'error')
+        return redirect(url_for('listar_productos'))
     
     return render_template('productos_lista.html', 
                          productos=productos, 
                          estadisticas=estadisticas,
-                         form_filtro=form)
+                         form_filtro=form,
+                         siguiente=siguiente,
+                         limite=limite,
+                         filtrando=True)
 
 # ----- RUTA DE PRUEBA -----
 @app.route('/test-db')
@@ -743,10 +864,12 @@ def test_db():
         conn = db_mysql.conectar()
         
         if conn:
-            with conn.cursor() as cursor:
-                cursor.execute("SELECT DATABASE() as db, VERSION() as version, USER() as user")
-                info = cursor.fetchone()
-            conn.close()
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT DATABASE() as db, VERSION() as version, USER() as user")
+                    info = cursor.fetchone()
+            finally:
+                conn.close()
             
             return f"""
             <div style="padding:20px; font-family:Arial; max-width:600px; margin:50px auto; background:white; border-radius:15px;">
@@ -763,6 +886,32 @@ def test_db():
     except Exception as e:
         return f"<h2>❌ Error: {str(e)}</h2>"
 
+# ----- MÉTRICAS DE CONSULTAS -----
+@app.route('/metricas/consultas')
+@login_required
+def metricas_consultas():
+    """Volcado JSON de latencias por sentencia y consultas lentas con su plan"""
+    return app.response_class(instrumentacion.volcar_json(), mimetype='application/json')
+
+@app.route('/metricas/cache')
+@login_required
+def metricas_cache():
+    """Aciertos, fallos y tamaño de la caché de productos"""
+    return producto_service.cache.estadisticas()
+
+@app.route('/metricas/mysql')
+@login_required
+def metricas_mysql():
+    """Estado del cortacircuitos de MySQL (cerrado/abierto/semi_abierto) y del pool"""
+    from database.conexion import MySQLConnection
+    return MySQLConnection.estado_circuito()
+
+@app.route('/metricas/outbox')
+@login_required
+def metricas_outbox():
+    """Mensajes pendientes de replicar en MySQL y contadores del despachador"""
+    return despachador_outbox.estadisticas()
+
 # ----- MANEJADORES DE ERRORES -----
 @app.errorhandler(404)
 def page_not_found(e):
@@ -776,4 +925,5 @@ if __name__ == '__main__':
     print("🗄️ Semana 13: http://127.0.0.1:5000/mysql")
     print("📦 Semana 15: http://127.0.0.1:5000/productos")
     print("=" * 50)
+    iniciar_despachador_outbox()
     app.run(debug=True)
\ No newline at end of file
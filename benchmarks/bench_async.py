@@ -0,0 +1,155 @@
+# benchmarks/bench_async.py
+"""
+Benchmark de la capa asyncio (database/asincrono.py) con 200 peticiones
+concurrentes. Cada petición simula el dashboard: una página de productos
+y el conteo de usuarios, que son independientes. Se compara con atender
+las mismas peticiones una tras otra con DatabaseManager.
+Además del rendimiento se mide el mayor retraso del event loop (lo que
+esperaría cualquier otra petición) y cuánto tarda en abortarse una
+consulta larga cancelada.
+Ejecutar: python benchmarks/bench_async.py
+"""
+
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.asincrono import DatabaseManagerAsync
+from database.db_manager import DatabaseManager
+
+PETICIONES = 200
+TOTAL_PRODUCTOS = 200_000
+TOTAL_USUARIOS = 20_000
+CATEGORIAS = ['audio', 'perifericos', 'monitores', 'laptops', 'otros']
+
+
+def preparar(db):
+    aleatorio = random.Random(7)
+    db.insertar_productos_lote(({
+        'id': i,
+        'nombre': f"Producto {i}",
+        'precio': round(aleatorio.uniform(10, 2000), 2),
+        'cantidad': aleatorio.randint(0, 50),
+        'categoria': aleatorio.choice(CATEGORIAS),
+        'descripcion': '',
+    } for i in range(1, TOTAL_PRODUCTOS + 1)), tamano_lote=10000)
+    with db.get_connection() as conn:
+        conn.executemany(
+            "INSERT INTO usuarios (nombre, email, password, fecha_nacimiento) VALUES (?, ?, ?, ?)",
+            ((f"Usuario {i}", f"u{i}@tienda.cl", 'enc_x_2026', '1990-01-01')
+             for i in range(TOTAL_USUARIOS))
+        )
+
+
+def parametros(i):
+    """Cada petición pide una categoría y un orden distintos"""
+    return {'limite': 50, 'orden': ('precio', 'cantidad')[i % 2],
+            'categoria': CATEGORIAS[i % len(CATEGORIAS)]}
+
+
+async def medir_retraso(retrasos, intervalo=0.005):
+    """Latido del event loop: guarda cuánto se atrasa cada despertar"""
+    while True:
+        esperado = time.perf_counter() + intervalo
+        await asyncio.sleep(intervalo)
+        retrasos.append(time.perf_counter() - esperado)
+
+
+async def con_latido(corrutina):
+    """Ejecuta la corrutina midiendo el mayor retraso del event loop"""
+    retrasos = [0.0]
+    latido = asyncio.ensure_future(medir_retraso(retrasos))
+    await asyncio.sleep(0)
+    try:
+        duracion = await corrutina
+    finally:
+        latido.cancel()
+    return duracion, max(retrasos)
+
+
+async def secuencial(db):
+    """Llamadas síncronas desde el event loop: lo bloquean mientras duran"""
+    inicio = time.perf_counter()
+    for i in range(PETICIONES):
+        db.obtener_productos_pagina(**parametros(i))
+        db.contar_usuarios()
+        await asyncio.sleep(0)
+    return time.perf_counter() - inicio
+
+
+async def concurrente(db_async):
+    async def peticion(i):
+        return await asyncio.gather(
+            db_async.obtener_productos_pagina(**parametros(i)),
+            db_async.contar_usuarios(),
+        )
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(peticion(i) for i in range(PETICIONES)))
+    return time.perf_counter() - inicio
+
+
+async def cancelacion(db, db_async):
+    """Lanza una consulta de varios segundos y la cancela a los 50 ms"""
+    consulta = '''
+        WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n WHERE x < 100000000)
+        SELECT COUNT(*) FROM n
+    '''
+
+    def larga():
+        # Corre en el hilo de trabajo: usa la misma conexión que se interrumpe
+        return db.get_connection().execute(consulta).fetchone()
+
+    tarea = asyncio.ensure_future(db_async.ejecutar(larga))
+    await asyncio.sleep(0.05)
+    inicio = time.perf_counter()
+    tarea.cancel()
+    try:
+        await tarea
+    except asyncio.CancelledError:
+        pass
+    # La consulta ya abortó si el executor vuelve a estar libre enseguida
+    await db_async.contar_usuarios()
+    return time.perf_counter() - inicio
+
+
+async def main_async(db):
+    await secuencial(db)  # calentamiento
+    sync = await con_latido(secuencial(db))
+    async with DatabaseManagerAsync(db=db) as db_async:
+        await concurrente(db_async)  # calentamiento: abre las conexiones
+        asincrono = await con_latido(concurrente(db_async))
+        t_cancelar = await cancelacion(db, db_async)
+    return sync, asincrono, t_cancelar, db_async.TRABAJADORES_POR_DEFECTO
+
+
+def main():
+    print("=" * 60)
+    print(f"⏱️ BENCHMARK: {PETICIONES} PETICIONES CONCURRENTES (asyncio)")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, 'async.db')
+        db = DatabaseManager(ruta)
+        print(f"\n📌 Preparando {TOTAL_PRODUCTOS:,} productos y {TOTAL_USUARIOS:,} usuarios...")
+        preparar(db)
+
+        (t_sync, r_sync), (t_async, r_async), t_cancelar, hilos = asyncio.run(main_async(db))
+
+        print(f"\n{'Modo':<34}{'Tiempo (s)':>11}{'Peticiones/s':>14}{'Retraso loop (ms)':>19}")
+        print(f"{'Síncrono, una tras otra':<34}{t_sync:>11.2f}{PETICIONES / t_sync:>14,.0f}"
+              f"{r_sync * 1000:>19.0f}")
+        print(f"{f'asyncio + executor ({hilos} hilos)':<34}{t_async:>11.2f}{PETICIONES / t_async:>14,.0f}"
+              f"{r_async * 1000:>19.0f}")
+        print(f"\n📌 Rendimiento: {t_sync / t_async:.1f}x con {os.cpu_count()} CPU "
+              f"(SQLite libera el GIL mientras ejecuta)")
+        print(f"📌 Consulta larga cancelada y executor libre en {t_cancelar * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
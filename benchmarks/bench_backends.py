@@ -0,0 +1,121 @@
+# benchmarks/bench_backends.py
+"""
+Benchmark de los motores de productos (database/repositorio.py)
+Ejecuta la misma carga contra cada ProductoRepository: crear, leer por id,
+recorrer el catálogo por páginas ordenado por precio, actualizar y
+eliminar. Sirve para elegir TIENDA_BACKEND_PRODUCTOS en cada despliegue.
+
+SQLite usa una base temporal. MySQL usa la base configurada: los
+productos de prueba se crean con un nombre reconocible y se eliminan al
+final. Si MySQL no está disponible, se omite.
+
+Ejecutar: python benchmarks/bench_backends.py [OPERACIONES] [--solo sqlite|mysql]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_manager import DatabaseManager
+from database.repositorio import crear_repositorio
+
+OPERACIONES = 1000
+CATEGORIAS = ['audio', 'perifericos', 'computadoras', 'celulares', 'otros']
+PREFIJO = 'Bench backend'
+
+
+def medir(nombre, funcion, n):
+    """Imprime ops/s y la latencia p95 (ms); devuelve ops/s"""
+    tiempos = []
+    for i in range(n):
+        inicio = time.perf_counter()
+        funcion(i)
+        tiempos.append(time.perf_counter() - inicio)
+    total = sum(tiempos)
+    tiempos.sort()
+    p95 = tiempos[int(len(tiempos) * 0.95) - 1] * 1000 if tiempos else 0.0
+    print(f"   {nombre:<20} {n / total:>10,.0f} ops/s   p95 {p95:>7.2f} ms")
+    return n / total
+
+
+def ejecutar(repositorio, n):
+    """La misma carga para cualquier motor; devuelve operación -> ops/s"""
+    ids = []
+
+    def crear(i):
+        ids.append(repositorio.crear({
+            'nombre': f"{PREFIJO} {i}", 'precio': round(10 + (i % 997) * 1.37, 2),
+            'cantidad': i % 50, 'categoria': CATEGORIAS[i % len(CATEGORIAS)],
+            'descripcion': 'Producto de prueba del benchmark',
+        }))
+
+    def leer(i):
+        assert repositorio.obtener_por_id(ids[i % len(ids)]) is not None
+
+    estado = {'after': None, 'eliminados': 0}
+
+    def paginar(i):
+        # Listado por precio sin descripción; al terminar vuelve a empezar
+        _, estado['after'] = repositorio.obtener_pagina(
+            estado['after'], 50, 'precio', columnas=('nombre', 'cantidad', 'categoria')
+        )
+
+    def actualizar(i):
+        repositorio.actualizar(ids[i % len(ids)], precio=20.0 + i % 100, cantidad=i % 30)
+
+    def eliminar(i):
+        repositorio.eliminar(ids[i])
+        estado['eliminados'] = i + 1
+
+    resultados = {}
+    try:
+        resultados['crear'] = medir('crear', crear, n)
+        resultados['obtener_por_id'] = medir('obtener_por_id', leer, n)
+        resultados['pagina (precio)'] = medir('pagina (precio)', paginar, max(1, n // 10))
+        resultados['actualizar'] = medir('actualizar', actualizar, n)
+        resultados['eliminar'] = medir('eliminar', eliminar, len(ids))
+    finally:
+        # Si la carga se interrumpe, no dejar productos de prueba
+        for id in ids[estado['eliminados']:]:
+            repositorio.eliminar(id)
+    return resultados
+
+
+def main():
+    argumentos = [a for a in sys.argv[1:] if not a.startswith('--')]
+    n = int(argumentos[0]) if argumentos else OPERACIONES
+    solo = sys.argv[sys.argv.index('--solo') + 1] if '--solo' in sys.argv else None
+
+    print("=" * 60)
+    print(f"⏱️ BENCHMARK: MOTORES DE PRODUCTOS ({n:,} operaciones)")
+    print("=" * 60)
+
+    todos = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        if solo in (None, 'sqlite'):
+            print("\n📌 SQLite (base temporal):")
+            db = DatabaseManager(os.path.join(tmp, 'backends.db'))
+            todos['sqlite'] = ejecutar(crear_repositorio('sqlite', db=db), n)
+            db.cerrar_conexiones()
+
+        if solo in (None, 'mysql'):
+            print("\n📌 MySQL:")
+            repositorio = crear_repositorio('mysql')
+            try:
+                repositorio.contar()
+            except Exception as e:
+                print(f"   ⚠️ MySQL no disponible, se omite ({e})")
+            else:
+                todos['mysql'] = ejecutar(repositorio, n)
+
+    if len(todos) == 2:
+        print("\n📊 SQLite / MySQL (mayor que 1: SQLite es más rápido):")
+        for operacion in todos['sqlite']:
+            print(f"   {operacion:<20} x{todos['sqlite'][operacion] / todos['mysql'][operacion]:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# benchmarks/bench_busqueda.py
+"""
+Benchmark de búsqueda de productos: LIKE '%termino%' contra FTS5
+sobre un catálogo sintético de 500.000 productos.
+Ejecutar: python benchmarks/bench_busqueda.py
+"""
+
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_manager import DatabaseManager
+
+# Las cargas masivas superan a propósito el umbral de consulta lenta
+logging.getLogger('database.instrumentacion').setLevel(logging.ERROR)
+
+TOTAL_PRODUCTOS = 500_000
+REPETICIONES = 20
+# De más selectivo a menos: códigos de modelo raros, marca + tipo, tipo suelto
+TERMINOS = ['SO-4821', 'monitor LG-1234', 'xps 12', 'Audífonos sony', 'audifonos']
+
+MARCAS = ['Sony', 'Logitech', 'Dell', 'Samsung', 'Corsair', 'LG', 'Xiaomi', 'HP', 'Lenovo', 'Asus']
+TIPOS = ['Audífonos', 'Mouse', 'Teclado Mecánico', 'Monitor', 'Laptop', 'Webcam', 'Tablet', 'Celular']
+DETALLES = ['inalámbrico', 'ergonómico', 'RGB', 'Full HD', 'cancelación de ruido', 'gamer', 'XPS', 'Pro']
+
+
+def generar(n):
+    aleatorio = random.Random(42)
+    for i in range(1, n + 1):
+        tipo = aleatorio.choice(TIPOS)
+        marca = aleatorio.choice(MARCAS)
+        modelo = f"{marca[:2].upper()}-{aleatorio.randint(100, 9999)}"
+        yield {
+            'id': i,
+            'nombre': f"{tipo} {marca} {modelo} {aleatorio.choice(DETALLES)}",
+            'precio': round(aleatorio.uniform(10, 2000), 2),
+            'cantidad': aleatorio.randint(0, 50),
+            'categoria': 'otros',
+            'descripcion': f"{tipo} {aleatorio.choice(DETALLES)} de prueba",
+        }
+
+
+def medir(funcion):
+    inicio = time.perf_counter()
+    for _ in range(REPETICIONES):
+        resultados = funcion()
+    return (time.perf_counter() - inicio) / REPETICIONES * 1000, len(resultados)
+
+
+def main():
+    print("=" * 70)
+    print(f"⏱️ BENCHMARK: BÚSQUEDA EN {TOTAL_PRODUCTOS:,} PRODUCTOS")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, 'busqueda.db'))
+        print("\n📌 Generando catálogo sintético...")
+        inicio = time.perf_counter()
+        db.insertar_productos_lote(generar(TOTAL_PRODUCTOS), tamano_lote=5000)
+        print(f"   Insertado en {time.perf_counter() - inicio:.1f}s (incluye triggers FTS5)")
+
+        conn = db.get_connection()
+
+        # Consulta anterior de obtener_productos_por_nombre (sin límite)
+        def like(termino):
+            return conn.execute(
+                'SELECT * FROM productos WHERE nombre LIKE ?', (f'%{termino}%',)
+            ).fetchall()
+
+        print(f"\n{'Término':<20}{'LIKE (ms)':>12}{'filas':>8}{'FTS5 (ms)':>12}{'filas':>8}{'Mejora':>10}")
+        for termino in TERMINOS:
+            t_like, n_like = medir(lambda: like(termino))
+            t_fts, n_fts = medir(lambda: db.buscar_productos_texto(termino))
+            print(f"{termino:<20}{t_like:>12.2f}{n_like:>8}{t_fts:>12.2f}{n_fts:>8}{t_like / t_fts:>9.1f}x")
+
+        print(f"\nℹ️ FTS5 devuelve los 50 más relevantes; con {DatabaseManager.UMBRAL_RANKING_FTS} coincidencias")
+        print("   o más no ordena por bm25 y devuelve las primeras 50 por id")
+        print("ℹ️ LIKE no encuentra 'audifonos' en 'Audífonos'; FTS5 ignora las tildes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# benchmarks/bench_checkout.py
+"""
+Benchmark de compras concurrentes sobre los mismos productos
+Muchos hilos finalizan compras a la vez con DatabaseManager.finalizar_compra
+y al final se verifica que el stock nunca quedó negativo ni se vendió
+más de lo disponible.
+Ejecutar: python benchmarks/bench_checkout.py
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_manager import DatabaseManager
+
+HILOS = 32
+COMPRAS_POR_HILO = 40
+PRODUCTOS = 5          # todos los carritos compiten por los mismos SKUs
+STOCK_INICIAL = 1000
+UNIDADES_POR_LINEA = 3
+
+
+def preparar(db):
+    for i in range(1, PRODUCTOS + 1):
+        db.insertar_producto(SimpleNamespace(
+            id=i, nombre=f"SKU {i}", precio=10.0 * i, cantidad=STOCK_INICIAL,
+            categoria='otros', descripcion=''
+        ))
+
+
+def comprador(db, resultados, barrera):
+    barrera.wait()
+    for _ in range(COMPRAS_POR_HILO):
+        carrito_id = db.crear_carrito(usuario_id=None)
+        for producto_id in range(1, PRODUCTOS + 1):
+            db.agregar_item_carrito(carrito_id, producto_id, UNIDADES_POR_LINEA, 10.0 * producto_id)
+        try:
+            db.finalizar_compra(carrito_id, usuario_id=None)
+            resultados['ok'] += 1
+        except ValueError:
+            resultados['rechazadas'] += 1
+
+
+def main():
+    print("=" * 60)
+    print("⏱️ BENCHMARK: COMPRAS CONCURRENTES")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, 'checkout.db'))
+        preparar(db)
+
+        resultados = {'ok': 0, 'rechazadas': 0}
+        barrera = threading.Barrier(HILOS)
+        hilos = [threading.Thread(target=comprador, args=(db, resultados, barrera))
+                 for _ in range(HILOS)]
+
+        inicio = time.perf_counter()
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        duracion = time.perf_counter() - inicio
+
+        total = HILOS * COMPRAS_POR_HILO
+        print(f"\n📌 {HILOS} hilos x {COMPRAS_POR_HILO} compras sobre {PRODUCTOS} productos")
+        print(f"   Compras completadas: {resultados['ok']}")
+        print(f"   Compras rechazadas por stock: {resultados['rechazadas']}")
+        print(f"   Rendimiento: {total / duracion:,.0f} compras/s")
+
+        # Verificación: lo vendido coincide con lo descontado
+        conn = db.get_connection()
+        vendidas_esperadas = STOCK_INICIAL // UNIDADES_POR_LINEA
+        for producto_id, cantidad in conn.execute('SELECT id, cantidad FROM productos'):
+            vendidas = conn.execute(
+                'SELECT COALESCE(SUM(cantidad), 0) FROM venta_detalles WHERE producto_id = ?',
+                (producto_id,)
+            ).fetchone()[0]
+            assert cantidad >= 0, f"Stock negativo en producto {producto_id}"
+            assert cantidad + vendidas == STOCK_INICIAL, f"Stock inconsistente en producto {producto_id}"
+        assert resultados['ok'] == min(total, vendidas_esperadas)
+        print("\n✅ Sin sobreventa: stock final + unidades vendidas = stock inicial")
+
+
+if __name__ == "__main__":
+    main()
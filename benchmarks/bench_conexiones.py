@@ -0,0 +1,75 @@
+# benchmarks/bench_conexiones.py
+"""
+Benchmark del pool de conexiones SQLite de DatabaseManager
+Compara operaciones/segundo abriendo una conexión por operación (antes)
+contra las conexiones reutilizadas del pool (después).
+Ejecutar: python benchmarks/bench_conexiones.py
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_manager import DatabaseManager
+
+OPERACIONES = 5000
+
+
+class DatabaseManagerSinPool(DatabaseManager):
+    """Comportamiento anterior: sqlite3.connect() nuevo en cada método"""
+
+    def get_connection(self):
+        return sqlite3.connect(self.db_path)
+
+
+def medir(nombre, funcion, n):
+    inicio = time.perf_counter()
+    for i in range(n):
+        funcion(i)
+    duracion = time.perf_counter() - inicio
+    print(f"   {nombre:<28} {n / duracion:>12,.0f} ops/s")
+    return n / duracion
+
+
+def ejecutar(clase, db_path):
+    db = clase(db_path)
+
+    def insertar(i):
+        db.insertar_producto(SimpleNamespace(
+            id=i + 1, nombre=f"Producto {i}", precio=10.0 + i, cantidad=5,
+            categoria='otros', descripcion='Producto de prueba'
+        ))
+
+    def obtener(i):
+        db.obtener_producto_por_id(i + 1)
+
+    return {
+        'insertar_producto': medir('insertar_producto', insertar, OPERACIONES),
+        'obtener_producto_por_id': medir('obtener_producto_por_id', obtener, OPERACIONES),
+    }
+
+
+def main():
+    print("=" * 60)
+    print("⏱️ BENCHMARK: CONEXIONES SQLITE")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print("\n📌 Antes (una conexión por operación):")
+        antes = ejecutar(DatabaseManagerSinPool, os.path.join(tmp, 'antes.db'))
+
+        print("\n📌 Después (pool por hilo + WAL):")
+        despues = ejecutar(DatabaseManager, os.path.join(tmp, 'despues.db'))
+
+        print("\n📊 Mejora:")
+        for operacion in antes:
+            print(f"   {operacion:<28} x{despues[operacion] / antes[operacion]:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# benchmarks/bench_inventario.py
+"""
+Benchmark de las consultas del Inventario en memoria con 100.000 y
+1.000.000 de productos. Compara el recorrido lineal de self.productos
+(como se hacía antes) con los índices secundarios de models/inventario.py:
+categoría, stock bajo, rango de precios, nombre (trigramas) y los
+totales que mantiene obtener_estadisticas. También mide el
+autocompletado y actualizar_producto, que ahora mantiene los índices y
+los totales.
+
+Ejecutar: python benchmarks/bench_inventario.py [TAMAÑO ...]
+"""
+
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_manager import DatabaseManager
+from models.inventario import Inventario
+from models.producto import Producto
+
+# Las cargas masivas superan a propósito el umbral de consulta lenta
+logging.getLogger('database.instrumentacion').setLevel(logging.ERROR)
+
+TAMANOS = [100_000, 1_000_000]
+CATEGORIAS = list(Inventario.CATEGORIAS_VALIDAS)
+MARCAS = ['Sony', 'Logitech', 'Dell', 'Samsung', 'Corsair', 'LG', 'Xiaomi', 'HP', 'Lenovo', 'Asus']
+TIPOS = ['Audífonos', 'Mouse', 'Teclado Mecánico', 'Monitor', 'Laptop', 'Webcam', 'Tablet', 'Celular']
+REPETICIONES = 20
+ACTUALIZACIONES = 2000
+
+
+def generar(n):
+    for i in range(1, n + 1):
+        yield {
+            'id': i,
+            'nombre': f"{TIPOS[i % len(TIPOS)]} {MARCAS[i % len(MARCAS)]} {i}",
+            'precio': round(10 + (i % 1990) * 1.01, 2),
+            'cantidad': i % 500,
+            'categoria': CATEGORIAS[i % len(CATEGORIAS)],
+            'descripcion': "Producto de prueba del benchmark",
+        }
+
+
+def cronometrar(funcion, repeticiones=REPETICIONES):
+    """Milisegundos promedio por llamada"""
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        resultado = funcion()
+    return (time.perf_counter() - inicio) / repeticiones * 1000, resultado
+
+
+def comparar(nombre, lineal, indice):
+    ms_lineal, esperado = cronometrar(lineal)
+    ms_indice, obtenido = cronometrar(indice)
+    assert sorted(map(id, esperado)) == sorted(map(id, obtenido)), nombre
+    print(f"   {nombre:<32}{ms_lineal:>12.2f}{ms_indice:>12.3f}{ms_lineal / ms_indice:>10.0f}x")
+
+
+def ejecutar(n, tmp):
+    Producto.ids_utilizados.clear()
+    db = DatabaseManager(os.path.join(tmp, f'inventario_{n}.db'))
+    db.insertar_productos_lote(generar(n), tamano_lote=10000)
+    inicio = time.perf_counter()
+    inventario = Inventario(db)
+    print(f"   Carga con índices: {time.perf_counter() - inicio:.2f}s")
+    valores = inventario.productos.values
+
+    print(f"\n   {'Consulta':<32}{'Lineal (ms)':>12}{'Índice (ms)':>12}{'Mejora':>11}")
+    comparar('categoría',
+             lambda: [p for p in valores() if p.categoria == 'audio'],
+             lambda: inventario.obtener_por_categoria('audio'))
+    comparar('stock bajo (<= 5)',
+             lambda: [p for p in valores() if p.cantidad <= 5],
+             lambda: inventario.obtener_productos_con_bajo_stock(5))
+    comparar('precio entre 100 y 120',
+             lambda: [p for p in valores() if 100 <= p.precio <= 120],
+             lambda: inventario.obtener_por_rango_precio(100, 120))
+
+    comparar('nombre contiene "logitech 12"',
+             lambda: [p for p in valores() if 'logitech 12' in p.nombre.lower()],
+             lambda: inventario.buscar_productos('logitech 12'))
+    comparar('nombre contiene "audifonos"',
+             lambda: [p for p in valores() if 'audífonos' in p.nombre.lower()],
+             lambda: inventario.buscar_productos('audifonos'))
+
+    for prefijo in ('aud', 'teclado mec', 'sony 9'):
+        ms, _ = cronometrar(lambda: inventario.autocompletar(prefijo, 8), REPETICIONES * 50)
+        print(f"   {'autocompletar ' + repr(prefijo):<32}{'':>12}{ms:>12.3f}")
+
+    def estadisticas_lineales():
+        # Como antes: valor total y conteo por categoría recorriendo todo
+        valor_total = sum(p.precio * p.cantidad for p in valores())
+        por_categoria = {}
+        for p in valores():
+            por_categoria[p.categoria] = por_categoria.get(p.categoria, 0) + 1
+        return valor_total, por_categoria
+
+    ms_lineal, _ = cronometrar(estadisticas_lineales)
+    ms_indice, _ = cronometrar(inventario.obtener_estadisticas)
+    print(f"   {'estadísticas':<32}{ms_lineal:>12.2f}{ms_indice:>12.3f}{ms_lineal / ms_indice:>10.0f}x")
+
+    # Cada actualización escribe en SQLite y reubica el producto en los índices
+    inicio = time.perf_counter()
+    for i in range(ACTUALIZACIONES):
+        inventario.actualizar_producto(1 + i * (n // ACTUALIZACIONES), precio=50.0 + i % 100, cantidad=i % 20)
+    duracion = time.perf_counter() - inicio
+    print(f"\n   actualizar_producto: {ACTUALIZACIONES / duracion:,.0f} ops/s")
+    assert not inventario.verificar_consistencia()
+    db.cerrar_conexiones()
+
+
+def main():
+    tamanos = [int(a) for a in sys.argv[1:]] or TAMANOS
+    print("=" * 70)
+    print("⏱️ BENCHMARK: ÍNDICES SECUNDARIOS DEL INVENTARIO")
+    print("=" * 70)
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in tamanos:
+            print(f"\n📌 {n:,} productos:")
+            ejecutar(n, tmp)
+
+
+if __name__ == "__main__":
+    main()
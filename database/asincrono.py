@@ -0,0 +1,131 @@
+# database/asincrono.py
+"""
+Acceso a datos para código asyncio
+
+Envuelve los objetos síncronos (DatabaseManager, ProductoService) y
+ejecuta cada método en un executor propio, así el event loop nunca se
+bloquea y varias consultas independientes pueden correr a la vez:
+
+    db = DatabaseManagerAsync()
+    (productos, siguiente), usuarios = await asyncio.gather(
+        db.obtener_productos_pagina(limite=20), db.contar_usuarios()
+    )
+
+Los métodos tienen los mismos nombres que en la versión síncrona pero
+devuelven corrutinas. Si la tarea se cancela antes de empezar, la
+consulta no llega a ejecutarse; si ya está en curso, se interrumpe en
+el motor (conn.interrupt() en SQLite).
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from database.db_manager import DatabaseManager
+
+
+class AdaptadorAsincrono:
+    """
+    Base de los adaptadores: convierte cada método público del objeto
+    síncrono en una corrutina que corre en el executor del adaptador.
+    Las subclases definen cómo interrumpir una llamada en curso.
+    """
+
+    TRABAJADORES_POR_DEFECTO = 4
+
+    def __init__(self, sincrono, trabajadores=None, nombre='datos'):
+        self._sincrono = sincrono
+        self._executor = ThreadPoolExecutor(
+            max_workers=trabajadores or self.TRABAJADORES_POR_DEFECTO,
+            thread_name_prefix=f'{nombre}-async'
+        )
+        self._metodos = {}
+
+    def __getattr__(self, nombre):
+        # Solo se llama para atributos que no existen en el adaptador
+        if nombre.startswith('_'):
+            raise AttributeError(nombre)
+        atributo = getattr(self._sincrono, nombre)
+        if not callable(atributo):
+            return atributo
+        metodo = self._metodos.get(nombre)
+        if metodo is None:
+            metodo = self._metodos[nombre] = self._envolver(atributo)
+        return metodo
+
+    def _envolver(self, funcion):
+        async def llamada(*args, **kwargs):
+            return await self.ejecutar(funcion, *args, **kwargs)
+        llamada.__name__ = funcion.__name__
+        llamada.__doc__ = funcion.__doc__
+        return llamada
+
+    async def ejecutar(self, funcion, *args, **kwargs):
+        """
+        Ejecuta funcion(*args, **kwargs) en el executor. Si la tarea que
+        espera se cancela mientras la función corre, se pide al motor que
+        aborte la consulta y se propaga CancelledError.
+        """
+        loop = asyncio.get_running_loop()
+        en_curso = {}
+        lock = threading.Lock()
+
+        def trabajo():
+            with lock:
+                en_curso['ficha'] = self._preparar()
+            try:
+                return funcion(*args, **kwargs)
+            finally:
+                with lock:
+                    en_curso.clear()
+
+        futuro = loop.run_in_executor(self._executor, trabajo)
+        try:
+            return await futuro
+        except asyncio.CancelledError:
+            # Si aún no había empezado, el executor ya no la ejecutará
+            with lock:
+                if 'ficha' in en_curso:
+                    self._interrumpir(en_curso['ficha'])
+            raise
+
+    def _preparar(self):
+        """Se llama en el hilo de trabajo antes de cada método"""
+        return None
+
+    def _interrumpir(self, ficha):
+        """Aborta la operación identificada por la ficha de _preparar"""
+
+    def cerrar(self):
+        """Espera las operaciones pendientes y libera el executor"""
+        self._executor.shutdown(wait=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await asyncio.get_running_loop().run_in_executor(None, self.cerrar)
+
+
+class DatabaseManagerAsync(AdaptadorAsincrono):
+    """
+    Versión asyncio de DatabaseManager. Cada hilo del executor usa su
+    propia conexión del pool por hilo, así que las lecturas corren en
+    paralelo (WAL) y las escrituras se ordenan con busy_timeout. Al
+    cerrar, los hilos terminan y sus conexiones se liberan con ellos.
+    """
+
+    TRABAJADORES_POR_DEFECTO = min(8, (os.cpu_count() or 1) + 2)
+
+    def __init__(self, db_path="proyecto_tienda_tech.db", trabajadores=None, db=None):
+        super().__init__(db or DatabaseManager(db_path), trabajadores, nombre='sqlite')
+
+    def _preparar(self):
+        # Conexión del hilo de trabajo: la misma que usará el método
+        return self._sincrono.get_connection()
+
+    def _interrumpir(self, conexion):
+        # Seguro desde otro hilo; la consulta falla con "interrupted" y
+        # el 'with conn:' del método hace rollback
+        conexion.interrupt()
@@ -5,70 +5,616 @@ CONEXIÓN A MYSQL - Versión para Clever Cloud y Local
 
 import pymysql
 from pymysql import Error
+from pymysql.constants import SERVER_STATUS
 import os
+import random
+import threading
+import time
+import weakref
+from collections import deque
+from database.instrumentacion import CursorMySQLInstrumentado
+
+
+class PoolAgotado(pymysql.err.OperationalError):
+    """No se liberó ninguna conexión dentro del tiempo de espera"""
+
+
+class CircuitoAbierto(pymysql.err.OperationalError):
+    """MySQL se considera caído: se falla de inmediato sin intentar conectar"""
+
+
+def espera_exponencial(intento, base, maxima, azar=random.random):
+    """
+    Espera antes del reintento número 'intento' (desde 0): crece al doble
+    en cada intento hasta 'maxima' y se le aplica jitter (entre la mitad y
+    el total) para que los workers no reintenten todos a la vez.
+    """
+    espera = min(maxima, base * (2 ** intento))
+    return espera * (0.5 + azar() / 2)
+
+
+class Cortacircuitos:
+    """
+    Circuit breaker para MySQL.
+    
+    - cerrado: las llamadas pasan; se cuentan los fallos consecutivos
+    - abierto: tras 'umbral_fallos' fallos seguidos, todas fallan al
+      instante con CircuitoAbierto durante una espera que crece de forma
+      exponencial (con jitter) cada vez que se vuelve a abrir
+    - semi_abierto: vencida la espera, se deja pasar una sola llamada de
+      prueba; si funciona se cierra, si falla se vuelve a abrir
+    """
+    
+    CERRADO = 'cerrado'
+    ABIERTO = 'abierto'
+    SEMI_ABIERTO = 'semi_abierto'
+    
+    def __init__(self, umbral_fallos=5, espera_base=1.0, espera_maxima=60.0,
+                 reloj=time.monotonic, azar=random.random):
+        if umbral_fallos < 1:
+            raise ValueError("El umbral de fallos debe ser al menos 1")
+        self.umbral_fallos = umbral_fallos
+        self.espera_base = espera_base
+        self.espera_maxima = espera_maxima
+        self._reloj = reloj
+        self._azar = azar
+        self._lock = threading.Lock()
+        self._estado = self.CERRADO
+        self._fallos = 0
+        self._aperturas_seguidas = 0
+        self._reabre_en = 0.0
+        self._sondeo_en_curso = False
+        self._contadores = {'aperturas': 0, 'rechazadas': 0, 'fallos': 0}
+    
+    def permitir(self):
+        """
+        Decide si una llamada puede intentarse. Lanza CircuitoAbierto si no.
+        
+        Returns:
+            bool: True si esta llamada es la prueba del estado semi_abierto
+        """
+        with self._lock:
+            if self._estado == self.CERRADO:
+                return False
+            if self._estado == self.ABIERTO:
+                restante = self._reabre_en - self._reloj()
+                if restante > 0:
+                    self._contadores['rechazadas'] += 1
+                    raise CircuitoAbierto(f"MySQL no disponible, se reintentará en {restante:.1f}s")
+                self._estado = self.SEMI_ABIERTO
+                self._sondeo_en_curso = False
+            if self._sondeo_en_curso:
+                self._contadores['rechazadas'] += 1
+                raise CircuitoAbierto("MySQL no disponible, hay una prueba de conexión en curso")
+            self._sondeo_en_curso = True
+            return True
+    
+    def registrar_exito(self, sondeo=False):
+        with self._lock:
+            if sondeo and self._estado == self.SEMI_ABIERTO:
+                print("✅ Circuito MySQL cerrado: la conexión se recuperó")
+                self._estado = self.CERRADO
+                self._aperturas_seguidas = 0
+                self._sondeo_en_curso = False
+            if self._estado == self.CERRADO:
+                self._fallos = 0
+    
+    def registrar_fallo(self):
+        with self._lock:
+            self._fallos += 1
+            self._contadores['fallos'] += 1
+            if self._estado == self.SEMI_ABIERTO or (
+                    self._estado == self.CERRADO and self._fallos >= self.umbral_fallos):
+                espera = espera_exponencial(self._aperturas_seguidas, self.espera_base,
+                                            self.espera_maxima, self._azar)
+                self._aperturas_seguidas += 1
+                self._contadores['aperturas'] += 1
+                self._estado = self.ABIERTO
+                self._reabre_en = self._reloj() + espera
+                self._sondeo_en_curso = False
+                print(f"⚡ Circuito MySQL abierto tras {self._fallos} fallos; nueva prueba en {espera:.1f}s")
+    
+    def cancelar_sondeo(self):
+        """La prueba terminó sin veredicto (p. ej. pool agotado): se permite otra"""
+        with self._lock:
+            self._sondeo_en_curso = False
+    
+    def estado(self):
+        """Estado para monitoreo"""
+        with self._lock:
+            reabre_en = max(0.0, self._reabre_en - self._reloj()) if self._estado == self.ABIERTO else None
+            return dict(self._contadores, estado=self._estado, fallos_consecutivos=self._fallos,
+                        umbral_fallos=self.umbral_fallos, reabre_en_segundos=reabre_en)
+
+
+class ConexionPrestada:
+    """
+    Conexión de pymysql prestada por un PoolMySQL. Se usa igual que la
+    original; close() (o salir del 'with') la devuelve al pool en vez
+    de cerrarla.
+    """
+    
+    __slots__ = ('_pool', '_conexion', '_creada', '__weakref__')
+    
+    def __init__(self, pool, conexion, creada):
+        self._pool = pool
+        self._conexion = conexion
+        self._creada = creada
+    
+    def __getattr__(self, nombre):
+        conexion = self._conexion
+        if conexion is None:
+            raise Error("La conexión ya fue devuelta al pool")
+        return getattr(conexion, nombre)
+    
+    def close(self):
+        conexion, self._conexion = self._conexion, None
+        if conexion is not None:
+            self._pool.devolver(conexion, self._creada)
+    
+    def descartar(self):
+        """
+        Cierra la conexión real en vez de devolverla. Sirve para abandonar
+        un resultado sin buffer (SSCursor) sin leer las filas que faltan.
+        """
+        conexion, self._conexion = self._conexion, None
+        if conexion is not None:
+            self._pool.devolver(conexion, self._creada, descartar=True)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+    
+    def __del__(self):
+        # Red de seguridad para código que olvida cerrar en un except
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class ResultadoStreaming:
+    """
+    Iterador sobre un cursor sin buffer (SSCursor) que pide las filas al
+    servidor de a 'tamano_trozo'. Al agotarse cierra el cursor y devuelve
+    la conexión; si se cierra antes (o se pierde la referencia, p. ej.
+    porque el cliente cortó la descarga), descarta la conexión en vez de
+    leer el resto del resultado.
+    
+    Es verdadero mientras queden filas: bool() adelanta la primera fila
+    pendiente, así '{% if productos %}' funciona igual que con una lista.
+    
+    'convertir', si se pasa, se aplica a cada fila (p. ej. dict -> registro).
+    """
+    
+    def __init__(self, conexion, cursor, tamano_trozo=1000, convertir=None):
+        self._conexion = conexion
+        self._cursor = cursor
+        self._tamano_trozo = tamano_trozo
+        self._convertir = convertir
+        self._trozo = iter(())
+        self._adelantada = None
+    
+    def __iter__(self):
+        return self
+    
+    def __bool__(self):
+        if self._adelantada is None:
+            try:
+                self._adelantada = (next(self),)
+            except StopIteration:
+                return False
+        return True
+    
+    def __next__(self):
+        if self._adelantada is not None:
+            fila, = self._adelantada
+            self._adelantada = None
+            return fila
+        for fila in self._trozo:
+            return fila
+        if self._cursor is None:
+            raise StopIteration
+        trozo = self._cursor.fetchmany(self._tamano_trozo)
+        if not trozo:
+            self._terminar(agotado=True)
+            raise StopIteration
+        self._trozo = iter(trozo) if self._convertir is None else map(self._convertir, trozo)
+        return next(self._trozo)
+    
+    def _terminar(self, agotado):
+        cursor, self._cursor = self._cursor, None
+        if cursor is None:
+            return
+        if agotado:
+            cursor.close()
+            self._conexion.close()
+        else:
+            self._conexion.descartar()
+    
+    def close(self):
+        self._terminar(agotado=False)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+    
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class PoolMySQL:
+    """
+    Pool de conexiones MySQL acotado y compartido por todo el proceso.
+    
+    - mínimo: conexiones que se mantienen abiertas aunque estén inactivas
+    - máximo: tope de conexiones abiertas; al llegar, obtener() espera
+    - vida_maxima: segundos tras los cuales una conexión se reemplaza
+      (antes de que el servidor la corte por wait_timeout)
+    - timeout: segundos que obtener() espera una conexión libre
+    - ping_tras: segundos de inactividad a partir de los cuales se hace
+      ping antes de prestarla (0 = siempre)
+    - conectar: función que abre una conexión; permite probar el pool
+      contra un servidor compatible o un doble de pruebas
+    - cortacircuitos: Cortacircuitos opcional; cuenta los fallos al abrir
+      conexiones y las conexiones que vuelven rotas (timeout de lectura,
+      conexión perdida). El éxito se registra cuando una conexión vuelve
+      sana, es decir, después de sus consultas: con un MySQL lento que
+      acepta conexiones pero no responde, prestar no reinicia la cuenta.
+    - reintentos: reintentos al abrir una conexión, con espera exponencial
+    """
+    
+    REINTENTO_BASE = 0.05
+    REINTENTO_MAXIMO = 0.5
+    
+    def __init__(self, config, minimo=1, maximo=10, vida_maxima=1800, timeout=5.0,
+                 ping_tras=1.0, conectar=pymysql.connect, cortacircuitos=None, reintentos=1):
+        if minimo < 0 or maximo < 1 or minimo > maximo:
+            raise ValueError("Tamaños de pool inválidos: se requiere 0 <= mínimo <= máximo y máximo >= 1")
+        self.config = config
+        self.minimo = minimo
+        self.maximo = maximo
+        self.vida_maxima = vida_maxima
+        self.timeout = timeout
+        self.ping_tras = ping_tras
+        self._conectar = conectar
+        self.cortacircuitos = cortacircuitos
+        self.reintentos = reintentos
+        # (conexión, creada_en, devuelta_en); se presta la última devuelta
+        self._libres = deque()
+        self._abiertas = 0
+        self._cerrado = False
+        self._condicion = threading.Condition()
+        self._contadores = {'creadas': 0, 'descartadas': 0, 'prestamos': 0, 'esperas': 0, 'agotado': 0}
+    
+    def _abrir(self):
+        for intento in range(self.reintentos + 1):
+            try:
+                conexion = self._conectar(**self.config)
+                break
+            except pymysql.err.OperationalError:
+                if intento == self.reintentos:
+                    raise
+                time.sleep(espera_exponencial(intento, self.REINTENTO_BASE, self.REINTENTO_MAXIMO))
+        print("✅ Conexión exitosa a MySQL")
+        return conexion
+    
+    def _descartar(self, conexion):
+        """Cierra una conexión que sale del pool (se llama sin el lock)"""
+        try:
+            conexion.close()
+        except Exception:
+            pass
+    
+    def _sana(self, conexion, devuelta_en, forzar_ping=False):
+        if not conexion.open:
+            return False
+        if not forzar_ping and self.ping_tras and time.monotonic() - devuelta_en < self.ping_tras:
+            return True
+        try:
+            conexion.ping(reconnect=False)
+            return True
+        except Error:
+            return False
+    
+    def obtener(self, timeout=None):
+        """
+        Presta una conexión sana. Lanza PoolAgotado si no hay ninguna libre
+        dentro del tiempo de espera, CircuitoAbierto si MySQL se considera
+        caído, o el error de pymysql si no se puede abrir.
+        """
+        limite = time.monotonic() + (self.timeout if timeout is None else timeout)
+        cortacircuitos = self.cortacircuitos
+        sondeo = cortacircuitos.permitir() if cortacircuitos else False
+        try:
+            prestada = self._obtener(limite, sondeo)
+        except Exception:
+            if sondeo:
+                cortacircuitos.cancelar_sondeo()
+            raise
+        if sondeo:
+            # La prueba hizo ping (ida y vuelta real): cierra el circuito
+            cortacircuitos.registrar_exito(sondeo=True)
+        return prestada
+    
+    def _obtener(self, limite, sondeo):
+        while True:
+            candidata = None
+            with self._condicion:
+                if self._cerrado:
+                    raise Error("El pool de conexiones está cerrado")
+                while not self._libres and self._abiertas >= self.maximo:
+                    restante = limite - time.monotonic()
+                    if restante <= 0:
+                        self._contadores['agotado'] += 1
+                        raise PoolAgotado(f"No hay conexiones libres ({self.maximo} en uso)")
+                    self._contadores['esperas'] += 1
+                    self._condicion.wait(restante)
+                if self._libres:
+                    candidata = self._libres.pop()
+                else:
+                    self._abiertas += 1
+            
+            if candidata is None:
+                try:
+                    conexion = self._abrir()
+                except Exception as e:
+                    with self._condicion:
+                        self._abiertas -= 1
+                        self._condicion.notify()
+                    if self.cortacircuitos and isinstance(e, pymysql.err.OperationalError):
+                        self.cortacircuitos.registrar_fallo()
+                    raise
+                with self._condicion:
+                    self._contadores['creadas'] += 1
+                    self._contadores['prestamos'] += 1
+                return ConexionPrestada(self, conexion, time.monotonic())
+            
+            conexion, creada, devuelta_en = candidata
+            # La vida máxima y el ping se revisan fuera del lock; la llamada
+            # de prueba del cortacircuitos siempre hace ping
+            if time.monotonic() - creada < self.vida_maxima and self._sana(conexion, devuelta_en, sondeo):
+                with self._condicion:
+                    self._contadores['prestamos'] += 1
+                return ConexionPrestada(self, conexion, creada)
+            self._descartar(conexion)
+            with self._condicion:
+                self._abiertas -= 1
+                self._contadores['descartadas'] += 1
+                self._condicion.notify()
+    
+    def devolver(self, conexion, creada, descartar=False):
+        """
+        Recibe una conexión prestada; la descarta si quedó inservible o
+        vencida, o si se pide con descartar=True
+        """
+        if self.cortacircuitos:
+            if not conexion.open:
+                # pymysql cierra la conexión ante timeouts o pérdida de conexión
+                self.cortacircuitos.registrar_fallo()
+            elif not descartar:
+                # Volvió sana: sus consultas respondieron
+                self.cortacircuitos.registrar_exito()
+        util = not descartar and conexion.open and time.monotonic() - creada < self.vida_maxima
+        if util and conexion.server_status & SERVER_STATUS.SERVER_STATUS_IN_TRANS:
+            # Sin esto el siguiente que la use vería la transacción (y la
+            # instantánea de lectura) del anterior
+            try:
+                conexion.rollback()
+            except Error:
+                util = False
+        with self._condicion:
+            if util and not self._cerrado:
+                self._libres.append((conexion, creada, time.monotonic()))
+                self._condicion.notify()
+                return
+            self._abiertas -= 1
+            self._contadores['descartadas'] += 1
+            self._condicion.notify()
+        self._descartar(conexion)
+    
+    def calentar(self):
+        """Abre conexiones hasta tener el mínimo configurado"""
+        prestadas = []
+        try:
+            while len(prestadas) < self.minimo:
+                with self._condicion:
+                    if self._abiertas >= self.minimo:
+                        break
+                prestadas.append(self.obtener())
+        finally:
+            for prestada in prestadas:
+                prestada.close()
+    
+    def recortar(self, inactividad=60):
+        """Cierra conexiones libres inactivas por más de 'inactividad' segundos, respetando el mínimo"""
+        ahora = time.monotonic()
+        sobrantes = []
+        with self._condicion:
+            while (self._libres and self._abiertas > self.minimo
+                   and ahora - self._libres[0][2] > inactividad):
+                sobrantes.append(self._libres.popleft()[0])
+                self._abiertas -= 1
+                self._contadores['descartadas'] += 1
+        for conexion in sobrantes:
+            self._descartar(conexion)
+        return len(sobrantes)
+    
+    def cerrar(self):
+        """Cierra las conexiones libres; las prestadas se cierran al devolverse"""
+        with self._condicion:
+            self._cerrado = True
+            libres = [c for c, _, _ in self._libres]
+            self._libres.clear()
+            self._abiertas -= len(libres)
+            self._condicion.notify_all()
+        for conexion in libres:
+            self._descartar(conexion)
+    
+    def estadisticas(self):
+        with self._condicion:
+            return dict(self._contadores, abiertas=self._abiertas, libres=len(self._libres),
+                        en_uso=self._abiertas - len(self._libres), maximo=self.maximo)
+
 
 class MySQLConnection:
     """
     Clase que maneja la conexión a MySQL.
     - En LOCAL: usa WAMP (root/contraseña vacía)
     - En RENDER: usa Clever Cloud (variables de entorno)
+    
+    Las conexiones salen de un PoolMySQL único por proceso; conectar()
+    presta una y cerrar() (o conn.close()) la devuelve.
     """
     
+    # Última conexión prestada a cada hilo, para poder cancelar su
+    # consulta desde otro hilo (referencias débiles: no la mantienen viva)
+    _por_hilo = weakref.WeakValueDictionary()
+    
+    # Configuración y pool compartidos por el proceso
+    _config = None
+    _pool = None
+    _pool_pid = None
+    _pool_lock = threading.Lock()
+    
+    # Tamaño y tiempos del pool, configurables por entorno
+    POOL_MINIMO = int(os.environ.get('TIENDA_MYSQL_POOL_MIN', 1))
+    POOL_MAXIMO = int(os.environ.get('TIENDA_MYSQL_POOL_MAX', 10))
+    POOL_VIDA_MAXIMA = float(os.environ.get('TIENDA_MYSQL_POOL_VIDA', 1800))
+    POOL_TIMEOUT = float(os.environ.get('TIENDA_MYSQL_POOL_TIMEOUT', 5))
+    
+    # Timeouts de socket (segundos): sin ellos, un MySQL colgado deja
+    # bloqueado al worker indefinidamente
+    TIMEOUTS = {
+        'connect_timeout': int(os.environ.get('TIENDA_MYSQL_CONNECT_TIMEOUT', 3)),
+        'read_timeout': int(os.environ.get('TIENDA_MYSQL_READ_TIMEOUT', 10)),
+        'write_timeout': int(os.environ.get('TIENDA_MYSQL_WRITE_TIMEOUT', 10)),
+    }
+    
+    # Cortacircuitos: fallos seguidos para abrirlo y espera antes de probar
+    CB_FALLOS = int(os.environ.get('TIENDA_MYSQL_CB_FALLOS', 5))
+    CB_ESPERA = float(os.environ.get('TIENDA_MYSQL_CB_ESPERA', 1))
+    CB_ESPERA_MAXIMA = float(os.environ.get('TIENDA_MYSQL_CB_ESPERA_MAX', 60))
+    
     def __init__(self):
         """Configura la conexión según el entorno"""
-        
+        self.config = MySQLConnection.configuracion()
+        self.connection = None
+    
+    @classmethod
+    def configuracion(cls):
+        """Lee la configuración del entorno una sola vez por proceso"""
+        if cls._config is None:
+            cls._config = cls._leer_configuracion()
+            print(f"📋 Conectando a: {cls._config['host']}/{cls._config['database']}")
+        return cls._config
+    
+    @staticmethod
+    def _leer_configuracion():
         # Detectar si estamos en Render (producción)
         if os.environ.get('RENDER'):
             # 🔥 MODO PRODUCCIÓN - Usar Clever Cloud
             print("🌐 Modo PRODUCCIÓN: Conectando a Clever Cloud...")
             
             # Obtener variables de entorno (las configuraremos en Render)
-            self.config = {
+            config = {
                 'host': os.environ.get('CLEVER_MYSQL_HOST'),
                 'user': os.environ.get('CLEVER_MYSQL_USER'),
                 'password': os.environ.get('CLEVER_MYSQL_PASSWORD'),
                 'database': os.environ.get('CLEVER_MYSQL_DATABASE'),
                 'port': int(os.environ.get('CLEVER_MYSQL_PORT', 3306)),
                 'charset': 'utf8mb4',
-                'cursorclass': pymysql.cursors.DictCursor
+                'cursorclass': CursorMySQLInstrumentado,
+                **MySQLConnection.TIMEOUTS
             }
             
             # Verificar que todas las variables existen
-            for key, value in self.config.items():
+            for key, value in config.items():
                 if key != 'port' and value is None:
                     raise ValueError(f"❌ Variable de entorno {key} no está definida en Render")
             
         else:
             # 🔥 MODO DESARROLLO LOCAL - Usar WAMP (contraseña vacía)
             print("💻 Modo DESARROLLO LOCAL: Conectando a WAMP...")
-            self.config = {
+            config = {
                 'host': 'localhost',
                 'user': 'root',
                 'password': '123456',  # 🔥
                 'database': 'proyecto_tienda_tech',
                 'port': 3306,
                 'charset': 'utf8mb4',
-                'cursorclass': pymysql.cursors.DictCursor
+                'cursorclass': CursorMySQLInstrumentado,
+                **MySQLConnection.TIMEOUTS
             }
-        
-        self.connection = None
-        print(f"📋 Conectando a: {self.config['host']}/{self.config['database']}")
+        return config
+    
+    @classmethod
+    def pool(cls):
+        """Pool del proceso (se crea de nuevo en el hijo tras un fork)"""
+        with cls._pool_lock:
+            if cls._pool is None or cls._pool_pid != os.getpid():
+                cls._pool = PoolMySQL(
+                    cls.configuracion(), minimo=cls.POOL_MINIMO, maximo=cls.POOL_MAXIMO,
+                    vida_maxima=cls.POOL_VIDA_MAXIMA, timeout=cls.POOL_TIMEOUT,
+                    cortacircuitos=Cortacircuitos(cls.CB_FALLOS, cls.CB_ESPERA, cls.CB_ESPERA_MAXIMA)
+                )
+                cls._pool_pid = os.getpid()
+            return cls._pool
+    
+    @classmethod
+    def estado_circuito(cls):
+        """Estado del cortacircuitos y del pool, para monitoreo"""
+        pool = cls.pool()
+        return {'circuito': pool.cortacircuitos.estado(), 'pool': pool.estadisticas()}
     
     def conectar(self):
-        """Establece la conexión con MySQL"""
+        """Pide prestada una conexión del pool"""
         try:
-            self.connection = pymysql.connect(**self.config)
-            print("✅ Conexión exitosa a MySQL")
+            self.connection = MySQLConnection.pool().obtener()
+            MySQLConnection._por_hilo[threading.get_ident()] = self.connection
             return self.connection
         except Error as e:
             print(f"❌ Error de conexión: {e}")
             return None
     
+    def cancelar_consulta(self, hilo):
+        """
+        Aborta la consulta en curso de la conexión abierta por otro hilo
+        usando KILL QUERY desde una conexión nueva (pymysql no tiene una
+        forma de interrumpir desde fuera del hilo que espera la respuesta).
+        
+        Returns:
+            bool: True si se envió la cancelación
+        """
+        prestada = MySQLConnection._por_hilo.get(hilo)
+        # Si ya se devolvió al pool, la conexión puede estar en otro hilo
+        conexion = prestada._conexion if prestada is not None else None
+        if conexion is None or not conexion.open:
+            return False
+        try:
+            control = pymysql.connect(**self.config)
+            try:
+                with control.cursor() as cursor:
+                    cursor.execute("KILL QUERY %s", (conexion.thread_id(),))
+            finally:
+                control.close()
+            return True
+        except Error as e:
+            print(f"⚠️ No se pudo cancelar la consulta: {e}")
+            return False
+    
     def cerrar(self):
-        """Cierra la conexión"""
+        """Devuelve la conexión al pool"""
         if self.connection:
             self.connection.close()
-            print("🔒 Conexión cerrada")
+            self.connection = None
     
     def ejecutar_query(self, query, params=None, fetch=False):
         """
@@ -4,7 +4,17 @@ Gestor de base de datos SQLite para proyecto_tienda_tech
 """
 
 import sqlite3
+import threading
 import os
+import re
+import json
+import time
+from itertools import islice
+from database import migraciones
+from database import paginacion
+from database import instrumentacion
+from database.registros import (FabricaRegistros, columnas_sql, COLUMNAS_PRODUCTO,
+                                 COLUMNAS_USUARIO, COLUMNAS_USUARIO_PUBLICAS)
 
 class DatabaseManager:
     """
@@ -12,120 +22,96 @@ class DatabaseManager:
     para la tienda proyecto_tienda_tech
     """
     
+    # Configuración aplicada una sola vez a cada conexión del pool
+    BUSY_TIMEOUT_MS = 5000
+    CACHE_PAGINAS_KB = 20000  # ~20 MB de caché de páginas por conexión
+    
+    # Filas por executemany en las operaciones por lote (por debajo del
+    # límite de 999 parámetros de SQLite en las consultas IN)
+    TAMANO_LOTE = 500
+    
+    # Pool por hilo: cada hilo reutiliza su propia conexión por archivo de BD.
+    # Es compartido por todas las instancias, así app.py, Inventario y
+    # MenuConsola usan las mismas conexiones en lugar de abrir nuevas.
+    # Cuando un hilo termina, su conexión se libera junto con el threading.local
+    _pool_local = threading.local()
+    
+    # Archivos de BD cuyo esquema ya se verificó en este proceso
+    _esquemas_verificados = set()
+    _esquemas_lock = threading.Lock()
+    
+    # Archivo de BD -> existe el índice FTS5 (se consulta una vez)
+    _fts_disponible = {}
+    
+    # Con al menos estas coincidencias, un término se considera común y la
+    # búsqueda de texto no ordena por bm25 (ordenarlas todas cuesta más que
+    # el LIKE anterior): devuelve las primeras por id
+    UMBRAL_RANKING_FTS = 2000
+    
     def __init__(self, db_name="proyecto_tienda_tech.db"):
         """
-        Constructor: establece la conexión y crea las tablas si no existen
+        Constructor: establece la conexión y aplica las migraciones pendientes
         """
         # Obtener la ruta absoluta para la base de datos
         self.db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), db_name)
-        self.crear_tablas()
-        self.crear_tabla_usuarios()
-        self.crear_tabla_carrito()
-        self.crear_tabla_clientes()
+        self.aplicar_migraciones()
     
-    def get_connection(self):
+    def aplicar_migraciones(self):
         """
-        Obtiene una conexión a la base de datos
+        Lleva el esquema a la última versión. Cada archivo de BD se verifica
+        una sola vez por proceso, así construir más instancias no cuesta nada.
         """
-        return sqlite3.connect(self.db_path)
+        if self.db_path in self._esquemas_verificados:
+            return []
+        with self._esquemas_lock:
+            if self.db_path in self._esquemas_verificados:
+                return []
+            aplicadas = migraciones.aplicar_migraciones(self.get_connection())
+            self._esquemas_verificados.add(self.db_path)
+            return aplicadas
     
-    def crear_tablas(self):
+    def get_connection(self):
         """
-        Crea las tablas necesarias si no existen
+        Obtiene la conexión del pool para el hilo actual.
+        La conexión se abre la primera vez y luego se reutiliza; usarla con
+        'with' sigue haciendo commit/rollback pero ya no la cierra.
         """
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Tabla de productos
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS productos (
-                    id INTEGER PRIMARY KEY,
-                    nombre TEXT NOT NULL,
-                    precio REAL NOT NULL,
-                    cantidad INTEGER NOT NULL,
-                    categoria TEXT NOT NULL,
-                    descripcion TEXT
-                )
-            ''')
-            
-            # Índice para búsquedas rápidas por nombre
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_productos_nombre 
-                ON productos(nombre)
-            ''')
-            
-            conn.commit()
-            print("✅ Tabla de productos creada/verificada correctamente")
-    
-    def crear_tabla_usuarios(self):
-        """Crea la tabla de usuarios en la base de datos"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS usuarios (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nombre TEXT NOT NULL,
-                    email TEXT UNIQUE NOT NULL,
-                    password TEXT NOT NULL,
-                    fecha_nacimiento TEXT NOT NULL,
-                    proveedor TEXT DEFAULT 'email',
-                    rol TEXT DEFAULT 'cliente',
-                    fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            conn.commit()
-            print("✅ Tabla 'usuarios' creada/verificada")
+        conexiones = getattr(self._pool_local, 'conexiones', None)
+        if conexiones is None:
+            conexiones = self._pool_local.conexiones = {}
+        
+        pid, conn = conexiones.get(self.db_path, (None, None))
+        # Tras un fork (gunicorn) el proceso hijo no debe reutilizar
+        # las conexiones heredadas del padre
+        if conn is None or pid != os.getpid():
+            conn = self._abrir_conexion()
+            conexiones[self.db_path] = (os.getpid(), conn)
+        return conn
     
-    def crear_tabla_clientes(self):
-        """Crea la tabla de clientes en la base de datos"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS clientes (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nombre TEXT NOT NULL,
-                    email TEXT UNIQUE NOT NULL,
-                    password TEXT NOT NULL,
-                    fecha_nacimiento TEXT NOT NULL,
-                    proveedor TEXT DEFAULT 'email',
-                    fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            conn.commit()
-            print("✅ Tabla 'clientes' creada/verificada")
+    def _abrir_conexion(self):
+        """
+        Abre una conexión nueva y aplica los PRAGMA de rendimiento
+        """
+        # factory: conexión que mide cada consulta (database/instrumentacion.py)
+        conn = sqlite3.connect(self.db_path, timeout=self.BUSY_TIMEOUT_MS / 1000,
+                               factory=instrumentacion.fabrica_conexion_sqlite())
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA busy_timeout={self.BUSY_TIMEOUT_MS}')
+        conn.execute(f'PRAGMA cache_size=-{self.CACHE_PAGINAS_KB}')
+        # Las filas se leen como registros con nombre (ver database/registros.py)
+        conn.row_factory = FabricaRegistros()
+        return conn
     
-    def crear_tabla_carrito(self):
-        """Crea las tablas relacionadas con el carrito"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Tabla de carritos
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS carritos (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    usuario_id INTEGER,
-                    fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    estado TEXT DEFAULT 'activo',
-                    FOREIGN KEY (usuario_id) REFERENCES usuarios(id)
-                )
-            ''')
-            
-            # Tabla de items del carrito
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS carrito_items (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    carrito_id INTEGER NOT NULL,
-                    producto_id INTEGER NOT NULL,
-                    cantidad INTEGER NOT NULL,
-                    precio_unitario REAL NOT NULL,
-                    fecha_agregado TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (carrito_id) REFERENCES carritos(id),
-                    FOREIGN KEY (producto_id) REFERENCES productos(id)
-                )
-            ''')
-            
-            conn.commit()
-            print("✅ Tablas de carrito creadas/verificadas")
+    def cerrar_conexiones(self):
+        """
+        Cierra las conexiones del pool abiertas por el hilo actual
+        """
+        conexiones = getattr(self._pool_local, 'conexiones', None) or {}
+        for pid, conn in conexiones.values():
+            if pid == os.getpid():
+                conn.close()
+        conexiones.clear()
     
     # ----- MÉTODOS PARA PRODUCTOS -----
     
@@ -149,31 +135,136 @@ class DatabaseManager:
             conn.commit()
             return cursor.lastrowid
     
-    def obtener_todos_productos(self):
+    def obtener_todos_productos(self, columnas=None):
         """
-        Obtiene todos los productos de la base de datos
+        Obtiene todos los productos de la base de datos.
+        'columnas' limita las columnas leídas (p. ej. sin descripción en listados).
         """
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('SELECT * FROM productos ORDER BY id')
+            cursor.execute(f'SELECT {columnas_sql(columnas, COLUMNAS_PRODUCTO)} FROM productos ORDER BY id')
             return cursor.fetchall()
     
+    def obtener_productos_pagina(self, after=None, limite=None, orden='id',
+                                 categoria=None, stock_maximo=None, columnas=None):
+        """
+        Obtiene una página de productos con paginación por clave (keyset).
+        
+        Args:
+            after (str): cursor devuelto por la página anterior
+            limite (int): filas por página (acotado a LIMITE_MAXIMO)
+            orden (str): 'id', 'precio' o 'cantidad'
+            categoria (str): filtra por categoría
+            stock_maximo (int): solo productos con cantidad <= stock_maximo
+            columnas (tuple): proyección; siempre incluye id y la columna de orden
+        
+        Returns:
+            tuple: (filas, cursor de la siguiente página o None)
+        """
+        limite = paginacion.normalizar_limite(limite or paginacion.LIMITE_POR_DEFECTO)
+        orden = paginacion.normalizar_orden(orden)
+        condicion, valores = paginacion.condicion_keyset(
+            orden, paginacion.decodificar_cursor(after, orden)
+        )
+        
+        condiciones = [condicion] if condicion else []
+        if categoria:
+            condiciones.append('categoria = ?')
+            valores.append(categoria)
+        if stock_maximo is not None:
+            condiciones.append('cantidad <= ?')
+            valores.append(stock_maximo)
+        where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ''
+        orden_sql = 'id' if orden == 'id' else f'{orden}, id'
+        if columnas:
+            # El cursor de la página siguiente necesita el id y el valor de orden
+            columnas = tuple(dict.fromkeys(('id', orden) + tuple(columnas)))
+        select = columnas_sql(columnas, COLUMNAS_PRODUCTO)
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'SELECT {select} FROM productos {where} ORDER BY {orden_sql} LIMIT ?',
+                           valores + [limite + 1])
+            return paginacion.siguiente_pagina(cursor.fetchall(), limite, orden)
+    
     def obtener_producto_por_id(self, id):
         """
         Obtiene un producto por su ID
         """
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('SELECT * FROM productos WHERE id = ?', (id,))
+            cursor.execute(f'SELECT {columnas_sql(None, COLUMNAS_PRODUCTO)} FROM productos WHERE id = ?', (id,))
             return cursor.fetchone()
     
     def obtener_productos_por_nombre(self, nombre):
         """
-        Busca productos por nombre (búsqueda parcial)
+        Busca productos por nombre (búsqueda parcial).
+        Usa el índice FTS5 cuando existe; si no, recurre a LIKE.
+        """
+        if self.tiene_busqueda_texto():
+            return self.buscar_productos_texto(nombre)
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'SELECT {columnas_sql(None, COLUMNAS_PRODUCTO)} FROM productos WHERE nombre LIKE ?',
+                           (f'%{nombre}%',))
+            return cursor.fetchall()
+    
+    def tiene_busqueda_texto(self):
+        """
+        Indica si la tabla productos_fts existe (SQLite compilado con FTS5)
         """
+        if self.db_path not in self._fts_disponible:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'productos_fts'"
+                )
+                self._fts_disponible[self.db_path] = cursor.fetchone() is not None
+        return self._fts_disponible[self.db_path]
+    
+    @staticmethod
+    def _consulta_fts(termino):
+        """
+        Convierte el texto del usuario en una consulta FTS5 segura:
+        cada palabra se busca por prefijo y todas deben aparecer
+        """
+        palabras = re.findall(r'\w+', termino or '')
+        return ' '.join(f'"{palabra}"*' for palabra in palabras)
+    
+    def buscar_productos_texto(self, termino, limite=50):
+        """
+        Búsqueda de texto completo en nombre y descripción, ordenada por
+        relevancia (bm25, con más peso al nombre). Cada palabra se busca
+        por prefijo y sin distinguir tildes: "audif" encuentra "Audífonos".
+        
+        Para términos comunes (UMBRAL_RANKING_FTS coincidencias o más) no
+        se ordena por relevancia: se devuelven las primeras 'limite' por
+        id, y la consulta se detiene al llegar al límite.
+        """
+        consulta = self._consulta_fts(termino)
+        if not consulta:
+            return []
+        
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('SELECT * FROM productos WHERE nombre LIKE ?', (f'%{nombre}%',))
+            # Contar se detiene en el umbral: barato aunque el término sea muy común
+            cursor.execute('''
+                SELECT COUNT(*) FROM (
+                    SELECT rowid FROM productos_fts WHERE productos_fts MATCH ? LIMIT ?
+                )
+            ''', (consulta, self.UMBRAL_RANKING_FTS))
+            comun = cursor.fetchone()[0] >= self.UMBRAL_RANKING_FTS
+            orden = 'productos_fts.rowid' if comun else 'bm25(productos_fts, 10.0, 1.0)'
+            
+            columnas = ', '.join(f'p.{c}' for c in COLUMNAS_PRODUCTO)
+            cursor.execute(f'''
+                SELECT {columnas} FROM productos_fts
+                JOIN productos p ON p.id = productos_fts.rowid
+                WHERE productos_fts MATCH ?
+                ORDER BY {orden}
+                LIMIT ?
+            ''', (consulta, limite))
             return cursor.fetchall()
     
     def obtener_productos_por_categoria(self, categoria):
@@ -182,7 +273,8 @@ class DatabaseManager:
         """
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('SELECT * FROM productos WHERE categoria = ?', (categoria,))
+            cursor.execute(f'SELECT {columnas_sql(None, COLUMNAS_PRODUCTO)} FROM productos WHERE categoria = ?',
+                           (categoria,))
             return cursor.fetchall()
     
     def actualizar_producto(self, id, nombre=None, precio=None, cantidad=None, 
@@ -242,28 +334,316 @@ class DatabaseManager:
             cursor.execute('SELECT 1 FROM productos WHERE id = ?', (id,))
             return cursor.fetchone() is not None
     
+    def contar_productos(self):
+        """
+        Cuenta los productos sin traer las filas
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT COUNT(*) FROM productos')
+            return cursor.fetchone()[0]
+    
+    def obtener_productos_bajo_stock(self, limite=5):
+        """
+        Obtiene los productos con cantidad <= limite, de menor a mayor stock
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'SELECT {columnas_sql(None, COLUMNAS_PRODUCTO)} FROM productos '
+                           'WHERE cantidad <= ? ORDER BY cantidad, id', (limite,))
+            return cursor.fetchall()
+    
+    def obtener_estadisticas_productos(self):
+        """
+        Total de productos, valor del inventario y productos por categoría
+        (mismo formato que ProductoService.obtener_estadisticas)
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT categoria, COUNT(*) AS total, COALESCE(SUM(precio * cantidad), 0) AS valor_total
+                FROM productos GROUP BY categoria ORDER BY categoria
+            ''')
+            categorias = cursor.fetchall()
+        return {
+            'total': sum(c.total for c in categorias),
+            'valor_total': sum(c.valor_total for c in categorias),
+            'productos_por_categoria': {c.categoria: c.total for c in categorias},
+        }
+    
+    def obtener_productos_por_ids(self, ids):
+        """
+        Obtiene los productos de la lista de IDs (los que existen), en
+        consultas IN de como máximo TAMANO_LOTE IDs
+        """
+        productos = []
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            for lote in self._en_lotes(ids, self.TAMANO_LOTE):
+                cursor.execute(f'''
+                    SELECT {columnas_sql(None, COLUMNAS_PRODUCTO)} FROM productos
+                    WHERE id IN ({','.join('?' * len(lote))})
+                ''', lote)
+                productos.extend(cursor.fetchall())
+        return productos
+    
+    # ----- SECUENCIA DE CAMBIOS (coherencia entre procesos) -----
+    
+    def ultima_secuencia_cambios(self):
+        """
+        Secuencia del último cambio en productos (0 si no hubo ninguno).
+        Es la consulta que se repite para saber si hay algo nuevo: lee el
+        final del índice de la clave primaria.
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT COALESCE(MAX(secuencia), 0) FROM productos_cambios')
+            return cursor.fetchone()[0]
+    
+    def obtener_cambios_productos(self, desde):
+        """
+        Productos cambiados (insertados, actualizados o eliminados) después
+        de la secuencia 'desde', como (secuencia, producto_id) en orden
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT secuencia, producto_id FROM productos_cambios
+                WHERE secuencia > ? ORDER BY secuencia
+            ''', (desde,))
+            return [tuple(fila) for fila in cursor.fetchall()]
+    
+    # ----- OPERACIONES POR LOTE PARA PRODUCTOS -----
+    
+    @staticmethod
+    def _en_lotes(iterable, tamano):
+        """
+        Divide cualquier iterable en listas de como máximo 'tamano' elementos
+        sin cargarlo completo en memoria
+        """
+        iterador = iter(iterable)
+        while True:
+            lote = list(islice(iterador, tamano))
+            if not lote:
+                return
+            yield lote
+    
+    @staticmethod
+    def _fila_producto(producto):
+        """
+        Convierte un Producto (o un diccionario con las mismas claves)
+        en la tupla de columnas de la tabla productos
+        """
+        campos = ('id', 'nombre', 'precio', 'cantidad', 'categoria', 'descripcion')
+        if isinstance(producto, dict):
+            return tuple(producto.get(campo) for campo in campos)
+        return tuple(getattr(producto, campo, None) for campo in campos)
+    
+    def _ids_existentes(self, cursor, ids):
+        """
+        Devuelve el conjunto de IDs de la lista que ya existen en productos
+        """
+        ids = [id for id in ids if id is not None]
+        if not ids:
+            return set()
+        marcadores = ','.join('?' * len(ids))
+        cursor.execute(f'SELECT id FROM productos WHERE id IN ({marcadores})', ids)
+        return {fila[0] for fila in cursor.fetchall()}
+    
+    def _ejecutar_lote(self, cursor, query, filas, conflictos, clave):
+        """
+        Ejecuta un executemany dentro de un SAVEPOINT. Si alguna fila falla,
+        deshace solo este lote y lo repite fila por fila para reportar
+        el conflicto exacto sin abortar la transacción completa.
+        Devuelve las filas que se aplicaron.
+        """
+        if not filas:
+            return []
+        cursor.execute('SAVEPOINT lote')
+        try:
+            cursor.executemany(query, filas)
+            cursor.execute('RELEASE SAVEPOINT lote')
+            return filas
+        except sqlite3.DatabaseError:
+            cursor.execute('ROLLBACK TO SAVEPOINT lote')
+            cursor.execute('RELEASE SAVEPOINT lote')
+        
+        aplicadas = []
+        for fila in filas:
+            try:
+                cursor.execute(query, fila)
+                aplicadas.append(fila)
+            except sqlite3.DatabaseError as e:
+                conflictos.append((clave(fila), str(e)))
+        return aplicadas
+    
+    def insertar_productos_lote(self, productos, tamano_lote=None, al_confirmar_lote=None):
+        """
+        Inserta muchos productos en una sola transacción usando executemany
+        por lotes. Los IDs repetidos o filas inválidas se reportan como
+        conflictos sin abortar el resto.
+        
+        Args:
+            productos: iterable de Producto o diccionarios
+            tamano_lote (int): filas por executemany
+            al_confirmar_lote: función opcional que recibe las filas
+                insertadas de cada lote, una vez hecho el commit
+        
+        Returns:
+            dict: procesados, insertados y conflictos [(id, motivo)]
+        """
+        resumen = {'procesados': 0, 'insertados': 0, 'conflictos': []}
+        query = '''
+            INSERT INTO productos (id, nombre, precio, cantidad, categoria, descripcion)
+            VALUES (?, ?, ?, ?, ?, ?)
+        '''
+        
+        confirmados = []  # filas aplicadas por lote, para avisar tras el commit
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            for lote in self._en_lotes(productos, tamano_lote or self.TAMANO_LOTE):
+                resumen['procesados'] += len(lote)
+                filas = [self._fila_producto(p) for p in lote]
+                existentes = self._ids_existentes(cursor, [f[0] for f in filas])
+                
+                vistos = set()
+                nuevas = []
+                for fila in filas:
+                    if fila[0] in existentes or fila[0] in vistos:
+                        resumen['conflictos'].append((fila[0], 'El ID ya existe'))
+                        continue
+                    if fila[0] is not None:
+                        vistos.add(fila[0])
+                    nuevas.append(fila)
+                
+                insertadas = self._ejecutar_lote(cursor, query, nuevas,
+                                                 resumen['conflictos'], lambda f: f[0])
+                resumen['insertados'] += len(insertadas)
+                if al_confirmar_lote and insertadas:
+                    confirmados.append(insertadas)
+            conn.commit()
+        for insertadas in confirmados:
+            al_confirmar_lote(insertadas)
+        return resumen
+    
+    def actualizar_productos_lote(self, cambios, tamano_lote=None, al_confirmar_lote=None):
+        """
+        Actualiza muchos productos en una sola transacción.
+        Cada elemento es un diccionario con 'id' y los campos a modificar;
+        los campos ausentes o en None conservan su valor actual.
+        al_confirmar_lote recibe, tras el commit, los (id, campos) de cada lote.
+        
+        Returns:
+            dict: procesados, actualizados y conflictos [(id, motivo)]
+        """
+        resumen = {'procesados': 0, 'actualizados': 0, 'conflictos': []}
+        campos = ('nombre', 'precio', 'cantidad', 'categoria', 'descripcion')
+        query = '''
+            UPDATE productos SET
+                nombre = COALESCE(?, nombre),
+                precio = COALESCE(?, precio),
+                cantidad = COALESCE(?, cantidad),
+                categoria = COALESCE(?, categoria),
+                descripcion = COALESCE(?, descripcion)
+            WHERE id = ?
+        '''
+        
+        confirmados = []
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            for lote in self._en_lotes(cambios, tamano_lote or self.TAMANO_LOTE):
+                resumen['procesados'] += len(lote)
+                existentes = self._ids_existentes(cursor, [c.get('id') for c in lote])
+                
+                filas = []
+                for datos in lote:
+                    if datos.get('id') not in existentes:
+                        resumen['conflictos'].append((datos.get('id'), 'El producto no existe'))
+                        continue
+                    filas.append(tuple(datos.get(campo) for campo in campos) + (datos['id'],))
+                
+                actualizadas = self._ejecutar_lote(cursor, query, filas,
+                                                   resumen['conflictos'], lambda f: f[-1])
+                resumen['actualizados'] += len(actualizadas)
+                if al_confirmar_lote and actualizadas:
+                    confirmados.append([
+                        (fila[-1], {c: v for c, v in zip(campos, fila) if v is not None})
+                        for fila in actualizadas
+                    ])
+            conn.commit()
+        for actualizadas in confirmados:
+            al_confirmar_lote(actualizadas)
+        return resumen
+    
+    def eliminar_productos_lote(self, ids, tamano_lote=None, al_confirmar_lote=None):
+        """
+        Elimina muchos productos por ID en una sola transacción.
+        Los IDs que no existen se reportan como conflictos.
+        al_confirmar_lote recibe, tras el commit, los IDs eliminados de cada lote.
+        
+        Returns:
+            dict: procesados, eliminados y conflictos [(id, motivo)]
+        """
+        resumen = {'procesados': 0, 'eliminados': 0, 'conflictos': []}
+        
+        confirmados = []
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            for lote in self._en_lotes(ids, tamano_lote or self.TAMANO_LOTE):
+                resumen['procesados'] += len(lote)
+                existentes = self._ids_existentes(cursor, lote)
+                
+                filas = []
+                for id in lote:
+                    if id not in existentes:
+                        resumen['conflictos'].append((id, 'El producto no existe'))
+                        continue
+                    existentes.discard(id)  # IDs repetidos en la entrada
+                    filas.append((id,))
+                
+                eliminadas = self._ejecutar_lote(cursor, 'DELETE FROM productos WHERE id = ?',
+                                                 filas, resumen['conflictos'], lambda f: f[0])
+                resumen['eliminados'] += len(eliminadas)
+                if al_confirmar_lote and eliminadas:
+                    confirmados.append([fila[0] for fila in eliminadas])
+            conn.commit()
+        for eliminadas in confirmados:
+            al_confirmar_lote(eliminadas)
+        return resumen
+    
     # ----- MÉTODOS PARA USUARIOS -----
     
-    def insertar_usuario(self, usuario):
+    def insertar_usuario(self, usuario, replicar=False):
         """
-        Inserta un nuevo usuario en la base de datos
+        Inserta un nuevo usuario en la base de datos.
+        Con replicar=True también deja el usuario en la outbox, en la misma
+        transacción, para que el DespachadorOutbox lo copie a MySQL.
         """
+        fila = (
+            usuario.nombre,
+            usuario.email,
+            usuario.password,
+            usuario.fecha_nacimiento if isinstance(usuario.fecha_nacimiento, str) 
+                else usuario.fecha_nacimiento.strftime("%Y-%m-%d"),
+            usuario.proveedor,
+            getattr(usuario, 'rol', 'cliente')
+        )
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 INSERT INTO usuarios (nombre, email, password, fecha_nacimiento, proveedor, rol)
                 VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
-                usuario.nombre,
-                usuario.email,
-                usuario.password,
-                usuario.fecha_nacimiento if isinstance(usuario.fecha_nacimiento, str) 
-                    else usuario.fecha_nacimiento.strftime("%Y-%m-%d"),
-                usuario.proveedor,
-                getattr(usuario, 'rol', 'cliente')
-            ))
+            ''', fila)
+            usuario_id = cursor.lastrowid
+            if replicar:
+                carga = dict(zip(('nombre', 'email', 'password', 'fecha_nacimiento', 'proveedor', 'rol'), fila),
+                             id=usuario_id)
+                self._encolar_outbox(cursor, 'usuario', carga)
             conn.commit()
-            return cursor.lastrowid
+            return usuario_id
     
     def obtener_usuario_por_email(self, email):
         """
@@ -274,25 +654,142 @@ class DatabaseManager:
             cursor.execute('SELECT * FROM usuarios WHERE email = ?', (email,))
             return cursor.fetchone()
     
-    def obtener_usuario_por_id(self, id):
+    def obtener_usuario_por_id(self, id, columnas=None):
         """
-        Obtiene un usuario por su ID
+        Obtiene un usuario por su ID.
+        'columnas' permite no leer el password cuando no hace falta.
         """
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('SELECT * FROM usuarios WHERE id = ?', (id,))
+            cursor.execute(f'SELECT {columnas_sql(columnas, COLUMNAS_USUARIO)} FROM usuarios WHERE id = ?', (id,))
             return cursor.fetchone()
     
     # 🔥 NUEVO MÉTODO - OBTENER TODOS LOS USUARIOS
-    def obtener_todos_usuarios(self):
+    def obtener_todos_usuarios(self, columnas=COLUMNAS_USUARIO_PUBLICAS):
         """
-        Obtiene todos los usuarios registrados en el sistema
+        Obtiene todos los usuarios registrados en el sistema.
+        Por defecto no incluye el password.
         """
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('SELECT * FROM usuarios ORDER BY id')
+            cursor.execute(f'SELECT {columnas_sql(columnas, COLUMNAS_USUARIO)} FROM usuarios ORDER BY id')
             return cursor.fetchall()
     
+    def obtener_usuarios_pagina(self, after=None, limite=None, columnas=COLUMNAS_USUARIO_PUBLICAS):
+        """
+        Obtiene una página de usuarios ordenados por id (keyset).
+        Por defecto no incluye el password.
+        
+        Returns:
+            tuple: (filas, cursor de la siguiente página o None)
+        """
+        limite = paginacion.normalizar_limite(limite or paginacion.LIMITE_POR_DEFECTO)
+        condicion, valores = paginacion.condicion_keyset(
+            'id', paginacion.decodificar_cursor(after, 'id')
+        )
+        where = f'WHERE {condicion}' if condicion else ''
+        columnas = tuple(dict.fromkeys(('id',) + tuple(columnas or COLUMNAS_USUARIO)))
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'SELECT {columnas_sql(columnas, COLUMNAS_USUARIO)} FROM usuarios {where} ORDER BY id LIMIT ?',
+                           valores + [limite + 1])
+            return paginacion.siguiente_pagina(cursor.fetchall(), limite, 'id')
+    
+    def contar_usuarios(self):
+        """
+        Cuenta los usuarios registrados sin traer las filas
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT COUNT(*) FROM usuarios')
+            return cursor.fetchone()[0]
+    
+    # ----- OUTBOX (replicación hacia MySQL) -----
+    
+    @staticmethod
+    def _encolar_outbox(cursor, tipo, carga):
+        """Agrega un mensaje a la outbox dentro de la transacción del llamador"""
+        cursor.execute(
+            'INSERT INTO outbox (tipo, carga) VALUES (?, ?)',
+            (tipo, json.dumps(carga, ensure_ascii=False, default=str))
+        )
+    
+    def reclamar_outbox(self, limite=100, reserva=60.0):
+        """
+        Toma hasta 'limite' mensajes disponibles y los reserva durante
+        'reserva' segundos, así otro proceso no los envía a la vez. Si el
+        que los reservó muere, vuelven a estar disponibles al vencer.
+        
+        Returns:
+            list: registros (id, tipo, carga, intentos) con la carga ya decodificada
+        """
+        ahora = time.time()
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.execute('''
+                SELECT id, tipo, carga, intentos FROM outbox
+                WHERE estado = 'pendiente' AND disponible_en <= ?
+                ORDER BY disponible_en, id LIMIT ?
+            ''', (ahora, limite))
+            mensajes = cursor.fetchall()
+            if mensajes:
+                marcadores = ','.join('?' * len(mensajes))
+                cursor.execute(f'UPDATE outbox SET disponible_en = ? WHERE id IN ({marcadores})',
+                               [ahora + reserva] + [m.id for m in mensajes])
+        return [m._replace(carga=json.loads(m.carga)) for m in mensajes]
+    
+    def confirmar_outbox(self, ids):
+        """Borra los mensajes ya aplicados en el destino"""
+        with self.get_connection() as conn:
+            for lote in self._en_lotes(ids, self.TAMANO_LOTE):
+                conn.execute(f'DELETE FROM outbox WHERE id IN ({",".join("?" * len(lote))})', lote)
+    
+    def reintentar_outbox(self, ids, error, espera, max_intentos=None):
+        """
+        Deja los mensajes para otro intento dentro de 'espera' segundos.
+        Con max_intentos, los que llegan a ese número de intentos pasan a
+        'fallido' y no se vuelven a reclamar.
+        """
+        disponible_en = time.time() + espera
+        with self.get_connection() as conn:
+            for lote in self._en_lotes(ids, self.TAMANO_LOTE):
+                conn.execute(f'''
+                    UPDATE outbox SET intentos = intentos + 1, ultimo_error = ?, disponible_en = ?,
+                        estado = CASE WHEN ? IS NOT NULL AND intentos + 1 >= ? THEN 'fallido' ELSE estado END
+                    WHERE id IN ({",".join("?" * len(lote))})
+                ''', [str(error)[:500], disponible_en, max_intentos, max_intentos] + lote)
+    
+    def fallar_outbox(self, ids, error):
+        """Pasa los mensajes a 'fallido' sin más reintentos (p. ej. un conflicto de datos)"""
+        with self.get_connection() as conn:
+            for lote in self._en_lotes(ids, self.TAMANO_LOTE):
+                conn.execute(f'''
+                    UPDATE outbox SET intentos = intentos + 1, ultimo_error = ?, estado = 'fallido'
+                    WHERE id IN ({",".join("?" * len(lote))})
+                ''', [str(error)[:500]] + lote)
+    
+    def reactivar_outbox(self):
+        """Vuelve a poner en cola los mensajes fallidos (tras corregir el problema). Returns: cantidad"""
+        with self.get_connection() as conn:
+            return conn.execute('''
+                UPDATE outbox SET estado = 'pendiente', intentos = 0, disponible_en = 0
+                WHERE estado = 'fallido'
+            ''').rowcount
+    
+    def estado_outbox(self):
+        """Mensajes pendientes y fallidos, el pendiente más antiguo y el mayor número de intentos"""
+        with self.get_connection() as conn:
+            fila = conn.execute('''
+                SELECT COALESCE(SUM(estado = 'pendiente'), 0) AS pendientes,
+                       COALESCE(SUM(estado = 'fallido'), 0) AS fallidos,
+                       MIN(CASE WHEN estado = 'pendiente' THEN creado_en END) AS mas_antiguo,
+                       COALESCE(MAX(intentos), 0) AS max_intentos
+                FROM outbox
+            ''').fetchone()
+            return fila._asdict()
+    
     # ----- MÉTODOS PARA CLIENTES -----
     
     def insertar_cliente(self, cliente):
@@ -397,37 +894,80 @@ class DatabaseManager:
             conn.commit()
             return cursor.rowcount
     
-    def finalizar_compra(self, carrito_id, usuario_id, total):
+    def finalizar_compra(self, carrito_id, usuario_id, total=None):
         """
-        Finaliza una compra (crea venta y actualiza stock)
+        Finaliza una compra en una sola transacción: crea la venta, copia
+        las líneas del carrito a venta_detalles con INSERT ... SELECT y
+        descuenta el stock con un único UPDATE que no permite vender
+        más unidades de las disponibles.
+        
+        Si total es None se calcula a partir de las líneas del carrito.
+        Lanza ValueError (y deshace todo) si el carrito no está activo,
+        está vacío o algún producto no tiene stock suficiente.
         """
         with self.get_connection() as conn:
             cursor = conn.cursor()
+            # Toma el bloqueo de escritura desde el inicio para que dos
+            # compras simultáneas no lean el mismo stock
+            cursor.execute('BEGIN IMMEDIATE')
+            
+            cursor.execute('SELECT estado FROM carritos WHERE id = ?', (carrito_id,))
+            carrito = cursor.fetchone()
+            if not carrito or carrito[0] != 'activo':
+                raise ValueError(f"El carrito {carrito_id} no está activo")
+            
+            # Stock pedido contra stock disponible, una fila por producto
+            cursor.execute('''
+                SELECT ci.producto_id, p.nombre,
+                       COALESCE(p.cantidad, 0) >= SUM(ci.cantidad) AS alcanza
+                FROM carrito_items ci
+                LEFT JOIN productos p ON p.id = ci.producto_id
+                WHERE ci.carrito_id = ?
+                GROUP BY ci.producto_id
+            ''', (carrito_id,))
+            lineas = cursor.fetchall()
+            if not lineas:
+                raise ValueError(f"El carrito {carrito_id} está vacío")
+            sin_stock = [nombre or f"ID {producto_id}" for producto_id, nombre, alcanza in lineas
+                         if not alcanza]
+            if sin_stock:
+                raise ValueError(f"Stock insuficiente para: {', '.join(sin_stock)}")
             
             # Crear venta
             cursor.execute('''
-                INSERT INTO ventas (usuario_id, total)
-                VALUES (?, ?)
-            ''', (usuario_id, total))
+                INSERT INTO ventas (usuario_id, carrito_id, total)
+                VALUES (?, ?, COALESCE(?, (
+                    SELECT SUM(cantidad * precio_unitario)
+                    FROM carrito_items WHERE carrito_id = ?
+                )))
+            ''', (usuario_id, carrito_id, total, carrito_id))
             venta_id = cursor.lastrowid
             
-            # Obtener items del carrito
-            items = self.obtener_items_carrito(carrito_id)
+            # Pasar todas las líneas del carrito a la venta de una vez
+            cursor.execute('''
+                INSERT INTO venta_detalles (venta_id, producto_id, cantidad, precio_unitario, subtotal)
+                SELECT ?, producto_id, SUM(cantidad), precio_unitario, SUM(cantidad * precio_unitario)
+                FROM carrito_items
+                WHERE carrito_id = ?
+                GROUP BY producto_id, precio_unitario
+            ''', (venta_id, carrito_id))
             
-            # Insertar detalles y actualizar stock
-            for item in items:
-                # Insertar detalle
-                cursor.execute('''
-                    INSERT INTO venta_detalles (venta_id, producto_id, cantidad, precio_unitario, subtotal)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (venta_id, item[2], item[3], item[4], item[3] * item[4]))
-                
-                # Actualizar stock
-                cursor.execute('''
-                    UPDATE productos 
-                    SET cantidad = cantidad - ? 
-                    WHERE id = ?
-                ''', (item[3], item[2]))
+            # Descontar stock con un único UPDATE; la condición sobre la
+            # cantidad impide vender más de lo disponible
+            cursor.execute('''
+                UPDATE productos
+                SET cantidad = cantidad - (
+                    SELECT SUM(ci.cantidad) FROM carrito_items ci
+                    WHERE ci.carrito_id = ? AND ci.producto_id = productos.id
+                )
+                WHERE id IN (SELECT producto_id FROM carrito_items WHERE carrito_id = ?)
+                  AND cantidad >= (
+                    SELECT SUM(ci.cantidad) FROM carrito_items ci
+                    WHERE ci.carrito_id = ? AND ci.producto_id = productos.id
+                )
+            ''', (carrito_id, carrito_id, carrito_id))
+            if cursor.rowcount != len(lineas):
+                raise ValueError("El stock cambió durante la compra, intenta de nuevo")
             
             # Marcar carrito como completado
             cursor.execute('''
@@ -0,0 +1,484 @@
+# database/instrumentacion.py
+"""
+Instrumentación de consultas SQL para SQLite y MySQL
+
+Cada execute de DatabaseManager, MySQLConnection y ProductoService pasa
+por los cursores de este módulo, que registran por sentencia:
+  - histograma de latencias (ms) y percentiles aproximados
+  - número de ejecuciones, errores y filas leídas o afectadas
+Las sentencias que superan el umbral se guardan en el registro de
+consultas lentas junto con su plan (EXPLAIN QUERY PLAN / EXPLAIN) y se
+avisan con logging (logger 'database.instrumentacion', nivel WARNING;
+se silencia con logging.getLogger('database.instrumentacion').setLevel(logging.ERROR)).
+
+Configuración por variables de entorno:
+  TIENDA_INSTRUMENTACION   '0' para desactivarla (por defecto activa)
+  TIENDA_SLOW_QUERY_MS     umbral de consulta lenta en ms (por defecto 200)
+  TIENDA_SLOW_QUERY_LOG    archivo donde anexar las consultas lentas (JSON por línea)
+  TIENDA_METRICAS_JSON     archivo donde volcar las métricas al terminar el proceso
+
+Uso:
+    from database import instrumentacion
+    instrumentacion.obtener_metricas()      # dict por sentencia
+    instrumentacion.consultas_lentas()      # últimas consultas lentas con su plan
+    instrumentacion.volcar_json('metricas.json')
+"""
+
+import atexit
+import bisect
+import functools
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from collections import deque
+from datetime import datetime
+from time import perf_counter
+
+import pymysql
+
+ACTIVA = os.environ.get('TIENDA_INSTRUMENTACION', '1') != '0'
+UMBRAL_LENTA_MS = float(os.environ.get('TIENDA_SLOW_QUERY_MS', 200))
+ARCHIVO_LENTAS = os.environ.get('TIENDA_SLOW_QUERY_LOG')
+ARCHIVO_METRICAS = os.environ.get('TIENDA_METRICAS_JSON')
+
+# Límites superiores (ms) de cada cubeta del histograma; la última es el resto
+CUBETAS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+MAX_LENTAS_EN_MEMORIA = 200
+
+logger = logging.getLogger(__name__)
+
+# Solo estas sentencias admiten EXPLAIN en ambos motores
+_EXPLICABLES = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+_ESPACIOS = re.compile(r'\s+')
+# "IN (?, ?, ?)" o "VALUES (%s, %s), (%s, %s)" se agrupan en una sola sentencia
+_MARCADORES = re.compile(r'(?:\?|%s)(?:\s*,\s*(?:\?|%s))+')
+_TUPLAS = re.compile(r'\(\s*\?\.\.\.\s*\)(?:\s*,\s*\(\s*\?\.\.\.\s*\))+')
+
+
+@functools.lru_cache(maxsize=2048)
+def normalizar_sentencia(sql):
+    """
+    Clave estable para agrupar ejecuciones de la misma sentencia
+    (con caché: el mismo texto SQL se repite en cada llamada)
+    """
+    sql = _ESPACIOS.sub(' ', sql).strip()
+    sql = _MARCADORES.sub('?...', sql)
+    return _TUPLAS.sub('(?...), ...', sql)
+
+
+class MetricasConsultas:
+    """Acumulador de métricas por sentencia, seguro entre hilos"""
+
+    def __init__(self, umbral_ms=UMBRAL_LENTA_MS, archivo_lentas=ARCHIVO_LENTAS):
+        self.umbral_ms = umbral_ms
+        self.archivo_lentas = archivo_lentas
+        self._lock = threading.Lock()
+        self._sentencias = {}
+        self._lentas = deque(maxlen=MAX_LENTAS_EN_MEMORIA)
+        # Ejecuciones anotadas desde __del__ (ver diferir)
+        self._diferidas = deque()
+
+    def registrar(self, motor, sql, segundos, filas=None, error=False, explicar=None):
+        """
+        Anota una ejecución. 'explicar' es una función que devuelve el plan
+        y solo se llama si la consulta resultó lenta.
+        """
+        ms = segundos * 1000
+        clave = normalizar_sentencia(sql)
+        with self._lock:
+            self._incorporar_diferidas()
+            self._acumular(motor, clave, ms, filas, error)
+
+        if ms >= self.umbral_ms and not error:
+            self._registrar_lenta(motor, clave, sql, ms, filas, explicar)
+
+    def diferir(self, motor, sql, segundos, filas=None):
+        """
+        Anota una ejecución sin tomar el lock, sin pedir el plan y sin
+        escribir archivos. Es para los __del__: el recolector los corre en
+        cualquier hilo, incluso en medio de un registrar que ya tiene el
+        lock. Se suma a las métricas en el próximo registrar u obtener y
+        no pasa por el registro de consultas lentas.
+        """
+        self._diferidas.append((motor, sql, segundos * 1000, filas))
+
+    def _incorporar_diferidas(self):
+        # Se llama con el lock tomado; deque.popleft es atómico
+        while self._diferidas:
+            try:
+                motor, sql, ms, filas = self._diferidas.popleft()
+            except IndexError:
+                break
+            self._acumular(motor, normalizar_sentencia(sql), ms, filas, False)
+
+    def _acumular(self, motor, clave, ms, filas, error):
+        datos = self._sentencias.get((motor, clave))
+        if datos is None:
+            datos = self._sentencias[(motor, clave)] = {
+                'ejecuciones': 0, 'errores': 0, 'filas': 0, 'total_ms': 0.0,
+                'min_ms': ms, 'max_ms': ms, 'histograma': [0] * (len(CUBETAS_MS) + 1),
+            }
+        datos['ejecuciones'] += 1
+        datos['errores'] += bool(error)
+        datos['filas'] += max(filas or 0, 0)
+        datos['total_ms'] += ms
+        datos['min_ms'] = min(datos['min_ms'], ms)
+        datos['max_ms'] = max(datos['max_ms'], ms)
+        datos['histograma'][bisect.bisect_left(CUBETAS_MS, ms)] += 1
+
+    def _registrar_lenta(self, motor, clave, sql, ms, filas, explicar):
+        plan = None
+        if explicar is not None and sql.lstrip().upper().startswith(_EXPLICABLES):
+            try:
+                plan = explicar()
+            except Exception as e:
+                plan = f"No se pudo obtener el plan: {e}"
+        entrada = {
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'motor': motor,
+            'sentencia': clave,
+            'ms': round(ms, 3),
+            'filas': filas,
+            'plan': plan,
+        }
+        with self._lock:
+            self._lentas.append(entrada)
+        logger.warning("Consulta lenta en %s (%.0f ms): %s", motor, ms, clave[:120])
+        if self.archivo_lentas:
+            try:
+                with open(self.archivo_lentas, 'a', encoding='utf-8') as archivo:
+                    archivo.write(json.dumps(entrada, ensure_ascii=False, default=str) + '\n')
+            except OSError as e:
+                logger.warning("No se pudo escribir el registro de consultas lentas: %s", e)
+
+    @staticmethod
+    def _percentil(histograma, total, fraccion):
+        """Límite superior de la cubeta donde cae el percentil pedido"""
+        acumulado = 0
+        for limite, cantidad in zip(CUBETAS_MS + (None,), histograma):
+            acumulado += cantidad
+            if acumulado >= total * fraccion:
+                return limite
+        return None
+
+    def obtener(self):
+        """
+        Copia de las métricas: {motor: {sentencia: datos}} con promedio y
+        percentiles p50/p95/p99 aproximados (límite de la cubeta, None = mayor
+        que la última).
+        """
+        with self._lock:
+            self._incorporar_diferidas()
+            copia = {clave: dict(datos, histograma=list(datos['histograma']))
+                     for clave, datos in self._sentencias.items()}
+        resultado = {}
+        for (motor, sentencia), datos in sorted(copia.items()):
+            n = datos['ejecuciones']
+            datos['promedio_ms'] = datos['total_ms'] / n
+            for nombre, fraccion in (('p50_ms', 0.5), ('p95_ms', 0.95), ('p99_ms', 0.99)):
+                datos[nombre] = self._percentil(datos['histograma'], n, fraccion)
+            for campo in ('total_ms', 'min_ms', 'max_ms', 'promedio_ms'):
+                datos[campo] = round(datos[campo], 3)
+            resultado.setdefault(motor, {})[sentencia] = datos
+        return resultado
+
+    def lentas(self):
+        """Últimas consultas lentas (la más reciente al final)"""
+        with self._lock:
+            return list(self._lentas)
+
+    def reiniciar(self):
+        with self._lock:
+            self._diferidas.clear()
+            self._sentencias.clear()
+            self._lentas.clear()
+
+    def volcar_json(self, ruta=None):
+        """
+        Serializa métricas y consultas lentas con claves ordenadas, para
+        poder comparar (diff) los volcados de dos versiones.
+        """
+        texto = json.dumps({
+            'cubetas_ms': list(CUBETAS_MS),
+            'umbral_lenta_ms': self.umbral_ms,
+            'sentencias': self.obtener(),
+            'lentas': self.lentas(),
+        }, ensure_ascii=False, indent=2, sort_keys=True, default=str)
+        if ruta:
+            with open(ruta, 'w', encoding='utf-8') as archivo:
+                archivo.write(texto)
+        return texto
+
+
+# Acumulador del proceso usado por todos los cursores instrumentados
+METRICAS = MetricasConsultas()
+
+
+def obtener_metricas():
+    return METRICAS.obtener()
+
+
+def consultas_lentas():
+    return METRICAS.lentas()
+
+
+def reiniciar():
+    METRICAS.reiniciar()
+
+
+def volcar_json(ruta=None):
+    return METRICAS.volcar_json(ruta)
+
+
+if ARCHIVO_METRICAS:
+    atexit.register(volcar_json, ARCHIVO_METRICAS)
+
+
+# ----- SQLITE -----
+
+def _plan_sqlite(conexion, sql, parametros):
+    # Connection.execute pasa por el cursor() redefinido: se usa un cursor
+    # base para no instrumentar el propio EXPLAIN
+    cursor = sqlite3.Cursor(conexion)
+    try:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', parametros)
+        return [fila[-1] for fila in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+class CursorInstrumentado(sqlite3.Cursor):
+    """
+    Cursor de SQLite que mide cada sentencia. En SQLite el trabajo de un
+    SELECT se reparte entre execute y las lecturas, así que la medición
+    se cierra al agotar el cursor, al ejecutar otra sentencia o al cerrarlo.
+    """
+
+    _medicion = None
+
+    def execute(self, sql, parametros=()):
+        self._cerrar_medicion()
+        inicio = perf_counter()
+        try:
+            super().execute(sql, parametros)
+        except Exception:
+            METRICAS.registrar('sqlite', sql, perf_counter() - inicio, error=True)
+            raise
+        self._medicion = [sql, parametros, perf_counter() - inicio, 0]
+        if self.description is None:
+            # Sentencia sin filas que leer (INSERT, UPDATE, DDL...)
+            self._cerrar_medicion(self.rowcount)
+        return self
+
+    def executemany(self, sql, secuencia):
+        self._cerrar_medicion()
+        # El plan se pide con la primera fila si la secuencia es una lista
+        primera = secuencia[0] if isinstance(secuencia, (list, tuple)) and secuencia else None
+        inicio = perf_counter()
+        try:
+            super().executemany(sql, secuencia)
+        except Exception:
+            METRICAS.registrar('sqlite', sql, perf_counter() - inicio, error=True)
+            raise
+        self._medicion = [sql, primera, perf_counter() - inicio, 0]
+        self._cerrar_medicion(self.rowcount)
+        return self
+
+    def _leido(self, inicio, filas, agotado):
+        medicion = self._medicion
+        if medicion is not None:
+            medicion[2] += perf_counter() - inicio
+            medicion[3] += filas
+            if agotado:
+                self._cerrar_medicion()
+
+    def _cerrar_medicion(self, filas=None):
+        medicion, self._medicion = self._medicion, None
+        if medicion is None:
+            return
+        sql, parametros, segundos, leidas = medicion
+        conexion = self.connection
+        METRICAS.registrar(
+            'sqlite', sql, segundos, leidas if filas is None else filas,
+            explicar=None if parametros is None else lambda: _plan_sqlite(conexion, sql, parametros)
+        )
+
+    def fetchone(self):
+        inicio = perf_counter()
+        fila = super().fetchone()
+        self._leido(inicio, fila is not None, fila is None)
+        return fila
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        inicio = perf_counter()
+        filas = super().fetchmany(size)
+        self._leido(inicio, len(filas), len(filas) < size)
+        return filas
+
+    def fetchall(self):
+        inicio = perf_counter()
+        filas = super().fetchall()
+        self._leido(inicio, len(filas), True)
+        return filas
+
+    def __next__(self):
+        inicio = perf_counter()
+        try:
+            fila = super().__next__()
+        except StopIteration:
+            self._leido(inicio, 0, True)
+            raise
+        self._leido(inicio, 1, False)
+        return fila
+
+    def close(self):
+        self._cerrar_medicion()
+        super().close()
+
+    def __del__(self):
+        # Cursor abandonado sin agotar ni cerrar: solo se anota el tiempo,
+        # sin plan ni escritura de archivos (ver MetricasConsultas.diferir)
+        medicion, self._medicion = self._medicion, None
+        if medicion is not None:
+            METRICAS.diferir('sqlite', medicion[0], medicion[2], medicion[3])
+
+
+class ConexionInstrumentada(sqlite3.Connection):
+    """Conexión de SQLite cuyos cursores (y conn.execute) están instrumentados"""
+
+    def cursor(self, factory=CursorInstrumentado):
+        return super().cursor(factory)
+
+    def execute(self, sql, parametros=()):
+        return self.cursor().execute(sql, parametros)
+
+    def executemany(self, sql, secuencia):
+        return self.cursor().executemany(sql, secuencia)
+
+
+def fabrica_conexion_sqlite():
+    """Clase a pasar como factory= en sqlite3.connect"""
+    return ConexionInstrumentada if ACTIVA else sqlite3.Connection
+
+
+# ----- MYSQL -----
+
+def _plan_mysql(conexion, sql):
+    # Cursor base (no instrumentado) sobre la misma conexión
+    with conexion.cursor(pymysql.cursors.DictCursor) as cursor:
+        cursor.execute(f'EXPLAIN {sql}')
+        return cursor.fetchall()
+
+
+class CursorMySQLInstrumentado(pymysql.cursors.DictCursor):
+    """
+    DictCursor que mide cada sentencia. pymysql lee el resultado completo
+    dentro de execute, así que el tiempo y rowcount ya son definitivos.
+    """
+
+    _midiendo = False
+
+    def _medir(self, ejecutar, query, args, args_plan):
+        # executemany llama a execute por dentro: se mide solo una vez
+        if self._midiendo:
+            return ejecutar(query, args)
+        self._midiendo = True
+        inicio = perf_counter()
+        try:
+            resultado = ejecutar(query, args)
+        except Exception:
+            METRICAS.registrar('mysql', query, perf_counter() - inicio, error=True)
+            raise
+        finally:
+            self._midiendo = False
+        conexion = self.connection
+        METRICAS.registrar(
+            'mysql', query, perf_counter() - inicio, self.rowcount,
+            explicar=lambda: _plan_mysql(conexion, self.mogrify(query, args_plan))
+        )
+        return resultado
+
+    def execute(self, query, args=None):
+        if not ACTIVA:
+            return super().execute(query, args)
+        return self._medir(super().execute, query, args, args)
+
+    def executemany(self, query, args):
+        if not ACTIVA:
+            return super().executemany(query, args)
+        primera = args[0] if isinstance(args, (list, tuple)) and args else None
+        return self._medir(super().executemany, query, args, primera)
+
+
+class CursorMySQLStreaming(pymysql.cursors.SSDictCursor):
+    """
+    SSDictCursor (sin buffer: las filas se leen del socket a medida que se
+    piden) que mide cada sentencia. El tiempo cuenta solo lo que se pasa
+    dentro de execute y de los fetch, no lo que tarda quien consume las
+    filas. La medición se anota al cerrar el cursor: antes no se sabe
+    cuántas filas hubo y la conexión no admite el EXPLAIN mientras quede
+    resultado por leer.
+    """
+
+    _pendiente = None
+
+    def execute(self, query, args=None):
+        if not ACTIVA:
+            return super().execute(query, args)
+        self._anotar()
+        inicio = perf_counter()
+        try:
+            resultado = super().execute(query, args)
+        except Exception:
+            METRICAS.registrar('mysql', query, perf_counter() - inicio, error=True)
+            raise
+        self._pendiente = {'sql': query, 'args': args, 'segundos': perf_counter() - inicio, 'filas': 0}
+        return resultado
+
+    def _leer(self, fetch, *args):
+        pendiente = self._pendiente
+        if pendiente is None:
+            return fetch(*args)
+        inicio = perf_counter()
+        filas = fetch(*args)
+        pendiente['segundos'] += perf_counter() - inicio
+        if isinstance(filas, dict):
+            pendiente['filas'] += 1
+        elif filas:
+            pendiente['filas'] += len(filas)
+        return filas
+
+    def fetchone(self):
+        return self._leer(super().fetchone)
+
+    def fetchmany(self, size=None):
+        return self._leer(super().fetchmany, size)
+
+    def fetchall(self):
+        return self._leer(super().fetchall)
+
+    def _anotar(self):
+        pendiente, self._pendiente = self._pendiente, None
+        if pendiente is None:
+            return
+        conexion = self.connection
+        METRICAS.registrar(
+            'mysql', pendiente['sql'], pendiente['segundos'], pendiente['filas'],
+            explicar=lambda: _plan_mysql(conexion, self.mogrify(pendiente['sql'], pendiente['args']))
+        )
+
+    def close(self):
+        conexion = self.connection
+        try:
+            super().close()
+        finally:
+            # Con el resultado ya leído, el EXPLAIN puede usar la conexión
+            self.connection = conexion
+            try:
+                self._anotar()
+            finally:
+                self.connection = None
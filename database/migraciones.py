@@ -0,0 +1,376 @@
+# database/migraciones.py
+"""
+Migraciones versionadas del esquema SQLite para proyecto_tienda_tech
+
+La versión aplicada se guarda en PRAGMA user_version (una sola lectura
+al iniciar el proceso) y el historial en la tabla schema_migraciones.
+Para cambiar el esquema se agrega una función nueva al final de
+MIGRACIONES; nunca se modifican las ya publicadas.
+"""
+
+import sqlite3
+
+
+def _v1_esquema_inicial(cursor):
+    """Tablas originales: productos, usuarios, carrito y clientes"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS productos (
+            id INTEGER PRIMARY KEY,
+            nombre TEXT NOT NULL,
+            precio REAL NOT NULL,
+            cantidad INTEGER NOT NULL,
+            categoria TEXT NOT NULL,
+            descripcion TEXT
+        )
+    ''')
+
+    # Índice para búsquedas rápidas por nombre
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_productos_nombre
+        ON productos(nombre)
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS usuarios (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            fecha_nacimiento TEXT NOT NULL,
+            proveedor TEXT DEFAULT 'email',
+            rol TEXT DEFAULT 'cliente',
+            fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS carritos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            usuario_id INTEGER,
+            fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            estado TEXT DEFAULT 'activo',
+            FOREIGN KEY (usuario_id) REFERENCES usuarios(id)
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS carrito_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            carrito_id INTEGER NOT NULL,
+            producto_id INTEGER NOT NULL,
+            cantidad INTEGER NOT NULL,
+            precio_unitario REAL NOT NULL,
+            fecha_agregado TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (carrito_id) REFERENCES carritos(id),
+            FOREIGN KEY (producto_id) REFERENCES productos(id)
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS clientes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            fecha_nacimiento TEXT NOT NULL,
+            proveedor TEXT DEFAULT 'email',
+            fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+def _columnas(cursor, tabla):
+    cursor.execute(f'PRAGMA table_info({tabla})')
+    return {fila[1] for fila in cursor.fetchall()}
+
+
+def _v2_rol_usuarios(cursor):
+    """Bases creadas antes de la columna 'rol' en usuarios"""
+    if 'rol' not in _columnas(cursor, 'usuarios'):
+        cursor.execute("ALTER TABLE usuarios ADD COLUMN rol TEXT DEFAULT 'cliente'")
+
+
+def _v3_ventas(cursor):
+    """Tablas de ventas usadas por finalizar_compra"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS ventas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            usuario_id INTEGER,
+            carrito_id INTEGER,
+            total REAL NOT NULL,
+            fecha_venta TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (usuario_id) REFERENCES usuarios(id),
+            FOREIGN KEY (carrito_id) REFERENCES carritos(id)
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS venta_detalles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            venta_id INTEGER NOT NULL,
+            producto_id INTEGER NOT NULL,
+            cantidad INTEGER NOT NULL,
+            precio_unitario REAL NOT NULL,
+            subtotal REAL NOT NULL,
+            FOREIGN KEY (venta_id) REFERENCES ventas(id),
+            FOREIGN KEY (producto_id) REFERENCES productos(id)
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_venta_detalles_venta
+        ON venta_detalles(venta_id)
+    ''')
+
+    # Las consultas de checkout filtran y agrupan por carrito y producto
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_carrito_items_carrito
+        ON carrito_items(carrito_id, producto_id)
+    ''')
+
+
+def _v4_busqueda_fts(cursor):
+    """
+    Índice de texto completo FTS5 sobre nombre y descripción,
+    sincronizado con productos mediante triggers
+    """
+    # remove_diacritics 2 (SQLite >= 3.27) hace que "audifonos" encuentre
+    # "Audífonos"; prefix='2 3' acelera las búsquedas por prefijo cortas
+    for tokenizer in ('unicode61 remove_diacritics 2', 'unicode61 remove_diacritics 1'):
+        try:
+            cursor.execute(f'''
+                CREATE VIRTUAL TABLE IF NOT EXISTS productos_fts USING fts5(
+                    nombre, descripcion,
+                    content='productos', content_rowid='id',
+                    tokenize="{tokenizer}", prefix='2 3'
+                )
+            ''')
+            break
+        except sqlite3.OperationalError as e:
+            if 'no such module' in str(e):
+                # SQLite compilado sin FTS5: la búsqueda sigue usando LIKE
+                print("⚠️ SQLite sin soporte FTS5, se omite el índice de texto")
+                return
+    else:
+        raise sqlite3.OperationalError("No se pudo crear productos_fts")
+
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS productos_fts_ai AFTER INSERT ON productos BEGIN
+            INSERT INTO productos_fts (rowid, nombre, descripcion)
+            VALUES (new.id, new.nombre, new.descripcion);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS productos_fts_ad AFTER DELETE ON productos BEGIN
+            INSERT INTO productos_fts (productos_fts, rowid, nombre, descripcion)
+            VALUES ('delete', old.id, old.nombre, old.descripcion);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS productos_fts_au AFTER UPDATE OF nombre, descripcion ON productos BEGIN
+            INSERT INTO productos_fts (productos_fts, rowid, nombre, descripcion)
+            VALUES ('delete', old.id, old.nombre, old.descripcion);
+            INSERT INTO productos_fts (rowid, nombre, descripcion)
+            VALUES (new.id, new.nombre, new.descripcion);
+        END
+    ''')
+
+    # Indexar los productos que ya existían
+    cursor.execute("INSERT INTO productos_fts (productos_fts) VALUES ('rebuild')")
+
+
+def _v5_indices_orden(cursor):
+    """Índices para la paginación por clave ordenada por precio o cantidad"""
+    # id es el rowid, así que cada índice ya queda ordenado por (columna, id)
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_productos_precio ON productos(precio)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_productos_cantidad ON productos(cantidad)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_productos_categoria ON productos(categoria)')
+
+
+def _v6_outbox(cursor):
+    """
+    Bandeja de salida (transactional outbox): cambios que deben replicarse
+    en MySQL, escritos en la misma transacción que la fila de origen
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tipo TEXT NOT NULL,
+            carga TEXT NOT NULL,
+            intentos INTEGER NOT NULL DEFAULT 0,
+            ultimo_error TEXT,
+            disponible_en REAL NOT NULL DEFAULT 0,
+            creado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_outbox_disponible ON outbox(disponible_en, id)')
+
+
+# Segundos desde 1970 (UTC) con milisegundos, igual que UNIX_TIMESTAMP(NOW(6)) en MySQL
+_AHORA_EPOCH = "((julianday('now') - 2440587.5) * 86400.0)"
+
+
+def _v7_sincronizacion(cursor):
+    """
+    Captura de cambios de productos para la sincronización con MySQL
+    (services/sincronizacion_service.py):
+      - actualizado_en: marca de tiempo del último cambio (la pone un
+        trigger, salvo que quien escribe la indique, como hace la sincronización)
+      - origen: 'sqlite' si el último cambio se hizo aquí, 'mysql' si llegó
+        desde MySQL; así los cambios recibidos no se vuelven a enviar
+      - productos_borrados: lápidas de los productos eliminados
+      - sync_marcas: hasta dónde se leyó cada flujo (watermarks)
+    """
+    columnas = _columnas(cursor, 'productos')
+    if 'actualizado_en' not in columnas:
+        cursor.execute('ALTER TABLE productos ADD COLUMN actualizado_en REAL')
+    if 'origen' not in columnas:
+        cursor.execute("ALTER TABLE productos ADD COLUMN origen TEXT NOT NULL DEFAULT 'sqlite'")
+    cursor.execute(f'UPDATE productos SET actualizado_en = {_AHORA_EPOCH} WHERE actualizado_en IS NULL')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_productos_actualizado ON productos(actualizado_en, id)')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS productos_borrados (
+            id INTEGER PRIMARY KEY,
+            borrado_en REAL NOT NULL,
+            origen TEXT NOT NULL DEFAULT 'sqlite'
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_productos_borrados_en ON productos_borrados(borrado_en, id)')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sync_marcas (
+            flujo TEXT PRIMARY KEY,
+            marca REAL NOT NULL,
+            actualizado TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Escrituras locales: se marca la hora y el origen. La sincronización
+    # escribe actualizado_en explícitamente y los triggers no la tocan.
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS productos_sync_ai AFTER INSERT ON productos
+        WHEN NEW.actualizado_en IS NULL BEGIN
+            UPDATE productos SET actualizado_en = {_AHORA_EPOCH}, origen = 'sqlite' WHERE id = NEW.id;
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS productos_sync_au
+        AFTER UPDATE OF nombre, precio, cantidad, categoria, descripcion ON productos
+        WHEN NEW.actualizado_en IS OLD.actualizado_en BEGIN
+            UPDATE productos SET actualizado_en = {_AHORA_EPOCH}, origen = 'sqlite' WHERE id = NEW.id;
+        END
+    ''')
+    # Si la sincronización ya dejó la lápida de MySQL para este borrado, se respeta
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS productos_sync_ad AFTER DELETE ON productos
+        WHEN NOT EXISTS (
+            SELECT 1 FROM productos_borrados
+            WHERE id = OLD.id AND origen = 'mysql' AND borrado_en >= OLD.actualizado_en
+        ) BEGIN
+            INSERT OR REPLACE INTO productos_borrados (id, borrado_en, origen)
+            VALUES (OLD.id, {_AHORA_EPOCH}, 'sqlite');
+        END
+    ''')
+
+
+def _v8_cambios_productos(cursor):
+    """
+    Secuencia de cambios de productos para la coherencia entre procesos:
+    cada worker guarda en memoria su propio Inventario y, con la secuencia
+    más alta que ya vio, pide solo los ids que cambiaron después
+    (Inventario.refrescar_cambios). Una fila por producto con la secuencia
+    de su último cambio; AUTOINCREMENT garantiza que nunca se reutiliza.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS productos_cambios (
+            secuencia INTEGER PRIMARY KEY AUTOINCREMENT,
+            producto_id INTEGER NOT NULL UNIQUE
+        )
+    ''')
+    # Solo las columnas de datos: las marcas de sincronización no cuentan
+    for nombre, evento, fila in (('ai', 'INSERT', 'NEW'),
+                                 ('au', 'UPDATE OF nombre, precio, cantidad, categoria, descripcion', 'NEW'),
+                                 ('ad', 'DELETE', 'OLD')):
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS productos_cambios_{nombre} AFTER {evento} ON productos BEGIN
+                DELETE FROM productos_cambios WHERE producto_id = {fila}.id;
+                INSERT INTO productos_cambios (producto_id) VALUES ({fila}.id);
+            END
+        ''')
+
+
+def _v9_outbox_fallidos(cursor):
+    """
+    Estado de los mensajes de la outbox: 'pendiente' o 'fallido'. Un
+    mensaje que MySQL rechaza una y otra vez (o que choca con otra cuenta)
+    pasa a 'fallido' y deja de reintentarse, así no frena a los demás.
+    """
+    if 'estado' not in _columnas(cursor, 'outbox'):
+        cursor.execute("ALTER TABLE outbox ADD COLUMN estado TEXT NOT NULL DEFAULT 'pendiente'")
+    cursor.execute('DROP INDEX IF EXISTS idx_outbox_disponible')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_outbox_estado ON outbox(estado, disponible_en, id)')
+
+
+# (versión, descripción, función) en orden estrictamente creciente
+MIGRACIONES = [
+    (1, 'Esquema inicial: productos, usuarios, carrito y clientes', _v1_esquema_inicial),
+    (2, "Columna 'rol' en usuarios", _v2_rol_usuarios),
+    (3, 'Tablas ventas y venta_detalles', _v3_ventas),
+    (4, 'Búsqueda de texto completo FTS5 en productos', _v4_busqueda_fts),
+    (5, 'Índices de productos por precio, cantidad y categoría', _v5_indices_orden),
+    (6, 'Tabla outbox para replicar cambios en MySQL', _v6_outbox),
+    (7, 'Marcas de cambio y lápidas de productos para sincronizar con MySQL', _v7_sincronizacion),
+    (8, 'Secuencia de cambios de productos para refrescar el inventario en memoria', _v8_cambios_productos),
+    (9, "Estado 'fallido' para los mensajes de la outbox", _v9_outbox_fallidos),
+]
+
+VERSION_ACTUAL = MIGRACIONES[-1][0]
+
+
+def obtener_version(conn):
+    """Lee la versión del esquema guardada en la cabecera del archivo"""
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def aplicar_migraciones(conn):
+    """
+    Aplica solo las migraciones pendientes dentro de una transacción.
+    Si el esquema ya está al día cuesta una única lectura de PRAGMA user_version.
+
+    Returns:
+        list: versiones aplicadas (vacía si no había nada pendiente)
+    """
+    if obtener_version(conn) >= VERSION_ACTUAL:
+        return []
+
+    aplicadas = []
+    cursor = conn.cursor()
+    # BEGIN IMMEDIATE serializa a los procesos que arrancan a la vez;
+    # se vuelve a leer la versión por si otro ya migró mientras esperábamos
+    cursor.execute('BEGIN IMMEDIATE')
+    try:
+        version = obtener_version(conn)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS schema_migraciones (
+                version INTEGER PRIMARY KEY,
+                descripcion TEXT NOT NULL,
+                fecha_aplicada TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        for numero, descripcion, migracion in MIGRACIONES:
+            if numero <= version:
+                continue
+            migracion(cursor)
+            cursor.execute(
+                'INSERT INTO schema_migraciones (version, descripcion) VALUES (?, ?)',
+                (numero, descripcion)
+            )
+            aplicadas.append(numero)
+            print(f"✅ Migración {numero} aplicada: {descripcion}")
+        cursor.execute(f'PRAGMA user_version = {VERSION_ACTUAL}')
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return aplicadas
@@ -0,0 +1,87 @@
+# database/paginacion.py
+"""
+Paginación por clave (keyset / seek) compartida por SQLite y MySQL
+
+En lugar de OFFSET, cada página continúa desde la última fila de la
+anterior, así el costo de una página no crece con el tamaño del catálogo.
+El cursor 'after' que viaja en la URL es el id de la última fila cuando se
+ordena por id, o "valor:id" cuando se ordena por otra columna (el id
+desempata filas con el mismo precio o cantidad).
+"""
+
+ORDENES_PRODUCTOS = ('id', 'precio', 'cantidad')
+
+LIMITE_POR_DEFECTO = 50
+LIMITE_MAXIMO = 200
+
+
+def normalizar_limite(limite):
+    """Acota el tamaño de página pedido por el usuario"""
+    try:
+        limite = int(limite)
+    except (TypeError, ValueError):
+        return LIMITE_POR_DEFECTO
+    return max(1, min(limite, LIMITE_MAXIMO))
+
+
+def normalizar_orden(orden):
+    """Solo se permite ordenar por columnas indexadas"""
+    return orden if orden in ORDENES_PRODUCTOS else 'id'
+
+
+def decodificar_cursor(after, orden):
+    """
+    Convierte el texto 'after' en (valor, id). Devuelve None si no hay
+    cursor o si es inválido (en ese caso se muestra la primera página).
+    """
+    if not after:
+        return None
+    try:
+        if orden == 'id':
+            return None, int(after)
+        valor, id = str(after).rsplit(':', 1)
+        valor = int(valor) if orden == 'cantidad' else float(valor)
+        return valor, int(id)
+    except (TypeError, ValueError):
+        return None
+
+
+def _valor(fila, columna):
+    """Lee una columna de un diccionario (MySQL) o de un registro (SQLite)"""
+    return fila[columna] if isinstance(fila, dict) else getattr(fila, columna)
+
+
+def codificar_cursor(fila, orden):
+    """Genera el cursor 'after' a partir de la última fila de una página"""
+    if orden == 'id':
+        return str(_valor(fila, 'id'))
+    return f"{_valor(fila, orden)}:{_valor(fila, 'id')}"
+
+
+def condicion_keyset(orden, cursor, marcador='?'):
+    """
+    Fragmento WHERE para continuar después del cursor.
+    Se escribe como 'col >= v AND (col > v OR id > i)' porque ambos motores
+    lo resuelven con un rango sobre el índice de la columna.
+
+    Returns:
+        tuple: (sql, parámetros); sql vacío si no hay cursor
+    """
+    if cursor is None:
+        return '', []
+    valor, id = cursor
+    if orden == 'id':
+        return f'id > {marcador}', [id]
+    return (f'{orden} >= {marcador} AND ({orden} > {marcador} OR id > {marcador})',
+            [valor, valor, id])
+
+
+def siguiente_pagina(filas, limite, orden):
+    """
+    Recorta la fila extra pedida (limite + 1) y calcula el cursor de la
+    página siguiente, o None si esta es la última.
+    """
+    if len(filas) <= limite:
+        return list(filas), None
+    filas = list(filas[:limite])
+    return filas, codificar_cursor(filas[-1], orden)
@@ -0,0 +1,74 @@
+# database/registros.py
+"""
+Registros tipados para las filas de SQLite
+
+Se instala como row_factory en las conexiones de DatabaseManager. Cada
+fila se construye directamente desde el cursor como una namedtuple, así
+se puede leer por nombre (prod.nombre) sin romper el código que todavía
+usa posiciones (prod[1]). Las namedtuple no tienen __dict__, por lo que
+ocupan lo mismo que una tupla normal.
+"""
+
+from collections import namedtuple
+
+COLUMNAS_PRODUCTO = ('id', 'nombre', 'precio', 'cantidad', 'categoria', 'descripcion')
+COLUMNAS_USUARIO = ('id', 'nombre', 'email', 'password', 'fecha_nacimiento',
+                    'proveedor', 'rol', 'fecha_registro')
+
+# Columnas de usuario que se pueden mostrar en listados (sin password)
+COLUMNAS_USUARIO_PUBLICAS = tuple(c for c in COLUMNAS_USUARIO if c != 'password')
+
+ProductoRegistro = namedtuple('ProductoRegistro', COLUMNAS_PRODUCTO)
+UsuarioRegistro = namedtuple('UsuarioRegistro', COLUMNAS_USUARIO)
+
+# Tupla de nombres de columnas -> clase de registro
+_clases = {
+    COLUMNAS_PRODUCTO: ProductoRegistro,
+    COLUMNAS_USUARIO: UsuarioRegistro,
+}
+
+
+def clase_para(columnas):
+    """
+    Devuelve (creándola la primera vez) la clase de registro para un
+    conjunto de columnas; las proyecciones obtienen su propia clase
+    """
+    clase = _clases.get(columnas)
+    if clase is None:
+        # rename=True para columnas como COUNT(*) que no son identificadores
+        clase = _clases.setdefault(columnas, namedtuple('Registro', columnas, rename=True))
+    return clase
+
+
+def columnas_sql(columnas, permitidas):
+    """
+    Valida una proyección pedida por el código y la convierte en la lista
+    del SELECT. Solo se aceptan nombres conocidos (nunca texto del usuario).
+    """
+    if not columnas:
+        return ', '.join(permitidas)
+    desconocidas = [c for c in columnas if c not in permitidas]
+    if desconocidas:
+        raise ValueError(f"Columnas no válidas: {desconocidas}")
+    return ', '.join(columnas)
+
+
+class FabricaRegistros:
+    """
+    row_factory para sqlite3. Recuerda la clase usada en la última consulta
+    para no volver a resolverla en cada fila: sqlite3 crea un objeto
+    description nuevo en cada execute, así que basta compararlo por identidad.
+    """
+
+    __slots__ = ('_descripcion', '_crear')
+
+    def __init__(self):
+        self._descripcion = None
+        self._crear = None
+
+    def __call__(self, cursor, fila):
+        descripcion = cursor.description
+        if descripcion is not self._descripcion:
+            self._crear = clase_para(tuple(c[0] for c in descripcion))._make
+            self._descripcion = descripcion
+        return self._crear(fila)
@@ -0,0 +1,313 @@
+# database/repositorio.py
+"""
+Repositorio de productos con motores intercambiables (SQLite o MySQL)
+
+ProductoRepository es la interfaz común: las dos implementaciones
+devuelven los mismos registros (ProductoRegistro de database/registros.py,
+o la clase de la proyección pedida), con el precio como float, así una
+ruta o un script funciona igual contra cualquiera de los dos motores.
+
+Los errores de base de datos se lanzan (sqlite3.Error o
+pymysql.err.OperationalError); las rutas deciden qué mostrar.
+
+El motor se elige con crear_repositorio('sqlite' | 'mysql') o, sin
+argumento, con la variable de entorno TIENDA_BACKEND_PRODUCTOS;
+benchmarks/bench_backends.py mide la misma carga en ambos.
+"""
+
+import os
+from decimal import Decimal
+from typing import Protocol, runtime_checkable
+
+import pymysql
+
+from database import paginacion
+from database.conexion import MySQLConnection
+from database.registros import COLUMNAS_PRODUCTO, ProductoRegistro, clase_para, columnas_sql
+
+# Campos que se pueden escribir (el id lo asigna la base)
+CAMPOS_EDITABLES = COLUMNAS_PRODUCTO[1:]
+
+BACKEND_POR_DEFECTO = os.environ.get('TIENDA_BACKEND_PRODUCTOS', 'mysql')
+
+
+@runtime_checkable
+class ProductoRepository(Protocol):
+    """Operaciones de productos que ofrece cada motor"""
+
+    nombre: str
+
+    def obtener_pagina(self, after=None, limite=None, orden='id', columnas=None,
+                       categoria=None, stock_maximo=None):
+        """Página keyset, con filtros opcionales: (registros, cursor de la siguiente o None)"""
+
+    def iterar_todos(self, columnas=None):
+        """Todos los productos por id, como iterable que se puede recorrer una vez"""
+
+    def obtener_por_id(self, id):
+        """Registro del producto o None"""
+
+    def obtener_por_categoria(self, categoria):
+        """Registros de la categoría"""
+
+    def obtener_con_bajo_stock(self, limite=5):
+        """Registros con cantidad <= limite, de menor a mayor stock"""
+
+    def buscar(self, termino, limite=100):
+        """Hasta 'limite' registros que coinciden con el texto, los más relevantes primero"""
+
+    def contar(self):
+        """Cantidad de productos"""
+
+    def obtener_estadisticas(self):
+        """{'total', 'valor_total' (float), 'productos_por_categoria'}"""
+
+    def crear(self, datos):
+        """Inserta un producto (dict con CAMPOS_EDITABLES) y devuelve su id"""
+
+    def actualizar(self, id, **campos):
+        """Actualiza los campos indicados; True si el producto existía"""
+
+    def eliminar(self, id):
+        """Elimina el producto; True si existía"""
+
+
+def _validar_campos(campos):
+    desconocidos = [c for c in campos if c not in CAMPOS_EDITABLES]
+    if desconocidos:
+        raise ValueError(f"Campos no válidos: {desconocidos}")
+    if not campos:
+        raise ValueError("No hay campos para actualizar")
+
+
+class RepositorioProductosSQLite:
+    """Productos en SQLite, a través de DatabaseManager"""
+
+    nombre = 'sqlite'
+
+    def __init__(self, db):
+        self.db = db
+
+    def obtener_pagina(self, after=None, limite=None, orden='id', columnas=None,
+                       categoria=None, stock_maximo=None):
+        return self.db.obtener_productos_pagina(after, limite, orden, categoria, stock_maximo, columnas)
+
+    def iterar_todos(self, columnas=None):
+        return self.db.obtener_todos_productos(columnas)
+
+    def obtener_por_id(self, id):
+        return self.db.obtener_producto_por_id(id)
+
+    def obtener_por_categoria(self, categoria):
+        return self.db.obtener_productos_por_categoria(categoria)
+
+    def obtener_con_bajo_stock(self, limite=5):
+        return self.db.obtener_productos_bajo_stock(limite)
+
+    def buscar(self, termino, limite=100):
+        if self.db.tiene_busqueda_texto():
+            return self.db.buscar_productos_texto(termino, limite)
+        return self.db.obtener_productos_por_nombre(termino)[:limite]
+
+    def contar(self):
+        return self.db.contar_productos()
+
+    def obtener_estadisticas(self):
+        estadisticas = self.db.obtener_estadisticas_productos()
+        estadisticas['valor_total'] = float(estadisticas['valor_total'])
+        return estadisticas
+
+    def crear(self, datos):
+        return self.db.insertar_producto(ProductoRegistro(
+            None, datos['nombre'], datos['precio'], datos['cantidad'],
+            datos['categoria'], datos.get('descripcion', '')
+        ))
+
+    def actualizar(self, id, **campos):
+        _validar_campos(campos)
+        return self.db.actualizar_producto(id, **campos)
+
+    def eliminar(self, id):
+        return self.db.eliminar_producto(id)
+
+
+class RepositorioProductosMySQL:
+    """
+    Productos en MySQL, con las conexiones del pool. Las filas del
+    DictCursor se convierten en registros y el DECIMAL del precio en float.
+
+    Las lecturas por id, categoría y bajo stock, la búsqueda, el recorrido
+    completo y las estadísticas se delegan en el ProductoService (sin
+    caché si no se pasa uno), así comparten su caché y su SQL. Cada
+    escritura invalida las claves afectadas de esa caché.
+    """
+
+    nombre = 'mysql'
+
+    def __init__(self, servicio=None):
+        if servicio is None:
+            from services.producto_service import ProductoService
+            servicio = ProductoService()
+        self.servicio = servicio
+
+    @staticmethod
+    def _conectar():
+        conn = MySQLConnection().conectar()
+        if not conn:
+            raise pymysql.err.OperationalError("No se pudo conectar a MySQL")
+        return conn
+
+    @staticmethod
+    def _registro(clase, columnas, fila):
+        return clase._make(float(fila[c]) if isinstance(fila[c], Decimal) else fila[c] for c in columnas)
+
+    @classmethod
+    def _registros(cls, filas):
+        return [cls._registro(ProductoRegistro, COLUMNAS_PRODUCTO, f) for f in filas]
+
+    def _invalidar(self, id, categorias, cantidades):
+        self.servicio.invalidar_producto(id, categorias, cantidades)
+
+    def obtener_pagina(self, after=None, limite=None, orden='id', columnas=None,
+                       categoria=None, stock_maximo=None):
+        """Mismos argumentos que DatabaseManager.obtener_productos_pagina"""
+        limite = paginacion.normalizar_limite(limite or paginacion.LIMITE_POR_DEFECTO)
+        orden = paginacion.normalizar_orden(orden)
+        condicion, valores = paginacion.condicion_keyset(
+            orden, paginacion.decodificar_cursor(after, orden), marcador='%s'
+        )
+        condiciones = [condicion] if condicion else []
+        if categoria:
+            condiciones.append("categoria = %s")
+            valores.append(categoria)
+        if stock_maximo is not None:
+            condiciones.append("cantidad <= %s")
+            valores.append(stock_maximo)
+        where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+        orden_sql = 'id' if orden == 'id' else f'{orden}, id'
+        # El cursor de la página siguiente necesita el id y el valor de orden
+        columnas = tuple(dict.fromkeys(('id', orden) + tuple(columnas))) if columnas else COLUMNAS_PRODUCTO
+        select = columnas_sql(columnas, COLUMNAS_PRODUCTO)
+
+        conn = self._conectar()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(f"SELECT {select} FROM productos {where} ORDER BY {orden_sql} LIMIT %s",
+                               valores + [limite + 1])
+                filas = cursor.fetchall()
+        finally:
+            conn.close()
+        clase = clase_para(columnas)
+        registros = [self._registro(clase, columnas, f) for f in filas]
+        return paginacion.siguiente_pagina(registros, limite, orden)
+
+    def iterar_todos(self, columnas=None):
+        """ResultadoStreaming de registros: lee del servidor a medida que se recorre"""
+        columnas = tuple(columnas) if columnas else COLUMNAS_PRODUCTO
+        clase = clase_para(columnas)
+        return self.servicio.iterar_todos(columnas, convertir=lambda fila: self._registro(clase, columnas, fila))
+
+    def obtener_por_id(self, id):
+        fila = self.servicio.leer('id', id)
+        return self._registro(ProductoRegistro, COLUMNAS_PRODUCTO, fila) if fila else None
+
+    def obtener_por_categoria(self, categoria):
+        return self._registros(self.servicio.leer('categoria', categoria))
+
+    def obtener_con_bajo_stock(self, limite=5):
+        return self._registros(self.servicio.leer('bajo_stock', limite))
+
+    def buscar(self, termino, limite=100):
+        return self._registros(self.servicio.leer_busqueda(termino, limite))
+
+    def obtener_estadisticas(self):
+        estadisticas = self.servicio.leer_estadisticas()
+        estadisticas['valor_total'] = float(estadisticas['valor_total'])
+        return estadisticas
+
+    def contar(self):
+        conn = self._conectar()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT COUNT(*) AS total FROM productos")
+                return cursor.fetchone()['total']
+        finally:
+            conn.close()
+
+    def crear(self, datos):
+        conn = self._conectar()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    f"INSERT INTO productos ({', '.join(CAMPOS_EDITABLES)}) VALUES (%s, %s, %s, %s, %s)",
+                    [datos.get(c, '') if c == 'descripcion' else datos[c] for c in CAMPOS_EDITABLES]
+                )
+                nuevo_id = cursor.lastrowid
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        self._invalidar(nuevo_id, [datos['categoria']], [datos['cantidad']])
+        return nuevo_id
+
+    def actualizar(self, id, **campos):
+        _validar_campos(campos)
+        asignaciones = ', '.join(f"{c} = %s" for c in campos)
+        conn = self._conectar()
+        try:
+            with conn.cursor() as cursor:
+                conn.begin()
+                # Valores previos (fila bloqueada) para invalidar la caché
+                cursor.execute("SELECT categoria, cantidad FROM productos WHERE id = %s FOR UPDATE", (id,))
+                previo = cursor.fetchone()
+                if previo:
+                    cursor.execute(f"UPDATE productos SET {asignaciones} WHERE id = %s",
+                                   list(campos.values()) + [id])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        if previo:
+            self._invalidar(id, [previo['categoria'], campos.get('categoria')],
+                            [previo['cantidad'], campos.get('cantidad')])
+        return previo is not None
+
+    def eliminar(self, id):
+        conn = self._conectar()
+        try:
+            with conn.cursor() as cursor:
+                conn.begin()
+                cursor.execute("SELECT categoria, cantidad FROM productos WHERE id = %s FOR UPDATE", (id,))
+                previo = cursor.fetchone()
+                if previo:
+                    cursor.execute("DELETE FROM productos WHERE id = %s", (id,))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        if previo:
+            self._invalidar(id, [previo['categoria']], [previo['cantidad']])
+        return previo is not None
+
+
+def crear_repositorio(backend=None, db=None, servicio=None):
+    """
+    Devuelve el repositorio del motor pedido ('sqlite' o 'mysql'; por
+    defecto TIENDA_BACKEND_PRODUCTOS). 'db' es el DatabaseManager para
+    SQLite y 'servicio' el ProductoService (y su caché) que usa MySQL.
+    """
+    backend = backend or BACKEND_POR_DEFECTO
+    if backend == 'sqlite':
+        if db is None:
+            from database.db_manager import DatabaseManager
+            db = DatabaseManager()
+        return RepositorioProductosSQLite(db)
+    if backend == 'mysql':
+        return RepositorioProductosMySQL(servicio)
+    raise ValueError(f"Backend de productos desconocido: {backend}")
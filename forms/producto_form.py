@@ -1,5 +1,6 @@
 # forms/producto_form.py
 from flask_wtf import FlaskForm # pyright: ignore[reportMissingImports]
+from flask_wtf.file import FileField, FileRequired, FileAllowed # pyright: ignore[reportMissingImports]
 from wtforms import StringField, FloatField, IntegerField, SelectField, TextAreaField, SubmitField # pyright: ignore[reportMissingModuleSource]
 from wtforms.validators import DataRequired, Length, NumberRange, ValidationError # type: ignore
 
@@ -55,4 +56,13 @@ class ProductoFiltroForm(FlaskForm):
     
     buscar = StringField('Buscar', validators=[
         Length(max=100, message='Máximo 100 caracteres')
-    ])
\ No newline at end of file
+    ])
+
+class ProductoCargaForm(FlaskForm):
+    """Formulario para la carga masiva de productos desde CSV"""
+    archivo = FileField('Archivo CSV', validators=[
+        FileRequired(message='Selecciona un archivo'),
+        FileAllowed(['csv'], message='El archivo debe ser .csv')
+    ])
+    
+    submit = SubmitField('Cargar productos')
@@ -53,6 +53,8 @@ class MenuConsola:
             opcion = input("\n👉 Selecciona una opción (1-9): ").strip()
             
             if opcion in self.opciones:
+                # Traer lo que cambió mientras tanto (p. ej. desde la web)
+                self.inventario.revisar_cambios()
                 self.opciones[opcion]()
                 if opcion != '9':
                     input("\n⏎ Presiona Enter para continuar...")
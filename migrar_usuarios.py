@@ -2,11 +2,92 @@
 """
 SCRIPT PARA MIGRAR SOLO USUARIOS A CLEVER CLOUD
 (Los productos ya están migrados)
+
+Trabaja por lotes: por cada lote de usuarios consulta de una vez qué
+mails e ids ya existen en Clever Cloud y agrega los nuevos con un solo
+INSERT de varias filas (2 consultas + 1 INSERT por lote, en lugar de 2
+por usuario). Las contraseñas se copian tal cual: las antiguas 'enc_'
+siguen funcionando porque Usuario.verificar_password las reconoce.
+
+Uso:
+    python migrar_usuarios.py             # migra
+    python migrar_usuarios.py --dry-run   # muestra qué haría, sin escribir
 """
 
+import sys
+
 from database.conexion import MySQLConnection as LocalConnection
 import pymysql
 
+# Usuarios por consulta IN (...) y por INSERT
+TAMANO_LOTE = 500
+DRY_RUN = '--dry-run' in sys.argv
+
+COLUMNAS = ('id_usuario', 'nombre', 'mail', 'password', 'fecha_nacimiento', 'proveedor', 'rol')
+
+
+def normalizar(user):
+    """
+    Lleva un usuario de WAMP a las columnas de Clever Cloud. El email puede
+    llamarse 'email' o 'mail' y el id 'id' o 'id_usuario'.
+    Returns: dict con COLUMNAS, o un texto con el motivo si no se puede copiar
+    """
+    email = user.get('email') or user.get('mail') or ''
+    if not email:
+        return "Usuario sin email"
+    user_id = user.get('id') or user.get('id_usuario')
+    if not user_id:
+        return f"Usuario {email} sin ID"
+    return {
+        'id_usuario': user_id,
+        'nombre': user['nombre'],
+        'mail': email,
+        'password': user['password'],
+        'fecha_nacimiento': user['fecha_nacimiento'],
+        'proveedor': user.get('proveedor') or 'email',
+        'rol': user.get('rol') or 'cliente',
+    }
+
+
+def clasificar(cursor, lote):
+    """
+    Separa un lote con dos consultas IN: los usuarios cuyo mail ya existe
+    se descartan; de los demás, los que tienen el id ocupado por otro mail
+    son conflictos.
+    Returns: (nuevos, [(usuario, mail que ocupa su id)])
+    """
+    marcadores = ', '.join(['%s'] * len(lote))
+    cursor.execute(f"SELECT mail FROM usuarios WHERE mail IN ({marcadores})", [f['mail'] for f in lote])
+    # La intercalación de MySQL no distingue mayúsculas en el mail
+    mails = {fila['mail'].lower() for fila in cursor.fetchall()}
+    pendientes = [f for f in lote if f['mail'].lower() not in mails]
+    if not pendientes:
+        return [], []
+    
+    marcadores = ', '.join(['%s'] * len(pendientes))
+    cursor.execute(f"SELECT id_usuario, mail FROM usuarios WHERE id_usuario IN ({marcadores})",
+                   [f['id_usuario'] for f in pendientes])
+    ocupados = {fila['id_usuario']: fila['mail'] for fila in cursor.fetchall()}
+    
+    nuevos = [f for f in pendientes if f['id_usuario'] not in ocupados]
+    conflictos = [(f, ocupados[f['id_usuario']]) for f in pendientes if f['id_usuario'] in ocupados]
+    return nuevos, conflictos
+
+
+def insertar(cursor, nuevos):
+    """
+    Un INSERT de varias filas. ON DUPLICATE KEY sin cambios cubre a un
+    usuario creado entre la consulta y el INSERT (se omite en vez de
+    abortar el lote). Returns: filas insertadas
+    """
+    marcadores = '(' + ', '.join(['%s'] * len(COLUMNAS)) + ')'
+    cursor.execute(f"""
+        INSERT INTO usuarios ({', '.join(COLUMNAS)})
+        VALUES {', '.join([marcadores] * len(nuevos))}
+        ON DUPLICATE KEY UPDATE id_usuario = id_usuario
+    """, [fila[c] for fila in nuevos for c in COLUMNAS])
+    return cursor.rowcount
+
 def main():
     print("=" * 60)
     print("🚀 MIGRANDO USUARIOS A CLEVER CLOUD")
@@ -62,55 +143,50 @@ def main():
         print(f"✅ Encontrados {len(usuarios)} usuarios en WAMP")
         
         # Mostrar las claves del primer usuario para identificar la estructura
-        if usuarios:
-            print(f"📋 Estructura de usuario: {list(usuarios[0].keys())}")
+        print(f"📋 Estructura de usuario: {list(usuarios[0].keys())}")
+        if DRY_RUN:
+            print("🔍 Modo --dry-run: solo se muestran las diferencias, no se escribe nada")
         
-        insertados = 0
+        resumen = {'nuevos': 0, 'existentes': 0, 'conflictos': 0, 'omitidos': 0, 'legado_enc': 0}
+        validos = []
+        for user in usuarios:
+            fila = normalizar(user)
+            if isinstance(fila, str):
+                print(f"  ⚠️ {fila}, omitido")
+                resumen['omitidos'] += 1
+            else:
+                validos.append(fila)
         
         with clever.cursor() as cursor:
-            for user in usuarios:
-                try:
-                    # Determinar el email (puede ser 'email' o 'mail')
-                    email = user.get('email') or user.get('mail') or ''
-                    if not email:
-                        print(f"  ⚠️ Usuario sin email, omitido")
-                        continue
-                    
-                    # Determinar el ID (puede ser 'id' o 'id_usuario')
-                    user_id = user.get('id') or user.get('id_usuario')
-                    if not user_id:
-                        print(f"  ⚠️ Usuario {email} sin ID, omitido")
-                        continue
-                    
-                    # Verificar si ya existe en Clever Cloud
-                    cursor.execute("SELECT id_usuario FROM usuarios WHERE mail = %s", (email,))
-                    existe = cursor.fetchone()
-                    
-                    if not existe:
-                        cursor.execute("""
-                            INSERT INTO usuarios 
-                            (id_usuario, nombre, mail, password, fecha_nacimiento, proveedor, rol) 
-                            VALUES (%s, %s, %s, %s, %s, %s, %s)
-                        """, (
-                            user_id,
-                            user['nombre'],
-                            email,
-                            user['password'],
-                            user['fecha_nacimiento'],
-                            user.get('proveedor', 'email'),
-                            user.get('rol', 'cliente')
-                        ))
-                        print(f"  ✅ Usuario: {email}")
-                        insertados += 1
-                    else:
-                        print(f"  ⏩ Usuario {email} ya existe")
-                        
-                except Exception as e:
-                    print(f"  ❌ Error con usuario: {e}")
-            
-            clever.commit()
+            for inicio in range(0, len(validos), TAMANO_LOTE):
+                lote = validos[inicio:inicio + TAMANO_LOTE]
+                nuevos, conflictos = clasificar(cursor, lote)
+                resumen['existentes'] += len(lote) - len(nuevos) - len(conflictos)
+                for fila, mail_actual in conflictos:
+                    print(f"  ❌ Usuario {fila['mail']}: el id {fila['id_usuario']} ya es de {mail_actual}")
+                resumen['conflictos'] += len(conflictos)
+                for fila in nuevos:
+                    print(f"  {'➕ Se insertaría' if DRY_RUN else '✅ Usuario'}: {fila['mail']}")
+                resumen['legado_enc'] += sum(1 for f in nuevos if f['password'].startswith('enc_'))
+                if nuevos and not DRY_RUN:
+                    try:
+                        resumen['nuevos'] += insertar(cursor, nuevos)
+                        clever.commit()
+                    except Exception as e:
+                        clever.rollback()
+                        print(f"  ❌ Error insertando un lote de {len(nuevos)} usuarios: {e}")
+                elif DRY_RUN:
+                    resumen['nuevos'] += len(nuevos)
         
-        print(f"\n✅ {insertados} usuarios migrados correctamente")
+        accion = "se insertarían" if DRY_RUN else "migrados correctamente"
+        print(f"\n✅ {resumen['nuevos']} usuarios {accion}")
+        print(f"   ⏩ {resumen['existentes']} ya existían (mismo mail)")
+        if resumen['conflictos']:
+            print(f"   ❌ {resumen['conflictos']} con el id ocupado por otro mail (no se copian)")
+        if resumen['omitidos']:
+            print(f"   ⚠️ {resumen['omitidos']} sin email o sin id")
+        if resumen['legado_enc']:
+            print(f"   🔑 {resumen['legado_enc']} con contraseña antigua enc_ (se copian tal cual)")
     
     # --------------------------------------------
     # Verificar resultados
@@ -135,7 +211,7 @@ def main():
     clever.close()
     
     print("\n" + "=" * 60)
-    print("✅ MIGRACIÓN DE USUARIOS COMPLETADA")
+    print("✅ SIMULACIÓN (--dry-run) COMPLETADA" if DRY_RUN else "✅ MIGRACIÓN DE USUARIOS COMPLETADA")
     print("=" * 60)
 
 if __name__ == "__main__":
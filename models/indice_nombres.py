@@ -0,0 +1,120 @@
+# models/indice_nombres.py
+"""
+Índice de nombres de productos en memoria (búsqueda y autocompletado)
+
+Los nombres se guardan normalizados una sola vez (minúsculas y sin tildes,
+así 'audifonos' encuentra 'Audífonos'), con dos estructuras:
+  - trigramas: cada secuencia de 3 caracteres -> ids que la contienen. Una
+    búsqueda por subcadena intersecta los ids de los trigramas del término
+    y solo compara el texto de esos candidatos.
+  - prefijos: lista ordenada de (nombre desde el inicio de cada palabra, id).
+    Los nombres que empiezan por un prefijo quedan contiguos y se
+    encuentran con bisect, sin recorrer el catálogo.
+"""
+
+import unicodedata
+from bisect import bisect_left, insort
+
+
+def normalizar(texto):
+    """'Audífonos Sony' -> 'audifonos sony' (minúsculas y sin tildes)"""
+    descompuesto = unicodedata.normalize('NFKD', texto)
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c)).casefold()
+
+
+def _trigramas(nombre):
+    return {nombre[i:i + 3] for i in range(len(nombre) - 2)}
+
+
+def _claves(nombre):
+    """'mouse logitech g203' -> ['mouse logitech g203', 'logitech g203', 'g203']"""
+    return [nombre[i:] for i in range(len(nombre))
+            if nombre[i] != ' ' and (i == 0 or nombre[i - 1] == ' ')]
+
+
+class IndiceNombres:
+    """Trigramas y prefijos de los nombres, por id de producto"""
+
+    def __init__(self):
+        self._nombres = {}     # id -> nombre normalizado
+        self._trigramas = {}   # trigrama -> set de ids
+        self._prefijos = []    # (clave, id) ordenados
+
+    @classmethod
+    def desde(cls, pares):
+        """Construye el índice de una vez desde pares (id, nombre)"""
+        indice = cls()
+        for id, nombre in pares:
+            nombre = normalizar(nombre)
+            indice._nombres[id] = nombre
+            for trigrama in _trigramas(nombre):
+                indice._trigramas.setdefault(trigrama, set()).add(id)
+            indice._prefijos.extend((clave, id) for clave in _claves(nombre))
+        indice._prefijos.sort()
+        return indice
+
+    def agregar(self, id, nombre):
+        nombre = normalizar(nombre)
+        self._nombres[id] = nombre
+        for trigrama in _trigramas(nombre):
+            self._trigramas.setdefault(trigrama, set()).add(id)
+        for clave in _claves(nombre):
+            insort(self._prefijos, (clave, id))
+
+    def quitar(self, id):
+        nombre = self._nombres.pop(id, None)
+        if nombre is None:
+            return
+        for trigrama in _trigramas(nombre):
+            ids = self._trigramas[trigrama]
+            ids.discard(id)
+            if not ids:
+                del self._trigramas[trigrama]
+        for clave in _claves(nombre):
+            posicion = bisect_left(self._prefijos, (clave, id))
+            if posicion < len(self._prefijos) and self._prefijos[posicion] == (clave, id):
+                del self._prefijos[posicion]
+
+    def buscar(self, termino):
+        """Ids (ordenados) cuyo nombre contiene el término"""
+        termino = normalizar(termino)
+        if len(termino) < 3:
+            # Sin trigramas que intersectar: recorrer los nombres ya normalizados
+            candidatos = self._nombres
+        else:
+            # Empezar por el trigrama más raro: el conjunto se achica rápido
+            conjuntos = sorted((self._trigramas.get(t, ()) for t in _trigramas(termino)), key=len)
+            candidatos = set(conjuntos[0])
+            for ids in conjuntos[1:]:
+                if not candidatos:
+                    break
+                candidatos &= ids
+        return sorted(id for id in candidatos if termino in self._nombres[id])
+
+    def autocompletar(self, prefijo, limite=10):
+        """
+        Hasta 'limite' ids cuyo nombre (o alguna de sus palabras) empieza
+        por el prefijo, en orden alfabético de la coincidencia
+        """
+        prefijo = normalizar(prefijo).lstrip()
+        if not prefijo:
+            return []
+        encontrados = {}
+        posicion = bisect_left(self._prefijos, (prefijo,))
+        while posicion < len(self._prefijos) and len(encontrados) < limite:
+            clave, id = self._prefijos[posicion]
+            if not clave.startswith(prefijo):
+                break
+            encontrados[id] = None
+            posicion += 1
+        return list(encontrados)
+
+    def __len__(self):
+        return len(self._nombres)
+
+    def __eq__(self, otro):
+        return (isinstance(otro, IndiceNombres) and self._nombres == otro._nombres
+                and self._trigramas == otro._trigramas and self._prefijos == otro._prefijos)
+
+    def __repr__(self):
+        return f"IndiceNombres({len(self._nombres)} nombres, {len(self._trigramas)} trigramas)"
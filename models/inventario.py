@@ -4,46 +4,286 @@ Clase Inventario - Gestiona el inventario de productos
 """
 
 from models.producto import Producto
+from models.indice_nombres import IndiceNombres
 from database.db_manager import DatabaseManager
+from bisect import bisect_left, bisect_right, insort
 import sqlite3
+import threading
+import time
 
 class Inventario:
     """
     Clase que gestiona el inventario de productos tecnológicos
     usando un diccionario en memoria y sincroniza con SQLite
+    
+    Además del diccionario por id mantiene índices secundarios, para que
+    las consultas por categoría, stock, precio y nombre no recorran todo:
+      - _por_categoria: categoría -> ids (un dict usado como conjunto
+        ordenado; un producto que cambia de categoría pasa al final)
+      - _por_cantidad y _por_precio: listas ordenadas de (valor, id) que
+        se consultan con bisect
+      - _por_nombre: trigramas y prefijos de los nombres sin tildes
+        (models/indice_nombres.py), para buscar y autocompletar
+    y los totales de obtener_estadisticas (valor total y por categoría, en
+    centavos enteros para que sumar y restar no acumule error de redondeo).
+    Los actualizan agregar_producto, actualizar_producto, eliminar_producto
+    y los métodos por lote; los productos no deben modificarse por fuera.
+    
+    Los hilos de un mismo proceso (las peticiones de un worker) comparten
+    el inventario: un RLock (_lock) envuelve cada operación que lo modifica
+    y cada consulta a los índices, así nadie lee un índice a medio
+    actualizar. Es reentrante porque los lotes y el resincronizado llaman
+    a otros métodos que también lo toman.
+    
+    Cada proceso (p. ej. cada worker de gunicorn) tiene su propio
+    inventario. Los cambios hechos por otros se aplican con
+    refrescar_cambios, que lee la tabla productos_cambios y recarga solo
+    los ids que cambiaron.
     """
     
     # 🔥 CATEGORÍAS ACTUALIZADAS - Incluye Celulares y Tablets
     CATEGORIAS_VALIDAS = ('computadoras', 'perifericos', 'audio', 'celulares', 'tablets', 'otros')
     
-    def __init__(self):
+    # Por encima de esta cantidad de cambios en un lote, los índices
+    # ordenados se reconstruyen de una vez en lugar de insertar uno a uno
+    UMBRAL_RECONSTRUIR = 1000
+    
+    # Segundos mínimos entre dos revisiones de revisar_cambios
+    INTERVALO_REVISION = 1.0
+    
+    def __init__(self, db=None):
         """
         Inicializa el inventario con un diccionario vacío y conecta a la BD
         """
         self.productos = {}  # Diccionario: clave=id, valor=objeto Producto
-        self.db = DatabaseManager()
+        self._por_categoria = {}
+        self._por_cantidad = []
+        self._por_precio = []
+        self._valor_total = 0              # centavos
+        self._valor_por_categoria = {}     # categoría -> centavos
+        self._por_nombre = IndiceNombres()
+        self._secuencia = 0                # último cambio de productos_cambios ya aplicado
+        self._ultima_revision = 0.0
+        self._lock_revision = threading.Lock()
+        self._lock = threading.RLock()
+        self.db = db or DatabaseManager()
         self.cargar_desde_bd()
     
     def cargar_desde_bd(self):
         """
         Carga todos los productos desde la base de datos al diccionario
         """
+        with self._lock:
+            try:
+                # Leída antes que los productos: lo que cambie durante la carga
+                # se vuelve a aplicar en el próximo refresco
+                self._secuencia = self.db.ultima_secuencia_cambios()
+                productos_bd = self.db.obtener_todos_productos()
+                for prod in productos_bd:
+                    producto = Producto(
+                        id=prod.id,
+                        nombre=prod.nombre,
+                        precio=prod.precio,
+                        cantidad=prod.cantidad,
+                        categoria=prod.categoria,
+                        descripcion=prod.descripcion or ""
+                    )
+                    self.productos[prod.id] = producto
+                
+                print(f"✅ {len(self.productos)} productos cargados desde la BD")
+            except Exception as e:
+                print(f"Error cargando productos: {e}")
+            self._reconstruir_indices()
+    
+    # ----- ÍNDICES SECUNDARIOS -----
+    
+    @staticmethod
+    def _valor_centavos(producto):
+        """precio * cantidad en centavos enteros"""
+        return round(producto.precio * 100) * producto.cantidad
+    
+    @staticmethod
+    def _campos_cambiados(producto, datos):
+        """Campos de 'datos' cuyo valor difiere del actual"""
+        return {campo for campo, valor in datos.items() if getattr(producto, campo) != valor}
+    
+    def _indexar(self, producto, campos=None):
+        """
+        Agrega el producto a los índices. Con 'campos' (los que cambiaron en
+        una actualización) solo toca los índices que dependen de ellos.
+        """
+        todos = campos is None
+        if todos or 'categoria' in campos:
+            self._por_categoria.setdefault(producto.categoria, {})[producto.id] = None
+        if todos or 'cantidad' in campos:
+            insort(self._por_cantidad, (producto.cantidad, producto.id))
+        if todos or 'precio' in campos:
+            insort(self._por_precio, (producto.precio, producto.id))
+        if todos or 'nombre' in campos:
+            self._por_nombre.agregar(producto.id, producto.nombre)
+        if todos or campos & {'precio', 'cantidad', 'categoria'}:
+            valor = self._valor_centavos(producto)
+            self._valor_total += valor
+            self._valor_por_categoria[producto.categoria] = self._valor_por_categoria.get(producto.categoria, 0) + valor
+    
+    @staticmethod
+    def _quitar_ordenado(lista, entrada):
+        posicion = bisect_left(lista, entrada)
+        if posicion < len(lista) and lista[posicion] == entrada:
+            del lista[posicion]
+    
+    def _desindexar(self, producto, campos=None):
+        """
+        Quita el producto de los índices (con los valores con que se indexó).
+        Con 'campos', como en _indexar; si la categoría no cambia, el
+        producto conserva su orden dentro de ella.
+        """
+        todos = campos is None
+        ids = self._por_categoria.get(producto.categoria) if todos or 'categoria' in campos else None
+        if ids is not None:
+            ids.pop(producto.id, None)
+            if not ids:
+                del self._por_categoria[producto.categoria]
+                del self._valor_por_categoria[producto.categoria]
+        if todos or 'cantidad' in campos:
+            self._quitar_ordenado(self._por_cantidad, (producto.cantidad, producto.id))
+        if todos or 'precio' in campos:
+            self._quitar_ordenado(self._por_precio, (producto.precio, producto.id))
+        if todos or 'nombre' in campos:
+            self._por_nombre.quitar(producto.id)
+        if todos or campos & {'precio', 'cantidad', 'categoria'}:
+            valor = self._valor_centavos(producto)
+            self._valor_total -= valor
+            if producto.categoria in self._valor_por_categoria:
+                self._valor_por_categoria[producto.categoria] -= valor
+    
+    def _calcular_indices(self):
+        """Índices y totales calculados desde cero recorriendo el diccionario"""
+        por_categoria = {}
+        valor_por_categoria = {}
+        for id, producto in self.productos.items():
+            por_categoria.setdefault(producto.categoria, {})[id] = None
+            valor_por_categoria[producto.categoria] = (valor_por_categoria.get(producto.categoria, 0)
+                                                       + self._valor_centavos(producto))
+        return {
+            'por_categoria': por_categoria,
+            'por_cantidad': sorted((p.cantidad, id) for id, p in self.productos.items()),
+            'por_precio': sorted((p.precio, id) for id, p in self.productos.items()),
+            'valor_total': sum(valor_por_categoria.values()),
+            'valor_por_categoria': valor_por_categoria,
+            'por_nombre': IndiceNombres.desde((id, p.nombre) for id, p in self.productos.items()),
+        }
+    
+    def _reconstruir_indices(self):
+        """Rehace los índices desde el diccionario (carga inicial, lotes grandes, rollback)"""
+        with self._lock:
+            for nombre, valor in self._calcular_indices().items():
+                setattr(self, f'_{nombre}', valor)
+    
+    def _resincronizar(self):
+        """
+        Tras un error en una operación por lote. Si falló la BD, la memoria
+        no se tocó (los lotes se aplican después del commit). Si falló al
+        aplicar un lote ya confirmado, los índices se rehacen desde el
+        diccionario y lo que falte se relee de la BD.
+        """
+        self._reconstruir_indices()
+        self.refrescar_cambios()
+    
+    def verificar_consistencia(self):
+        """
+        Compara los índices y totales mantenidos con un cálculo desde cero.
+        
+        Returns:
+            list: diferencias como (índice, mantenido, calculado); vacía si
+                  todo coincide
+        """
+        with self._lock:
+            diferencias = []
+            for nombre, calculado in self._calcular_indices().items():
+                mantenido = getattr(self, f'_{nombre}')
+                if nombre == 'por_categoria':
+                    # El orden dentro de cada categoría puede diferir del de alta
+                    mantenido = {c: set(ids) for c, ids in mantenido.items()}
+                    calculado = {c: set(ids) for c, ids in calculado.items()}
+                if mantenido != calculado:
+                    diferencias.append((nombre, mantenido, calculado))
+            return diferencias
+    
+    # ----- COHERENCIA ENTRE PROCESOS -----
+    
+    def refrescar_cambios(self):
+        """
+        Aplica los cambios de productos hechos fuera de este inventario
+        (otro worker, la consola, ProductoService vía la sincronización)
+        desde el último refresco. Lee solo los ids cambiados, sin repetir
+        cargar_desde_bd. Los cambios propios también figuran en la
+        secuencia; al releerlos no hay diferencias y no se tocan.
+        
+        Returns:
+            list: ids refrescados (vacía si no hubo cambios)
+        """
+        with self._lock:
+            if self.db.ultima_secuencia_cambios() == self._secuencia:
+                return []
+            cambios = self.db.obtener_cambios_productos(self._secuencia)
+            if not cambios:
+                return []
+            ids = [id for _, id in cambios]
+            filas = {fila.id: fila for fila in self.db.obtener_productos_por_ids(ids)}
+            
+            for id in ids:
+                fila = filas.get(id)
+                producto = self.productos.get(id)
+                if fila is None:
+                    # Eliminado
+                    if producto is not None:
+                        self._desindexar(self.productos.pop(id))
+                        Producto.ids_utilizados.discard(id)
+                elif producto is None:
+                    # Nuevo: la BD manda, aunque el id figure como usado
+                    Producto.ids_utilizados.discard(id)
+                    producto = Producto(id, fila.nombre, fila.precio, fila.cantidad,
+                                        fila.categoria, fila.descripcion or "")
+                    self.productos[id] = producto
+                    self._indexar(producto)
+                else:
+                    datos = {
+                        'nombre': fila.nombre, 'precio': fila.precio, 'cantidad': fila.cantidad,
+                        'categoria': fila.categoria, 'descripcion': fila.descripcion or ""
+                    }
+                    cambios_campos = self._campos_cambiados(producto, datos)
+                    if cambios_campos:
+                        self._desindexar(producto, cambios_campos)
+                        try:
+                            for campo in cambios_campos:
+                                setattr(producto, campo, datos[campo])
+                        finally:
+                            self._indexar(producto, cambios_campos)
+            
+            # Lo que cambie mientras tanto tendrá una secuencia mayor
+            self._secuencia = cambios[-1][0]
+            return ids
+    
+    def revisar_cambios(self):
+        """
+        refrescar_cambios como mucho una vez cada INTERVALO_REVISION
+        segundos, para llamarlo en cada petición. Si otro hilo ya está
+        revisando, no espera. Un error se informa y no corta la petición.
+        """
+        ahora = time.monotonic()
+        if ahora - self._ultima_revision < self.INTERVALO_REVISION:
+            return []
+        if not self._lock_revision.acquire(blocking=False):
+            return []
         try:
-            productos_bd = self.db.obtener_todos_productos()
-            for prod in productos_bd:
-                producto = Producto(
-                    id=prod[0],
-                    nombre=prod[1],
-                    precio=prod[2],
-                    cantidad=prod[3],
-                    categoria=prod[4],
-                    descripcion=prod[5] if prod[5] else ""
-                )
-                self.productos[prod[0]] = producto
-            
-            print(f"✅ {len(self.productos)} productos cargados desde la BD")
+            self._ultima_revision = ahora
+            return self.refrescar_cambios()
         except Exception as e:
-            print(f"Error cargando productos: {e}")
+            print(f"Error refrescando productos: {e}")
+            return []
+        finally:
+            self._lock_revision.release()
     
     # ----- OPERACIONES CRUD -----
     
@@ -51,135 +291,299 @@ class Inventario:
         """
         Agrega un nuevo producto al inventario (en memoria y BD)
         """
-        # Validar categoría con la tupla actualizada
-        if categoria not in self.CATEGORIAS_VALIDAS:
-            raise ValueError(f"Categoría no válida. Debe ser una de: {self.CATEGORIAS_VALIDAS}")
-        
-        # Verificar si el ID ya existe
-        if id in self.productos:
-            raise ValueError(f"Ya existe un producto con ID {id}")
-        
-        # Crear el objeto Producto
-        nuevo_producto = Producto(id, nombre, precio, cantidad, categoria, descripcion)
-        
-        # Guardar en base de datos primero
-        try:
-            self.db.insertar_producto(nuevo_producto)
-        except sqlite3.IntegrityError:
-            raise ValueError(f"Error: El ID {id} ya existe en la base de datos")
-        
-        # Si la BD lo acepta, agregar a memoria
-        self.productos[id] = nuevo_producto
-        return nuevo_producto
+        with self._lock:
+            # Validar categoría con la tupla actualizada
+            if categoria not in self.CATEGORIAS_VALIDAS:
+                raise ValueError(f"Categoría no válida. Debe ser una de: {self.CATEGORIAS_VALIDAS}")
+            
+            # Verificar si el ID ya existe
+            if id in self.productos:
+                raise ValueError(f"Ya existe un producto con ID {id}")
+            
+            # Crear el objeto Producto
+            nuevo_producto = Producto(id, nombre, precio, cantidad, categoria, descripcion)
+            
+            # Guardar en base de datos primero
+            try:
+                self.db.insertar_producto(nuevo_producto)
+            except sqlite3.IntegrityError:
+                raise ValueError(f"Error: El ID {id} ya existe en la base de datos")
+            
+            # Si la BD lo acepta, agregar a memoria
+            self.productos[id] = nuevo_producto
+            self._indexar(nuevo_producto)
+            return nuevo_producto
     
     def eliminar_producto(self, id):
         """
         Elimina un producto del inventario
         """
-        if id not in self.productos:
+        with self._lock:
+            if id not in self.productos:
+                return False
+            
+            # Eliminar de base de datos
+            if self.db.eliminar_producto(id):
+                # Eliminar del diccionario en memoria
+                self._desindexar(self.productos.pop(id))
+                # Remover ID del conjunto de IDs utilizados
+                if id in Producto.ids_utilizados:
+                    Producto.ids_utilizados.remove(id)
+                return True
             return False
-        
-        # Eliminar de base de datos
-        if self.db.eliminar_producto(id):
-            # Eliminar del diccionario en memoria
-            del self.productos[id]
-            # Remover ID del conjunto de IDs utilizados
-            if id in Producto.ids_utilizados:
-                Producto.ids_utilizados.remove(id)
-            return True
-        return False
     
     def actualizar_producto(self, id, **kwargs):
         """
         Actualiza los datos de un producto
         kwargs puede incluir: nombre, precio, cantidad, categoria, descripcion
         """
-        if id not in self.productos:
+        with self._lock:
+            if id not in self.productos:
+                return False
+            
+            # Validar categoría si se está actualizando
+            if 'categoria' in kwargs and kwargs['categoria'] not in self.CATEGORIAS_VALIDAS:
+                raise ValueError(f"Categoría no válida. Debe ser una de: {self.CATEGORIAS_VALIDAS}")
+            
+            producto = self.productos[id]
+            
+            # Actualizar en base de datos
+            if self.db.actualizar_producto(id, **kwargs):
+                # Actualizar en memoria (fuera de los índices mientras cambia)
+                cambios = self._campos_cambiados(producto, kwargs)
+                self._desindexar(producto, cambios)
+                try:
+                    if 'nombre' in kwargs:
+                        producto.nombre = kwargs['nombre']
+                    if 'precio' in kwargs:
+                        producto.precio = kwargs['precio']
+                    if 'cantidad' in kwargs:
+                        producto.cantidad = kwargs['cantidad']
+                    if 'categoria' in kwargs:
+                        producto.categoria = kwargs['categoria']
+                    if 'descripcion' in kwargs:
+                        producto.descripcion = kwargs['descripcion']
+                finally:
+                    self._indexar(producto, cambios)
+                
+                return True
             return False
+    
+    # ----- OPERACIONES POR LOTE -----
+    
+    def _validar_datos(self, datos, nuevo=False):
+        """
+        Valida un diccionario de datos de producto antes de enviarlo a la BD.
+        Devuelve el motivo del rechazo o None si es válido.
+        """
+        id = datos.get('id')
+        if nuevo:
+            if id is None:
+                return "El ID es obligatorio"
+            if id in self.productos or id in Producto.ids_utilizados:
+                return f"Ya existe un producto con ID {id}"
+            if any(datos.get(c) is None for c in ('nombre', 'precio', 'cantidad', 'categoria')):
+                return "Faltan campos obligatorios"
+        elif id not in self.productos:
+            return f"No existe producto con ID {id}"
         
-        # Validar categoría si se está actualizando
-        if 'categoria' in kwargs and kwargs['categoria'] not in self.CATEGORIAS_VALIDAS:
-            raise ValueError(f"Categoría no válida. Debe ser una de: {self.CATEGORIAS_VALIDAS}")
-        
-        producto = self.productos[id]
-        
-        # Actualizar en base de datos
-        if self.db.actualizar_producto(id, **kwargs):
-            # Actualizar en memoria
-            if 'nombre' in kwargs:
-                producto.nombre = kwargs['nombre']
-            if 'precio' in kwargs:
-                producto.precio = kwargs['precio']
-            if 'cantidad' in kwargs:
-                producto.cantidad = kwargs['cantidad']
-            if 'categoria' in kwargs:
-                producto.categoria = kwargs['categoria']
-            if 'descripcion' in kwargs:
-                producto.descripcion = kwargs['descripcion']
-            
-            return True
-        return False
+        if 'categoria' in datos and datos['categoria'] is not None \
+                and datos['categoria'] not in self.CATEGORIAS_VALIDAS:
+            return f"Categoría no válida: {datos['categoria']}"
+        if datos.get('nombre') is not None and not str(datos['nombre']).strip():
+            return "El nombre no puede estar vacío"
+        if datos.get('precio') is not None and datos['precio'] <= 0:
+            return "El precio debe ser mayor a 0"
+        if datos.get('cantidad') is not None and datos['cantidad'] < 0:
+            return "La cantidad no puede ser negativa"
+        return None
+    
+    def _filtrar_validos(self, elementos, conflictos, validar):
+        """
+        Generador que deja pasar solo los elementos válidos y anota el resto
+        como conflictos, para no materializar toda la entrada en memoria
+        """
+        for elemento in elementos:
+            motivo = validar(elemento)
+            if motivo:
+                id = elemento.get('id') if isinstance(elemento, dict) else elemento
+                conflictos.append((id, motivo))
+            else:
+                yield elemento
+    
+    def agregar_productos_lote(self, productos, tamano_lote=None):
+        """
+        Agrega muchos productos (diccionarios) en una sola transacción.
+        El diccionario en memoria se actualiza una vez por lote, después
+        del commit.
+        """
+        with self._lock:
+            conflictos = []
+            
+            def confirmar_lote(filas):
+                nuevos = {}
+                for id, nombre, precio, cantidad, categoria, descripcion in filas:
+                    nuevos[id] = Producto(id, nombre, precio, cantidad, categoria, descripcion or "")
+                self.productos.update(nuevos)
+                if len(nuevos) > self.UMBRAL_RECONSTRUIR:
+                    self._reconstruir_indices()
+                else:
+                    for producto in nuevos.values():
+                        self._indexar(producto)
+            
+            validos = self._filtrar_validos(productos, conflictos,
+                                            lambda datos: self._validar_datos(datos, nuevo=True))
+            try:
+                resumen = self.db.insertar_productos_lote(validos, tamano_lote, confirmar_lote)
+            except Exception:
+                self._resincronizar()
+                raise
+            
+            resumen['procesados'] += len(conflictos)
+            resumen['conflictos'] = conflictos + resumen['conflictos']
+            return resumen
+    
+    def actualizar_productos_lote(self, cambios, tamano_lote=None):
+        """
+        Actualiza muchos productos en una sola transacción.
+        Cada cambio es un diccionario con 'id' y los campos a modificar.
+        """
+        with self._lock:
+            conflictos = []
+            
+            def confirmar_lote(actualizados):
+                uno_a_uno = len(actualizados) <= self.UMBRAL_RECONSTRUIR
+                for id, datos in actualizados:
+                    producto = self.productos[id]
+                    cambios = self._campos_cambiados(producto, datos)
+                    if uno_a_uno:
+                        self._desindexar(producto, cambios)
+                    for campo, valor in datos.items():
+                        setattr(producto, campo, valor)
+                    if uno_a_uno:
+                        self._indexar(producto, cambios)
+                if not uno_a_uno:
+                    self._reconstruir_indices()
+            
+            validos = self._filtrar_validos(cambios, conflictos, self._validar_datos)
+            try:
+                resumen = self.db.actualizar_productos_lote(validos, tamano_lote, confirmar_lote)
+            except Exception:
+                self._resincronizar()
+                raise
+            
+            resumen['procesados'] += len(conflictos)
+            resumen['conflictos'] = conflictos + resumen['conflictos']
+            return resumen
+    
+    def eliminar_productos_lote(self, ids, tamano_lote=None):
+        """
+        Elimina muchos productos por ID en una sola transacción
+        """
+        with self._lock:
+            conflictos = []
+            
+            def confirmar_lote(eliminados):
+                uno_a_uno = len(eliminados) <= self.UMBRAL_RECONSTRUIR
+                for id in eliminados:
+                    producto = self.productos.pop(id)
+                    Producto.ids_utilizados.discard(id)
+                    if uno_a_uno:
+                        self._desindexar(producto)
+                if not uno_a_uno:
+                    self._reconstruir_indices()
+            
+            validos = self._filtrar_validos(
+                ids, conflictos,
+                lambda id: None if id in self.productos else f"No existe producto con ID {id}"
+            )
+            try:
+                resumen = self.db.eliminar_productos_lote(validos, tamano_lote, confirmar_lote)
+            except Exception:
+                self._resincronizar()
+                raise
+            
+            resumen['procesados'] += len(conflictos)
+            resumen['conflictos'] = conflictos + resumen['conflictos']
+            return resumen
     
     def buscar_productos(self, termino):
         """
-        Busca productos por nombre (parcial)
+        Busca productos por nombre (parcial, sin distinguir mayúsculas ni
+        tildes), ordenados por id, con el índice de trigramas
         """
-        resultados = []
-        termino_lower = termino.lower()
-        
-        for producto in self.productos.values():
-            if termino_lower in producto.nombre.lower():
-                resultados.append(producto)
-        
-        return resultados
+        with self._lock:
+            return [self.productos[id] for id in self._por_nombre.buscar(termino)]
+    
+    def autocompletar(self, prefijo, limite=10):
+        """
+        Hasta 'limite' productos cuyo nombre, o alguna de sus palabras,
+        empieza por el prefijo (para el buscador del catálogo)
+        """
+        with self._lock:
+            return [self.productos[id] for id in self._por_nombre.autocompletar(prefijo, limite)]
     
     def obtener_producto_por_id(self, id):
         """
         Obtiene un producto por su ID
         """
-        return self.productos.get(id)
+        with self._lock:
+            return self.productos.get(id)
     
     def obtener_todos(self):
         """
         Obtiene todos los productos del inventario
         """
-        return list(self.productos.values())
+        with self._lock:
+            return list(self.productos.values())
     
     def obtener_por_categoria(self, categoria):
         """
-        Obtiene productos de una categoría específica
+        Obtiene productos de una categoría específica (desde el índice)
         """
-        return [p for p in self.productos.values() if p.categoria == categoria]
+        with self._lock:
+            return [self.productos[id] for id in self._por_categoria.get(categoria, ())]
     
     def obtener_productos_con_bajo_stock(self, limite=5):
         """
-        Obtiene productos con stock menor al límite
+        Obtiene productos con stock menor o igual al límite, de menor a
+        mayor cantidad (búsqueda binaria en el índice de stock)
+        """
+        with self._lock:
+            fin = bisect_right(self._por_cantidad, (limite, float('inf')))
+            return [self.productos[id] for _, id in self._por_cantidad[:fin]]
+    
+    def obtener_por_rango_precio(self, minimo=None, maximo=None):
+        """
+        Obtiene productos con minimo <= precio <= maximo, de menor a mayor
+        precio (búsqueda binaria en el índice de precios)
         """
-        return [p for p in self.productos.values() if p.cantidad <= limite]
+        with self._lock:
+            inicio = 0 if minimo is None else bisect_left(self._por_precio, (minimo, float('-inf')))
+            fin = len(self._por_precio) if maximo is None else bisect_right(self._por_precio, (maximo, float('inf')))
+            return [self.productos[id] for _, id in self._por_precio[inicio:fin]]
     
     def obtener_estadisticas(self):
         """
         Obtiene estadísticas del inventario
-        Devuelve un diccionario con: total_productos, valor_total, productos_por_categoria
-        """
-        total_productos = len(self.productos)
-        valor_total = sum(p.precio * p.cantidad for p in self.productos.values())
-        
-        # Usando un diccionario para contar por categoría
-        productos_por_categoria = {}
-        for p in self.productos.values():
-            productos_por_categoria[p.categoria] = productos_por_categoria.get(p.categoria, 0) + 1
+        Devuelve un diccionario con: total_productos, valor_total,
+        productos_por_categoria y valor_por_categoria
         
-        return {
-            'total_productos': total_productos,
-            'valor_total': valor_total,
-            'productos_por_categoria': productos_por_categoria
-        }
+        Sale de los totales que mantienen las operaciones CRUD, sin recorrer
+        los productos (el costo depende de la cantidad de categorías)
+        """
+        with self._lock:
+            return {
+                'total_productos': len(self.productos),
+                'valor_total': self._valor_total / 100,
+                'productos_por_categoria': {c: len(ids) for c, ids in self._por_categoria.items()},
+                'valor_por_categoria': {c: v / 100 for c, v in self._valor_por_categoria.items()}
+            }
     
     def __len__(self):
         """Devuelve la cantidad de productos en el inventario"""
         return len(self.productos)
     
     def __iter__(self):
-        """Permite iterar sobre los productos"""
-        return iter(self.productos.values())
\ No newline at end of file
+        """Permite iterar sobre los productos (una copia: otro hilo puede modificarlos)"""
+        return iter(self.obtener_todos())
\ No newline at end of file
@@ -0,0 +1,44 @@
+# reconstruir_estadisticas.py
+"""
+SCRIPT PARA RECONSTRUIR LAS ESTADÍSTICAS DEL INVENTARIO EN MYSQL
+Recalcula la tabla productos_estadisticas (mantenida por triggers)
+a partir de la tabla productos.
+
+Uso:
+    python reconstruir_estadisticas.py              # compara y reconstruye
+    python reconstruir_estadisticas.py --verificar  # solo muestra diferencias
+"""
+
+import sys
+
+from services.producto_service import ProductoService
+
+
+def main():
+    print("=" * 60)
+    print("📊 ESTADÍSTICAS DEL INVENTARIO (productos_estadisticas)")
+    print("=" * 60)
+
+    servicio = ProductoService()
+    diferencias = servicio.comparar_estadisticas()
+    if diferencias is None:
+        print("❌ No se pudo conectar a MySQL")
+        return 1
+
+    if diferencias:
+        print(f"\n⚠️ {len(diferencias)} categorías desincronizadas:")
+        for categoria, guardado, calculado in diferencias:
+            print(f"   {categoria}: guardado={guardado} calculado={calculado}")
+    else:
+        print("\n✅ Las estadísticas coinciden con la tabla productos")
+
+    if '--verificar' in sys.argv:
+        return 1 if diferencias else 0
+
+    categorias = servicio.reconstruir_estadisticas()
+    print(f"\n✅ Estadísticas reconstruidas: {categorias} categorías")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
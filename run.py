@@ -1,5 +1,6 @@
 # run.py
-from app import app
+from app import app, iniciar_despachador_outbox
 
 if __name__ == '__main__':
+    iniciar_despachador_outbox()
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,127 @@
+# services/cache.py
+"""
+Caché en memoria con desalojo LRU y expiración por clave (TTL)
+
+Se usa delante de ProductoService para no ir a MySQL en cada lectura
+del catálogo. Las claves son tuplas cuyo primer elemento es el grupo,
+por ejemplo ('id', 7), ('categoria', 'audio') o ('bajo_stock', 5); así
+las escrituras pueden invalidar solo las claves afectadas.
+
+La caché es por proceso: con varios workers, los demás ven el cambio
+cuando vence el TTL.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+_AUSENTE = object()
+
+
+class CacheLRU:
+    """Caché acotada: al llenarse desaloja la clave usada hace más tiempo"""
+
+    def __init__(self, capacidad=1024, ttl=60.0, reloj=time.monotonic):
+        if capacidad < 1:
+            raise ValueError("La capacidad de la caché debe ser al menos 1")
+        self.capacidad = capacidad
+        self.ttl = ttl
+        self._reloj = reloj
+        self._lock = threading.Lock()
+        # clave -> (valor, vence_en); el orden es el de uso (último = más reciente)
+        self._datos = OrderedDict()
+        # grupo -> claves presentes, para invalidar por grupo sin recorrer todo
+        self._grupos = {}
+        # Se incrementa en cada invalidación (ver obtener_o_cargar)
+        self._version = 0
+        self._contadores = {'aciertos': 0, 'fallos': 0, 'expirados': 0, 'desalojos': 0, 'invalidaciones': 0}
+
+    def __len__(self):
+        return len(self._datos)
+
+    def _quitar(self, clave):
+        """Saca una clave del diccionario y de su grupo (con el lock tomado)"""
+        del self._datos[clave]
+        grupo = self._grupos.get(clave[0])
+        if grupo is not None:
+            grupo.discard(clave)
+            if not grupo:
+                del self._grupos[clave[0]]
+
+    def obtener(self, clave, por_defecto=None):
+        """Devuelve el valor guardado o 'por_defecto' si no está o venció"""
+        with self._lock:
+            entrada = self._datos.get(clave, _AUSENTE)
+            if entrada is _AUSENTE:
+                self._contadores['fallos'] += 1
+                return por_defecto
+            valor, vence_en = entrada
+            if vence_en <= self._reloj():
+                self._quitar(clave)
+                self._contadores['expirados'] += 1
+                self._contadores['fallos'] += 1
+                return por_defecto
+            self._datos.move_to_end(clave)
+            self._contadores['aciertos'] += 1
+            return valor
+
+    def guardar(self, clave, valor, ttl=None):
+        """Guarda un valor; 'ttl' en segundos reemplaza al de la caché"""
+        vence_en = self._reloj() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if clave in self._datos:
+                self._datos.move_to_end(clave)
+            self._datos[clave] = (valor, vence_en)
+            self._grupos.setdefault(clave[0], set()).add(clave)
+            while len(self._datos) > self.capacidad:
+                self._quitar(next(iter(self._datos)))
+                self._contadores['desalojos'] += 1
+
+    def obtener_o_cargar(self, clave, cargar, ttl=None):
+        """
+        Lectura a través de la caché: si la clave no está, llama a cargar()
+        y guarda el resultado. Las excepciones de cargar() no se guardan.
+        Si hubo una invalidación mientras se cargaba, el valor se devuelve
+        pero no se guarda (podría ser anterior a la escritura).
+        """
+        valor = self.obtener(clave, _AUSENTE)
+        if valor is not _AUSENTE:
+            return valor
+        version = self._version
+        valor = cargar()
+        with self._lock:
+            vigente = version == self._version
+        if vigente:
+            self.guardar(clave, valor, ttl)
+        return valor
+
+    def invalidar(self, *claves):
+        """Elimina solo las claves indicadas"""
+        with self._lock:
+            self._version += 1
+            for clave in claves:
+                if clave in self._datos:
+                    self._quitar(clave)
+                    self._contadores['invalidaciones'] += 1
+
+    def claves_de(self, grupo):
+        """Claves presentes de un grupo, p. ej. claves_de('bajo_stock')"""
+        with self._lock:
+            return list(self._grupos.get(grupo, ()))
+
+    def limpiar(self):
+        with self._lock:
+            self._version += 1
+            self._datos.clear()
+            self._grupos.clear()
+
+    def estadisticas(self):
+        with self._lock:
+            consultas = self._contadores['aciertos'] + self._contadores['fallos']
+            return dict(
+                self._contadores,
+                tamano=len(self._datos),
+                capacidad=self.capacidad,
+                ttl=self.ttl,
+                tasa_aciertos=round(self._contadores['aciertos'] / consultas, 4) if consultas else None,
+            )
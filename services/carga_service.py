@@ -0,0 +1,184 @@
+# services/carga_service.py
+"""
+Carga masiva de productos desde un CSV
+
+Cada fila indica una acción (columna 'accion': crear, actualizar o
+eliminar; si falta, se actualiza cuando trae 'id' y se crea cuando no).
+Las filas válidas se agrupan en lotes consecutivos de la misma acción y
+se envían a ProductoService.crear_lote / actualizar_lote / eliminar_lote,
+así cada lote es una sola transacción en MySQL. El resultado es un
+informe con una entrada por fila. Si el archivo no se puede leer (no es
+UTF-8, CSV mal formado o encabezado sin columnas conocidas) se informa
+como error del archivo y se aplican solo las filas leídas hasta ahí.
+"""
+
+import csv
+import io
+
+# Mismas reglas que ProductoForm
+CATEGORIAS_VALIDAS = ('computadoras', 'perifericos', 'audio', 'celulares', 'tablets', 'otros')
+ACCIONES = ('crear', 'actualizar', 'eliminar')
+COLUMNAS = ('accion', 'id', 'nombre', 'precio', 'cantidad', 'categoria', 'descripcion')
+
+
+class CargaProductosService:
+    """Procesa un CSV de productos por lotes y arma el informe por fila"""
+
+    def __init__(self, producto_service, tamano_lote=None):
+        self.producto_service = producto_service
+        self.tamano_lote = tamano_lote or producto_service.TAMANO_LOTE
+
+    @staticmethod
+    def validar_fila(fila):
+        """
+        Valida y convierte una fila del CSV.
+
+        Returns:
+            tuple: (accion, datos) con los tipos ya convertidos
+
+        Raises:
+            ValueError: con el motivo, si la fila no es válida
+        """
+        # DictReader deja los valores sobrantes bajo la clave None y
+        # completa con None las columnas que faltan
+        if None in fila:
+            raise ValueError("La fila tiene más columnas que el encabezado")
+        if None in fila.values():
+            raise ValueError("A la fila le faltan columnas del encabezado")
+        fila = {(k or '').strip().lower(): (v or '').strip() for k, v in fila.items()}
+        id_texto = fila.get('id', '')
+        accion = fila.get('accion', '').lower() or ('actualizar' if id_texto else 'crear')
+        if accion not in ACCIONES:
+            raise ValueError(f"Acción desconocida '{accion}'")
+
+        datos = {}
+        if id_texto:
+            try:
+                datos['id'] = int(id_texto)
+            except ValueError:
+                raise ValueError(f"El id '{id_texto}' no es un número entero")
+        elif accion != 'crear':
+            raise ValueError(f"Para {accion} se necesita el id")
+        if accion == 'eliminar':
+            return accion, datos
+
+        datos['nombre'] = fila.get('nombre', '')
+        if not 3 <= len(datos['nombre']) <= 200:
+            raise ValueError("El nombre debe tener entre 3 y 200 caracteres")
+        try:
+            datos['precio'] = float(fila.get('precio', ''))
+        except ValueError:
+            raise ValueError("El precio no es un número")
+        if datos['precio'] < 0.01:
+            raise ValueError("El precio debe ser mayor a 0")
+        try:
+            datos['cantidad'] = int(fila.get('cantidad', ''))
+        except ValueError:
+            raise ValueError("La cantidad no es un número entero")
+        if datos['cantidad'] < 0:
+            raise ValueError("La cantidad no puede ser negativa")
+        datos['categoria'] = fila.get('categoria', '').lower()
+        if datos['categoria'] not in CATEGORIAS_VALIDAS:
+            raise ValueError(f"Categoría desconocida '{datos['categoria']}'")
+        datos['descripcion'] = fila.get('descripcion', '')
+        if len(datos['descripcion']) > 500:
+            raise ValueError("La descripción no puede exceder los 500 caracteres")
+        return accion, datos
+
+    @staticmethod
+    def validar_encabezado(columnas):
+        """
+        Revisa la fila de encabezado del CSV.
+
+        Raises:
+            ValueError: si hay columnas desconocidas o repetidas
+        """
+        columnas = [(c or '').strip().lower() for c in columnas]
+        desconocidas = [c for c in columnas if c not in COLUMNAS]
+        if desconocidas:
+            raise ValueError(f"Columnas desconocidas en el encabezado: {', '.join(desconocidas)}. "
+                             f"Se esperan: {', '.join(COLUMNAS)}")
+        repetidas = sorted({c for c in columnas if columnas.count(c) > 1})
+        if repetidas:
+            raise ValueError(f"Columnas repetidas en el encabezado: {', '.join(repetidas)}")
+
+    def _aplicar(self, accion, pendientes, informe):
+        """Envía un lote (lista de (entrada del informe, datos)) al servicio"""
+        datos = [d for _, d in pendientes]
+        if accion == 'crear':
+            resultado = self.producto_service.crear_lote(datos)
+        elif accion == 'actualizar':
+            resultado = self.producto_service.actualizar_lote(datos)
+        else:
+            resultado = self.producto_service.eliminar_lote([d['id'] for d in datos])
+
+        for i, (entrada, _) in enumerate(pendientes):
+            if resultado is None:
+                entrada.update(estado='error', mensaje='Error de base de datos: el lote no se aplicó')
+            elif accion == 'crear':
+                entrada.update(estado='ok', id=resultado[i], mensaje='Creado')
+            elif resultado[i]:
+                entrada.update(estado='ok', mensaje='Actualizado' if accion == 'actualizar' else 'Eliminado')
+            else:
+                entrada.update(estado='error', mensaje='No existe un producto con ese id')
+            informe.append(entrada)
+        pendientes.clear()
+
+    def procesar(self, archivo):
+        """
+        Procesa un CSV (archivo binario o de texto).
+
+        Returns:
+            dict: 'filas' (informe por fila: fila, accion, id, estado, mensaje),
+                  'resumen' (conteo por estado) y 'error' (motivo si el
+                  archivo no se pudo leer completo, si no None)
+        """
+        if not isinstance(archivo, io.TextIOBase):
+            archivo = io.TextIOWrapper(archivo, encoding='utf-8-sig', newline='')
+
+        informe = []
+        pendientes = []
+        accion_pendiente = None
+        error = None
+        # Fila que se está leyendo; la 1 es el encabezado
+        leyendo = 1
+        try:
+            lector = csv.DictReader(archivo)
+            if lector.fieldnames is not None:
+                self.validar_encabezado(lector.fieldnames)
+            leyendo = 2
+            for numero, fila in enumerate(lector, start=2):
+                leyendo = numero + 1
+                entrada = {'fila': numero, 'accion': None, 'id': None}
+                try:
+                    accion, datos = self.validar_fila(fila)
+                except ValueError as e:
+                    entrada.update(estado='error', mensaje=str(e))
+                    informe.append(entrada)
+                    continue
+                entrada.update(accion=accion, id=datos.get('id'))
+
+                # Los lotes siguen el orden del archivo: un cambio de acción cierra el lote
+                if pendientes and (accion != accion_pendiente or len(pendientes) >= self.tamano_lote):
+                    self._aplicar(accion_pendiente, pendientes, informe)
+                accion_pendiente = accion
+                pendientes.append((entrada, datos))
+        # UnicodeDecodeError es un ValueError: va antes que el del encabezado
+        except UnicodeDecodeError:
+            error = "El archivo no está codificado en UTF-8"
+        except csv.Error as e:
+            error = f"El archivo no es un CSV válido: {e}"
+        except ValueError as e:
+            error = str(e)
+        if pendientes:
+            self._aplicar(accion_pendiente, pendientes, informe)
+
+        if error:
+            # Error del archivo: se informa en la fila donde se dejó de leer
+            informe.append({'fila': leyendo, 'accion': None, 'id': None,
+                            'estado': 'error', 'mensaje': f"Archivo: {error}"})
+        informe.sort(key=lambda entrada: entrada['fila'])
+        resumen = {'ok': 0, 'error': 0}
+        for entrada in informe:
+            resumen[entrada['estado']] += 1
+        return {'filas': informe, 'resumen': resumen, 'error': error}
@@ -0,0 +1,204 @@
+# services/migracion_service.py
+"""
+Migración masiva de tablas entre dos bases MySQL, por trozos y reanudable
+
+Cada tabla se copia en trozos de tamaño fijo ordenados por la clave
+primaria (paginación keyset: WHERE clave > último ORDER BY clave LIMIT n),
+así ninguna consulta trae la tabla entera. Cada trozo se escribe con un
+INSERT de varias filas en una transacción. Tras confirmarlo, se guarda el
+último id copiado en un archivo de checkpoint (JSON); si la migración se
+corta, la próxima ejecución sigue desde ahí. Una tabla ya terminada
+también sigue desde su último id: volver a ejecutar copia solo las filas
+nuevas del origen.
+
+Los INSERT usan ON DUPLICATE KEY UPDATE sin cambios: una fila que ya
+existe en el destino (por id o por otra clave única, como el mail de un
+usuario) se omite. Así, repetir el último trozo tras un corte no duplica
+nada.
+
+Las tablas independientes entre sí se copian en paralelo, una por hilo y
+cada una con sus propias conexiones.
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def formato_duracion(segundos):
+    """12.5 -> '12s', 125 -> '2m 05s', 3725 -> '1h 02m'"""
+    segundos = int(segundos)
+    if segundos < 60:
+        return f"{segundos}s"
+    if segundos < 3600:
+        return f"{segundos // 60}m {segundos % 60:02d}s"
+    return f"{segundos // 3600}h {segundos % 3600 // 60:02d}m"
+
+
+class Checkpoint:
+    """Avance por tabla guardado en un archivo JSON (escritura atómica)"""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._lock = threading.Lock()
+        self._datos = {}
+        if os.path.exists(ruta):
+            with open(ruta, 'r', encoding='utf-8') as f:
+                self._datos = json.load(f)
+
+    def avance(self, tabla):
+        with self._lock:
+            return dict(self._datos.get(tabla) or
+                        {'ultimo': None, 'copiadas': 0, 'insertadas': 0, 'terminada': False})
+
+    def guardar(self, tabla, avance):
+        with self._lock:
+            self._datos[tabla] = dict(avance)
+            temporal = f"{self.ruta}.tmp"
+            with open(temporal, 'w', encoding='utf-8') as f:
+                json.dump(self._datos, f, indent=2)
+            # os.replace es atómico: un corte deja el archivo anterior o el nuevo
+            os.replace(temporal, self.ruta)
+
+    def borrar(self):
+        with self._lock:
+            self._datos = {}
+            if os.path.exists(self.ruta):
+                os.remove(self.ruta)
+
+
+class MigradorTablas:
+    """
+    Copia tablas de un origen a un destino por trozos.
+
+    Args:
+        abrir_origen, abrir_destino: funciones sin argumentos que devuelven
+            una conexión nueva con cursores de diccionario (una por hilo)
+        checkpoint (Checkpoint): dónde se guarda el avance
+        tamano_trozo (int): filas por SELECT y por INSERT
+        hilos (int): tablas que se copian a la vez
+    """
+
+    TAMANO_TROZO = 1000
+    HILOS = 4
+
+    def __init__(self, abrir_origen, abrir_destino, checkpoint, tamano_trozo=None, hilos=None):
+        self.abrir_origen = abrir_origen
+        self.abrir_destino = abrir_destino
+        self.checkpoint = checkpoint
+        self.tamano_trozo = tamano_trozo or self.TAMANO_TROZO
+        self.hilos = hilos or self.HILOS
+
+    @staticmethod
+    def _pendientes(cursor, tabla, clave, ultimo):
+        if ultimo is None:
+            cursor.execute(f"SELECT COUNT(*) AS total FROM {tabla}")
+        else:
+            cursor.execute(f"SELECT COUNT(*) AS total FROM {tabla} WHERE {clave} > %s", (ultimo,))
+        return cursor.fetchone()['total']
+
+    def _leer_trozo(self, cursor, tabla, clave, columnas, ultimo):
+        where = f"WHERE {clave} > %s" if ultimo is not None else ""
+        parametros = [ultimo] if ultimo is not None else []
+        cursor.execute(f"SELECT {', '.join(columnas)} FROM {tabla} {where} ORDER BY {clave} LIMIT %s",
+                       parametros + [self.tamano_trozo])
+        return cursor.fetchall()
+
+    @staticmethod
+    def _escribir_trozo(cursor, tabla, clave, columnas, filas):
+        """INSERT de varias filas; devuelve cuántas se insertaron (las existentes se omiten)"""
+        marcadores = '(' + ', '.join(['%s'] * len(columnas)) + ')'
+        parametros = [fila.get(c) for fila in filas for c in columnas]
+        cursor.execute(f"""
+            INSERT INTO {tabla} ({', '.join(columnas)})
+            VALUES {', '.join([marcadores] * len(filas))}
+            ON DUPLICATE KEY UPDATE {clave} = {clave}
+        """, parametros)
+        # Con ON DUPLICATE KEY sin cambios, rowcount cuenta 1 por fila insertada y 0 por omitida
+        return cursor.rowcount
+
+    def migrar_tabla(self, tabla, clave, columnas):
+        """
+        Copia una tabla desde su checkpoint, aunque ya esté terminada
+        (así se copian las filas agregadas después). Returns: el avance final
+        """
+        avance = self.checkpoint.avance(tabla)
+
+        origen = self.abrir_origen()
+        destino = self.abrir_destino()
+        try:
+            with origen.cursor() as lectura, destino.cursor() as escritura:
+                total = self._pendientes(lectura, tabla, clave, avance['ultimo'])
+                origen.commit()
+                if avance['terminada'] and not total:
+                    print(f"  ⏩ {tabla}: ya migrada ({avance['copiadas']} filas), sin filas nuevas")
+                    return avance
+                if avance['terminada']:
+                    print(f"  📌 {tabla}: {total} filas nuevas por copiar (ya migrada hasta {clave}={avance['ultimo']})")
+                else:
+                    reanudada = f" (reanudando después de {clave}={avance['ultimo']})" if avance['ultimo'] is not None else ""
+                    print(f"  📌 {tabla}: {total} filas por copiar{reanudada}")
+
+                inicio = time.perf_counter()
+                copiadas = 0
+                while True:
+                    filas = self._leer_trozo(lectura, tabla, clave, columnas, avance['ultimo'])
+                    # Cerrar la transacción de lectura: no retener la instantánea entre trozos
+                    origen.commit()
+                    if not filas:
+                        break
+                    try:
+                        insertadas = self._escribir_trozo(escritura, tabla, clave, columnas, filas)
+                        destino.commit()
+                    except Exception:
+                        destino.rollback()
+                        raise
+                    avance['ultimo'] = filas[-1][clave]
+                    avance['copiadas'] += len(filas)
+                    avance['insertadas'] += insertadas
+                    self.checkpoint.guardar(tabla, avance)
+
+                    copiadas += len(filas)
+                    duracion = time.perf_counter() - inicio
+                    filas_s = copiadas / duracion if duracion else 0.0
+                    restantes = max(0, total - copiadas)
+                    eta = formato_duracion(restantes / filas_s) if filas_s else '?'
+                    print(f"  📦 {tabla}: {copiadas}/{total} filas | {filas_s:,.0f} filas/s | ETA {eta}")
+                    if len(filas) < self.tamano_trozo:
+                        break
+        finally:
+            origen.close()
+            destino.close()
+
+        avance['terminada'] = True
+        self.checkpoint.guardar(tabla, avance)
+        print(f"  ✅ {tabla}: {avance['insertadas']} insertadas, "
+              f"{avance['copiadas'] - avance['insertadas']} ya existían")
+        return avance
+
+    def ejecutar(self, tablas):
+        """
+        Migra en paralelo tablas independientes.
+
+        Args:
+            tablas (dict): nombre -> {'clave': columna PK, 'columnas': tupla}
+
+        Returns:
+            dict: nombre -> avance final, o la excepción si la tabla falló
+                  (su checkpoint queda en el último trozo confirmado)
+        """
+        resultados = {}
+        with ThreadPoolExecutor(max_workers=min(self.hilos, len(tablas)) or 1) as ejecutor:
+            futuros = {
+                nombre: ejecutor.submit(self.migrar_tabla, nombre, spec['clave'], spec['columnas'])
+                for nombre, spec in tablas.items()
+            }
+            for nombre, futuro in futuros.items():
+                try:
+                    resultados[nombre] = futuro.result()
+                except Exception as e:
+                    print(f"  ❌ {nombre}: {e}")
+                    resultados[nombre] = e
+        return resultados
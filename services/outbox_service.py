@@ -0,0 +1,280 @@
+# services/outbox_service.py
+"""
+Despachador de la outbox de SQLite hacia MySQL
+
+Las escrituras que deben replicarse en MySQL (por ahora, los usuarios
+creados en /registro) se guardan en la tabla outbox en la misma
+transacción que la fila original (ver DatabaseManager.insertar_usuario).
+Un hilo de fondo reclama los mensajes por lotes y los aplica en MySQL de
+forma idempotente, así reenviar un mensaje no duplica nada. Si MySQL no
+responde, el lote se reintenta con espera exponencial; la petición HTTP
+nunca espera a MySQL. Si MySQL rechaza un lote por sus datos, se aplica
+mensaje por mensaje: el que falla se reintenta solo y, tras MAX_INTENTOS,
+pasa a 'fallido' (DatabaseManager.reactivar_outbox lo vuelve a poner en
+cola). Un usuario cuyo id o mail pertenece a otra cuenta de MySQL no se
+copia: pasa a 'fallido' sin tocar esa cuenta.
+"""
+
+import os
+import threading
+
+import pymysql
+
+from database.conexion import CircuitoAbierto, MySQLConnection, PoolAgotado, espera_exponencial
+
+# Errores del servidor que no dependen de los datos: demasiadas
+# conexiones, espera de bloqueo vencida y deadlock
+_ERRORES_TRANSITORIOS = (1040, 1205, 1213)
+
+
+def _es_error_de_conexion(error):
+    """
+    MySQL caído, inalcanzable u ocupado: se reintenta el lote tal cual,
+    sin culpar a los datos. Los errores del cliente (2000+, p. ej. 2003,
+    2006, 2013) son de conexión; el resto de los códigos del servidor
+    (1062 duplicado, 1406 dato muy largo, 1366 valor inválido...) son de
+    los datos.
+    """
+    if isinstance(error, (ConnectionError, CircuitoAbierto, PoolAgotado)):
+        return True
+    if isinstance(error, pymysql.err.OperationalError):
+        codigo = error.args[0] if error.args else None
+        return not isinstance(codigo, int) or codigo >= 2000 or codigo in _ERRORES_TRANSITORIOS
+    return False
+
+
+def clasificar_usuarios(usuarios, existentes):
+    """
+    Separa los usuarios a copiar según las cuentas de MySQL que comparten
+    su id o su mail ('existentes': filas con id_usuario y mail).
+
+    Returns:
+        tuple: (nuevos, propios: misma cuenta con id y mail iguales,
+                rechazos: posición -> motivo, si el id o el mail es de otra cuenta)
+    """
+    # La intercalación de MySQL no distingue mayúsculas en el mail
+    mail_por_id = {f['id_usuario']: f['mail'].lower() for f in existentes}
+    id_por_mail = {f['mail'].lower(): f['id_usuario'] for f in existentes}
+    nuevos, propios, rechazos = [], [], {}
+    for i, u in enumerate(usuarios):
+        mail = u['email'].lower()
+        if mail_por_id.get(u['id']) == mail:
+            propios.append(u)
+        elif u['id'] in mail_por_id:
+            rechazos[i] = f"El id {u['id']} ya es de {mail_por_id[u['id']]} en MySQL"
+        elif mail in id_por_mail:
+            rechazos[i] = f"El mail {u['email']} ya es del usuario {id_por_mail[mail]} en MySQL"
+        else:
+            nuevos.append(u)
+            # Dos mensajes del mismo lote tampoco pueden pisarse
+            mail_por_id[u['id']] = mail
+            id_por_mail[mail] = u['id']
+    return nuevos, propios, rechazos
+
+
+class DespachadorOutbox:
+    """Vacía la outbox en MySQL desde un hilo de fondo (uno por proceso)"""
+
+    TAMANO_LOTE = 100
+    # Segundos entre revisiones cuando no hay avisos
+    INTERVALO = float(os.environ.get('TIENDA_OUTBOX_INTERVALO', 5))
+    # Reintentos: 1s, 2s, 4s... hasta 5 minutos
+    ESPERA_BASE = 1.0
+    ESPERA_MAXIMA = 300.0
+    # Rechazos de MySQL por mensaje antes de pasarlo a 'fallido'
+    MAX_INTENTOS = 8
+
+    def __init__(self, db, tamano_lote=None, intervalo=None):
+        self.db = db
+        self.tamano_lote = tamano_lote or self.TAMANO_LOTE
+        self.intervalo = self.INTERVALO if intervalo is None else intervalo
+        # tipo de mensaje -> función que aplica una lista de cargas en MySQL
+        self.manejadores = {'usuario': self._aplicar_usuarios}
+        self._aviso = threading.Event()
+        self._detenido = threading.Event()
+        self._lock = threading.Lock()
+        self._hilo = None
+        self._pid = None
+        self._contadores = {'enviados': 0, 'fallidos': 0, 'lotes': 0}
+        self._ultimo_error = None
+
+    # ----- CICLO DE FONDO -----
+
+    def iniciar(self):
+        """Arranca el hilo si no está corriendo en este proceso (p. ej. tras un fork)"""
+        with self._lock:
+            if self._hilo is not None and self._hilo.is_alive() and self._pid == os.getpid():
+                return
+            self._detenido.clear()
+            self._pid = os.getpid()
+            self._hilo = threading.Thread(target=self._ciclo, name='outbox-mysql', daemon=True)
+            self._hilo.start()
+
+    def avisar(self):
+        """Pide un despacho inmediato (se llama tras encolar un mensaje)"""
+        self.iniciar()
+        self._aviso.set()
+
+    def detener(self, timeout=5.0):
+        self._detenido.set()
+        self._aviso.set()
+        if self._hilo is not None:
+            self._hilo.join(timeout)
+
+    def _ciclo(self):
+        while not self._detenido.is_set():
+            try:
+                self.despachar()
+            except Exception as e:
+                # El hilo no debe morir: se reintenta en la próxima vuelta
+                self._ultimo_error = str(e)
+                print(f"⚠️ Error en el despachador de la outbox: {e}")
+            self._aviso.wait(self.intervalo)
+            self._aviso.clear()
+
+    # ----- DESPACHO -----
+
+    def despachar(self):
+        """
+        Envía los mensajes disponibles, lote por lote, hasta vaciar la
+        outbox o hasta que MySQL deje de responder.
+
+        Returns:
+            int: mensajes aplicados en MySQL
+        """
+        enviados = 0
+        while True:
+            mensajes = self.db.reclamar_outbox(self.tamano_lote)
+            if not mensajes:
+                return enviados
+            por_tipo = {}
+            for mensaje in mensajes:
+                por_tipo.setdefault(mensaje.tipo, []).append(mensaje)
+
+            caido = None
+            for tipo, grupo in por_tipo.items():
+                if caido:
+                    # Sin MySQL no tiene sentido probar el resto ahora
+                    self._reintentar(tipo, grupo, caido)
+                    continue
+                try:
+                    enviados += self._enviar(tipo, grupo)
+                except Exception as e:
+                    if _es_error_de_conexion(e):
+                        caido = e
+                        self._reintentar(tipo, grupo, e)
+                    elif len(grupo) == 1:
+                        self._reintentar(tipo, grupo, e, self.MAX_INTENTOS)
+                    else:
+                        # Un mensaje con datos que MySQL rechaza no frena a los demás
+                        print(f"⚠️ Outbox: falló un lote de {len(grupo)} mensajes '{tipo}', se envían de a uno ({e})")
+                        for posicion, mensaje in enumerate(grupo):
+                            try:
+                                enviados += self._enviar_uno(tipo, mensaje)
+                            except Exception as e_uno:
+                                caido = e_uno
+                                self._reintentar(tipo, grupo[posicion:], e_uno)
+                                break
+            if caido:
+                return enviados
+
+    def _enviar(self, tipo, grupo):
+        """Aplica un grupo de mensajes del mismo tipo. Returns: cuántos se aplicaron"""
+        manejador = self.manejadores.get(tipo)
+        if manejador is None:
+            raise ValueError(f"Tipo de mensaje desconocido: {tipo}")
+        rechazos = manejador([m.carga for m in grupo]) or {}
+        aplicados = [m.id for i, m in enumerate(grupo) if i not in rechazos]
+        for i, motivo in rechazos.items():
+            # Conflicto con otra cuenta: reintentar no lo arregla
+            self.db.fallar_outbox([grupo[i].id], motivo)
+            self._contadores['fallidos'] += 1
+            self._ultimo_error = motivo
+            print(f"❌ Outbox: mensaje {grupo[i].id} '{tipo}' descartado: {motivo}")
+        # Si esto fallara, el lote se reenvía al vencer la reserva
+        # y aplicarlo de nuevo lo deja igual
+        self.db.confirmar_outbox(aplicados)
+        self._contadores['enviados'] += len(aplicados)
+        self._contadores['lotes'] += 1
+        return len(aplicados)
+
+    def _enviar_uno(self, tipo, mensaje):
+        """
+        Un mensaje suelto, tras fallar su lote. Si MySQL lo rechaza se
+        reintenta más tarde y, tras MAX_INTENTOS, queda 'fallido'. Un
+        error de conexión se propaga para cortar el despacho.
+        """
+        try:
+            return self._enviar(tipo, [mensaje])
+        except Exception as e:
+            if _es_error_de_conexion(e):
+                raise
+            self._reintentar(tipo, [mensaje], e, self.MAX_INTENTOS)
+            return 0
+
+    def _reintentar(self, tipo, grupo, error, max_intentos=None):
+        if not grupo:
+            return
+        self._ultimo_error = str(error)
+        self._contadores['fallidos'] += len(grupo)
+        intentos = min(m.intentos for m in grupo)
+        espera = espera_exponencial(intentos, self.ESPERA_BASE, self.ESPERA_MAXIMA)
+        self.db.reintentar_outbox([m.id for m in grupo], error, espera, max_intentos)
+        if max_intentos is not None and intentos + 1 >= max_intentos:
+            print(f"❌ Outbox: {len(grupo)} mensajes '{tipo}' pasan a fallidos tras {max_intentos} intentos ({error})")
+        else:
+            print(f"⚠️ Outbox: {len(grupo)} mensajes '{tipo}' se reintentarán en {espera:.0f}s ({error})")
+
+    @staticmethod
+    def _aplicar_usuarios(usuarios):
+        """
+        Copia varios usuarios a MySQL en una transacción. Solo se actualiza
+        una cuenta cuyo id_usuario y mail coinciden con los del usuario; si
+        solo coincide uno de los dos, la cuenta es de otra persona y el
+        usuario se rechaza (como los conflictos de migrar_usuarios.py).
+
+        Returns:
+            dict: posición en 'usuarios' -> motivo, de los rechazados
+        """
+        db = MySQLConnection()
+        conn = db.conectar()
+        if not conn:
+            raise ConnectionError("No se pudo conectar a MySQL")
+        try:
+            with conn.cursor() as cursor:
+                marcadores = ', '.join(['%s'] * len(usuarios))
+                # FOR UPDATE: nadie crea ni cambia estas cuentas hasta el commit
+                cursor.execute(f"""
+                    SELECT id_usuario, mail FROM usuarios
+                    WHERE id_usuario IN ({marcadores}) OR mail IN ({marcadores})
+                    FOR UPDATE
+                """, [u['id'] for u in usuarios] + [u['email'] for u in usuarios])
+                nuevos, propios, rechazos = clasificar_usuarios(usuarios, cursor.fetchall())
+                if nuevos:
+                    cursor.execute(f"""
+                        INSERT INTO usuarios
+                        (id_usuario, nombre, mail, password, fecha_nacimiento, proveedor, rol)
+                        VALUES {', '.join(['(%s, %s, %s, %s, %s, %s, %s)'] * len(nuevos))}
+                    """, [v for u in nuevos for v in (u['id'], u['nombre'], u['email'], u['password'],
+                                                        u['fecha_nacimiento'], u['proveedor'], u['rol'])])
+                if propios:
+                    cursor.executemany("""
+                        UPDATE usuarios SET nombre = %s, password = %s, fecha_nacimiento = %s,
+                            proveedor = %s, rol = %s
+                        WHERE id_usuario = %s AND mail = %s
+                    """, [(u['nombre'], u['password'], u['fecha_nacimiento'], u['proveedor'],
+                           u['rol'], u['id'], u['email']) for u in propios])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        print(f"✅ {len(usuarios) - len(rechazos)} usuarios replicados en MySQL")
+        return rechazos
+
+    def estadisticas(self):
+        """Contadores del proceso y estado de la outbox, para monitoreo"""
+        return dict(self._contadores, **self.db.estado_outbox(),
+                    activo=self._hilo is not None and self._hilo.is_alive(),
+                    ultimo_error=self._ultimo_error)
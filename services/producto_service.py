@@ -1,8 +1,95 @@
 # services/producto_service.py
-from database.conexion import MySQLConnection
+import re
+import threading
+import pymysql
+from database.conexion import MySQLConnection, ResultadoStreaming
+from database import paginacion
+from database import registros
+from database.instrumentacion import CursorMySQLStreaming
+from database.asincrono import AdaptadorAsincrono
 
 class ProductoService:
-    """Servicio para gestionar productos (CRUD)"""
+    """
+    Servicio para gestionar productos (CRUD)
+    
+    Con una caché (services/cache.py) las lecturas por id, categoría y
+    bajo stock se sirven desde memoria; crear, actualizar y eliminar
+    invalidan solo las claves del producto y de sus categorías.
+    
+    Los métodos *_lote escriben muchos productos con una sola conexión y
+    una sola transacción: o se aplica el lote completo o nada.
+    """
+    
+    # Filas por sentencia en los métodos *_lote (acota el tamaño del paquete)
+    TAMANO_LOTE = 500
+    
+    def __init__(self, cache=None):
+        self.cache = cache
+    
+    def _leer(self, clave, consulta, *args):
+        """Lectura a través de la caché (si hay); 'consulta' lanza en caso de error"""
+        if self.cache is None:
+            return consulta(*args)
+        return self.cache.obtener_o_cargar(clave, lambda: consulta(*args))
+    
+    # Lecturas que pasan por la caché: tipo de clave -> (consulta, una sola fila)
+    CONSULTAS_CACHEADAS = {
+        'id': ("SELECT * FROM productos WHERE id = %s", True),
+        'categoria': ("SELECT * FROM productos WHERE categoria = %s ORDER BY id", False),
+        'bajo_stock': ("SELECT * FROM productos WHERE cantidad <= %s ORDER BY cantidad", False),
+    }
+    
+    def leer(self, tipo, argumento):
+        """
+        Filas (dict) de una lectura de CONSULTAS_CACHEADAS con la clave
+        (tipo, argumento). A diferencia de obtener_por_id y compañía, lanza
+        si falla. RepositorioProductosMySQL lee por aquí para compartir la
+        caché: las mismas filas bajo las mismas claves que invalida el servicio.
+        """
+        sql, uno = self.CONSULTAS_CACHEADAS[tipo]
+        return self._leer((tipo, argumento), self._consultar, sql, (argumento,), uno)
+    
+    def _consultar(self, sql, params, uno=False):
+        """Ejecuta una lectura; a diferencia de los métodos públicos, lanza si falla"""
+        db = MySQLConnection()
+        conn = db.conectar()
+        if not conn:
+            raise pymysql.err.OperationalError("No se pudo conectar a MySQL")
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(sql, params)
+                return cursor.fetchone() if uno else cursor.fetchall()
+        finally:
+            conn.close()
+    
+    def invalidar_producto(self, id, categorias=(), cantidades=()):
+        """
+        Invalida las claves que pueden cambiar al escribir el producto 'id':
+        su propia clave, la de cada categoría (antes y después) y las listas
+        de bajo stock cuyo límite alcanza alguna de las cantidades.
+        También la usa RepositorioProductosMySQL (rutas /mysql), que escribe sin pasar por el servicio.
+        """
+        self.invalidar_productos([id], categorias, cantidades)
+    
+    def invalidar_productos(self, ids, categorias=(), cantidades=()):
+        """Como invalidar_producto, para varios productos en una sola invalidación"""
+        if self.cache is None:
+            return
+        claves = [('id', id) for id in set(ids)]
+        claves += [('categoria', c) for c in set(categorias) if c is not None]
+        cantidades = [c for c in cantidades if c is not None]
+        if cantidades:
+            # Una lista de bajo stock cambia si alguna cantidad alcanza su límite
+            minima = min(cantidades)
+            claves += [clave for clave in self.cache.claves_de('bajo_stock') if minima <= clave[1]]
+        self.cache.invalidar(*claves)
+    
+    def _valores_previos(self, cursor, id):
+        """Categoría y cantidad antes de escribir (bloqueando la fila), solo si hay caché"""
+        if self.cache is None:
+            return None
+        cursor.execute("SELECT categoria, cantidad FROM productos WHERE id = %s FOR UPDATE", (id,))
+        return cursor.fetchone()
     
     def obtener_todos(self):
         """Obtener todos los productos desde MySQL"""
@@ -13,10 +100,12 @@ class ProductoService:
                 print("❌ No se pudo conectar a MySQL")
                 return []
             
-            with conn.cursor() as cursor:
-                cursor.execute("SELECT * FROM productos ORDER BY id")
-                productos = cursor.fetchall()
-            conn.close()
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT * FROM productos ORDER BY id")
+                    productos = cursor.fetchall()
+            finally:
+                conn.close()
             
             print(f"✅ Productos obtenidos: {len(productos)}")
             return productos
@@ -24,19 +113,95 @@ class ProductoService:
             print(f"❌ Error obteniendo productos: {e}")
             return []
     
-    def obtener_por_id(self, id):
-        """Obtener producto por ID"""
+    # Filas que se piden al socket por vez en iterar_todos
+    TAMANO_TROZO = 1000
+    
+    def iterar_todos(self, columnas=None, tamano_trozo=None, convertir=None):
+        """
+        Recorre todos los productos sin cargarlos en memoria: usa un cursor
+        sin buffer (SSDictCursor) y lee del servidor de a 'tamano_trozo'
+        filas, así la memoria no crece con el tamaño de la tabla.
+        
+        La consulta se ejecuta al llamar (los errores de conexión se lanzan
+        aquí, antes de empezar a responder) y devuelve un iterador de filas
+        (ResultadoStreaming) que tiene la conexión prestada hasta agotarse
+        o cerrarse. 'convertir' se aplica a cada fila (ver ResultadoStreaming).
+        """
+        seleccion = registros.columnas_sql(columnas, registros.COLUMNAS_PRODUCTO) if columnas else '*'
+        db = MySQLConnection()
+        conn = db.conectar()
+        if not conn:
+            raise pymysql.err.OperationalError("No se pudo conectar a MySQL")
+        try:
+            cursor = conn.cursor(CursorMySQLStreaming)
+            cursor.execute(f"SELECT {seleccion} FROM productos ORDER BY id")
+        except Exception:
+            conn.descartar()
+            raise
+        return ResultadoStreaming(conn, cursor, tamano_trozo or self.TAMANO_TROZO, convertir)
+    
+    def obtener_pagina(self, after=None, limite=None, orden='id', categoria=None, stock_maximo=None):
+        """
+        Obtener una página de productos con paginación por clave (keyset).
+        Devuelve (productos, cursor de la siguiente página o None).
+        """
+        limite = paginacion.normalizar_limite(limite or paginacion.LIMITE_POR_DEFECTO)
+        orden = paginacion.normalizar_orden(orden)
+        condicion, valores = paginacion.condicion_keyset(
+            orden, paginacion.decodificar_cursor(after, orden), marcador='%s'
+        )
+        
+        condiciones = [condicion] if condicion else []
+        if categoria:
+            condiciones.append("categoria = %s")
+            valores.append(categoria)
+        if stock_maximo is not None:
+            condiciones.append("cantidad <= %s")
+            valores.append(stock_maximo)
+        where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+        orden_sql = 'id' if orden == 'id' else f'{orden}, id'
+        
         try:
             db = MySQLConnection()
             conn = db.conectar()
             if not conn:
-                return None
+                return [], None
             
-            with conn.cursor() as cursor:
-                cursor.execute("SELECT * FROM productos WHERE id = %s", (id,))
-                producto = cursor.fetchone()
-            conn.close()
-            return producto
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute(f"SELECT * FROM productos {where} ORDER BY {orden_sql} LIMIT %s",
+                                   valores + [limite + 1])
+                    productos = cursor.fetchall()
+            finally:
+                conn.close()
+            return paginacion.siguiente_pagina(productos, limite, orden)
+        except Exception as e:
+            print(f"❌ Error obteniendo página de productos: {e}")
+            return [], None
+    
+    def contar(self):
+        """Contar productos sin traer las filas"""
+        try:
+            db = MySQLConnection()
+            conn = db.conectar()
+            if not conn:
+                return 0
+            
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT COUNT(*) AS total FROM productos")
+                    total = cursor.fetchone()
+            finally:
+                conn.close()
+            return total['total'] if total else 0
+        except Exception as e:
+            print(f"❌ Error contando productos: {e}")
+            return 0
+    
+    def obtener_por_id(self, id):
+        """Obtener producto por ID"""
+        try:
+            return self.leer('id', id)
         except Exception as e:
             print(f"❌ Error obteniendo producto {id}: {e}")
             return None
@@ -49,21 +214,24 @@ class ProductoService:
             if not conn:
                 return None
             
-            with conn.cursor() as cursor:
-                sql = """
-                    INSERT INTO productos (nombre, precio, cantidad, categoria, descripcion)
-                    VALUES (%s, %s, %s, %s, %s)
-                """
-                cursor.execute(sql, (
-                    datos['nombre'],
-                    datos['precio'],
-                    datos['cantidad'],
-                    datos['categoria'],
-                    datos.get('descripcion', '')
-                ))
-                conn.commit()
-                nuevo_id = cursor.lastrowid
-            conn.close()
+            try:
+                with conn.cursor() as cursor:
+                    sql = """
+                        INSERT INTO productos (nombre, precio, cantidad, categoria, descripcion)
+                        VALUES (%s, %s, %s, %s, %s)
+                    """
+                    cursor.execute(sql, (
+                        datos['nombre'],
+                        datos['precio'],
+                        datos['cantidad'],
+                        datos['categoria'],
+                        datos.get('descripcion', '')
+                    ))
+                    conn.commit()
+                    nuevo_id = cursor.lastrowid
+            finally:
+                conn.close()
+            self.invalidar_producto(nuevo_id, [datos['categoria']], [datos['cantidad']])
             return nuevo_id
         except Exception as e:
             print(f"❌ Error creando producto: {e}")
@@ -77,23 +245,29 @@ class ProductoService:
             if not conn:
                 return False
             
-            with conn.cursor() as cursor:
-                sql = """
-                    UPDATE productos 
-                    SET nombre=%s, precio=%s, cantidad=%s, categoria=%s, descripcion=%s
-                    WHERE id=%s
-                """
-                cursor.execute(sql, (
-                    datos['nombre'],
-                    datos['precio'],
-                    datos['cantidad'],
-                    datos['categoria'],
-                    datos.get('descripcion', ''),
-                    id
-                ))
-                conn.commit()
-                actualizados = cursor.rowcount
-            conn.close()
+            try:
+                with conn.cursor() as cursor:
+                    previo = self._valores_previos(cursor, id)
+                    sql = """
+                        UPDATE productos 
+                        SET nombre=%s, precio=%s, cantidad=%s, categoria=%s, descripcion=%s
+                        WHERE id=%s
+                    """
+                    cursor.execute(sql, (
+                        datos['nombre'],
+                        datos['precio'],
+                        datos['cantidad'],
+                        datos['categoria'],
+                        datos.get('descripcion', ''),
+                        id
+                    ))
+                    conn.commit()
+                    actualizados = cursor.rowcount
+            finally:
+                conn.close()
+            if previo:
+                self.invalidar_producto(id, [previo['categoria'], datos['categoria']],
+                                [previo['cantidad'], datos['cantidad']])
             return actualizados > 0
         except Exception as e:
             print(f"❌ Error actualizando producto {id}: {e}")
@@ -107,95 +281,370 @@ class ProductoService:
             if not conn:
                 return False
             
-            with conn.cursor() as cursor:
-                cursor.execute("DELETE FROM productos WHERE id = %s", (id,))
-                conn.commit()
-                eliminados = cursor.rowcount
-            conn.close()
+            try:
+                with conn.cursor() as cursor:
+                    previo = self._valores_previos(cursor, id)
+                    cursor.execute("DELETE FROM productos WHERE id = %s", (id,))
+                    conn.commit()
+                    eliminados = cursor.rowcount
+            finally:
+                conn.close()
+            if previo:
+                self.invalidar_producto(id, [previo['categoria']], [previo['cantidad']])
             return eliminados > 0
         except Exception as e:
             print(f"❌ Error eliminando producto {id}: {e}")
             return False
     
-    def obtener_por_categoria(self, categoria):
-        """Obtener productos por categoría"""
+    @staticmethod
+    def _trozos(filas, tamano):
+        for inicio in range(0, len(filas), tamano):
+            yield filas[inicio:inicio + tamano]
+    
+    def _previos_lote(self, cursor, ids):
+        """
+        Categoría y cantidad de los ids que existen, bloqueando sus filas
+        hasta el commit. Returns: dict id -> fila
+        """
+        previos = {}
+        for trozo in self._trozos(sorted(set(ids)), self.TAMANO_LOTE):
+            marcadores = ', '.join(['%s'] * len(trozo))
+            cursor.execute(f"SELECT id, categoria, cantidad FROM productos WHERE id IN ({marcadores}) FOR UPDATE",
+                           trozo)
+            previos.update((fila['id'], fila) for fila in cursor.fetchall())
+        return previos
+    
+    @staticmethod
+    def _ids_consecutivos(cursor):
+        """
+        True si un INSERT de varias filas recibe ids consecutivos desde
+        lastrowid (el id de su primera fila). InnoDB reserva de una vez los
+        ids de un INSERT ... VALUES sin ids explícitos, con cualquier
+        innodb_autoinc_lock_mode, pero los separa según
+        auto_increment_increment: con réplicas multi-primario (Galera,
+        group replication) suele ser mayor que 1.
+        """
+        cursor.execute("SELECT @@SESSION.auto_increment_increment AS incremento")
+        return int(cursor.fetchone()['incremento']) == 1
+    
+    def crear_lote(self, productos):
+        """
+        Crear varios productos con INSERT de varias filas en una transacción.
+        Si el servidor no asigna ids consecutivos (ver _ids_consecutivos) se
+        inserta fila por fila, en la misma transacción, para leer cada id.
+        
+        Args:
+            productos (list): diccionarios con los mismos campos que crear()
+        
+        Returns:
+            list: ids nuevos en el orden recibido, o None si falló (no se crea ninguno)
+        """
+        productos = list(productos)
+        if not productos:
+            return []
         try:
             db = MySQLConnection()
             conn = db.conectar()
             if not conn:
-                return []
+                return None
             
-            with conn.cursor() as cursor:
-                cursor.execute("SELECT * FROM productos WHERE categoria = %s ORDER BY id", (categoria,))
-                productos = cursor.fetchall()
-            conn.close()
-            return productos
+            ids = []
+            try:
+                with conn.cursor() as cursor:
+                    conn.begin()
+                    por_lote = self._ids_consecutivos(cursor)
+                    for trozo in self._trozos(productos, self.TAMANO_LOTE if por_lote else 1):
+                        valores = ', '.join(['(%s, %s, %s, %s, %s)'] * len(trozo))
+                        parametros = []
+                        for datos in trozo:
+                            parametros += [datos['nombre'], datos['precio'], datos['cantidad'],
+                                           datos['categoria'], datos.get('descripcion', '')]
+                        cursor.execute(f"""
+                            INSERT INTO productos (nombre, precio, cantidad, categoria, descripcion)
+                            VALUES {valores}
+                        """, parametros)
+                        # En un INSERT de varias filas, lastrowid es el id de la primera
+                        ids += range(cursor.lastrowid, cursor.lastrowid + len(trozo))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
+            self.invalidar_productos(ids, [p['categoria'] for p in productos],
+                                     [p['cantidad'] for p in productos])
+            return ids
         except Exception as e:
-            print(f"❌ Error obteniendo productos por categoría: {e}")
-            return []
+            print(f"❌ Error creando lote de productos: {e}")
+            return None
     
-    def obtener_con_bajo_stock(self, limite=5):
-        """Obtener productos con stock bajo"""
+    def actualizar_lote(self, productos):
+        """
+        Actualizar varios productos en una transacción (executemany).
+        
+        Args:
+            productos (list): diccionarios con 'id' y los campos de actualizar()
+        
+        Returns:
+            list: por producto, True si existía y se actualizó; None si falló
+                  (no se actualiza ninguno)
+        """
+        productos = list(productos)
+        if not productos:
+            return []
         try:
             db = MySQLConnection()
             conn = db.conectar()
             if not conn:
-                return []
+                return None
             
-            with conn.cursor() as cursor:
-                cursor.execute("SELECT * FROM productos WHERE cantidad <= %s ORDER BY cantidad", (limite,))
-                productos = cursor.fetchall()
-            conn.close()
-            return productos
+            try:
+                with conn.cursor() as cursor:
+                    conn.begin()
+                    previos = self._previos_lote(cursor, [p['id'] for p in productos])
+                    existentes = [p for p in productos if p['id'] in previos]
+                    for trozo in self._trozos(existentes, self.TAMANO_LOTE):
+                        cursor.executemany("""
+                            UPDATE productos
+                            SET nombre=%s, precio=%s, cantidad=%s, categoria=%s, descripcion=%s
+                            WHERE id=%s
+                        """, [(p['nombre'], p['precio'], p['cantidad'], p['categoria'],
+                               p.get('descripcion', ''), p['id']) for p in trozo])
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
+            self.invalidar_productos(
+                previos,
+                [f['categoria'] for f in previos.values()] + [p['categoria'] for p in existentes],
+                [f['cantidad'] for f in previos.values()] + [p['cantidad'] for p in existentes]
+            )
+            return [p['id'] in previos for p in productos]
         except Exception as e:
-            print(f"❌ Error obteniendo productos con bajo stock: {e}")
-            return []
+            print(f"❌ Error actualizando lote de productos: {e}")
+            return None
     
-    def buscar(self, termino):
-        """Buscar productos por nombre"""
+    def eliminar_lote(self, ids):
+        """
+        Eliminar varios productos con DELETE ... WHERE id IN (...) en una transacción.
+        
+        Returns:
+            list: por id, True si existía y se eliminó; None si falló
+        """
+        ids = list(ids)
+        if not ids:
+            return []
         try:
             db = MySQLConnection()
             conn = db.conectar()
             if not conn:
-                return []
+                return None
             
-            with conn.cursor() as cursor:
-                cursor.execute("SELECT * FROM productos WHERE nombre LIKE %s ORDER BY id", (f'%{termino}%',))
-                productos = cursor.fetchall()
-            conn.close()
-            return productos
+            try:
+                with conn.cursor() as cursor:
+                    conn.begin()
+                    previos = self._previos_lote(cursor, ids)
+                    for trozo in self._trozos(sorted(previos), self.TAMANO_LOTE):
+                        marcadores = ', '.join(['%s'] * len(trozo))
+                        cursor.execute(f"DELETE FROM productos WHERE id IN ({marcadores})", trozo)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
+            self.invalidar_productos(previos, [f['categoria'] for f in previos.values()],
+                                     [f['cantidad'] for f in previos.values()])
+            return [id in previos for id in ids]
+        except Exception as e:
+            print(f"❌ Error eliminando lote de productos: {e}")
+            return None
+    
+    def obtener_por_categoria(self, categoria):
+        """Obtener productos por categoría"""
+        try:
+            return self.leer('categoria', categoria)
+        except Exception as e:
+            print(f"❌ Error obteniendo productos por categoría: {e}")
+            return []
+    
+    def obtener_con_bajo_stock(self, limite=5):
+        """Obtener productos con stock bajo"""
+        try:
+            return self.leer('bajo_stock', limite)
+        except Exception as e:
+            print(f"❌ Error obteniendo productos con bajo stock: {e}")
+            return []
+    
+    # Largo mínimo de palabra que indexa FULLTEXT en InnoDB (innodb_ft_min_token_size)
+    FULLTEXT_MIN_PALABRA = 3
+    
+    def buscar(self, termino, limite=100):
+        """
+        Buscar productos por nombre y descripción.
+        Usa el índice FULLTEXT (ver script_bd.txt) en modo booleano: cada
+        palabra es obligatoria y se busca por prefijo; los resultados salen
+        ordenados por relevancia. La collation utf8mb4 ignora las tildes.
+        Si el índice no existe o las palabras son muy cortas, usa LIKE.
+        """
+        try:
+            return self.leer_busqueda(termino, limite)
         except Exception as e:
             print(f"❌ Error buscando productos: {e}")
             return []
     
-    def obtener_estadisticas(self):
-        """Obtener estadísticas del inventario"""
+    def leer_busqueda(self, termino, limite=100):
+        """Como buscar, pero lanza si falla (lo usa RepositorioProductosMySQL)"""
+        palabras = re.findall(r'\w+', termino or '')
+        usar_fulltext = bool(palabras) and all(len(p) >= self.FULLTEXT_MIN_PALABRA for p in palabras)
+        consulta = ' '.join(f'+{p}*' for p in palabras)
+        db = MySQLConnection()
+        conn = db.conectar()
+        if not conn:
+            raise pymysql.err.OperationalError("No se pudo conectar a MySQL")
         try:
-            db = MySQLConnection()
-            conn = db.conectar()
-            if not conn:
-                return {'total': 0, 'valor_total': 0, 'productos_por_categoria': {}}
-            
             with conn.cursor() as cursor:
-                cursor.execute("SELECT COUNT(*) as total FROM productos")
-                total = cursor.fetchone()
-                
-                cursor.execute("SELECT SUM(precio * cantidad) as valor_total FROM productos")
-                valor = cursor.fetchone()
-                
-                cursor.execute("SELECT categoria, COUNT(*) as cantidad FROM productos GROUP BY categoria")
-                categorias = cursor.fetchall()
+                if usar_fulltext:
+                    try:
+                        cursor.execute("""
+                            SELECT * FROM productos
+                            WHERE MATCH(nombre, descripcion) AGAINST (%s IN BOOLEAN MODE)
+                            ORDER BY MATCH(nombre, descripcion) AGAINST (%s IN BOOLEAN MODE) DESC
+                            LIMIT %s
+                        """, (consulta, consulta, limite))
+                        return cursor.fetchall()
+                    except pymysql.MySQLError as e:
+                        # 1191: no existe el índice FULLTEXT todavía
+                        if e.args[0] != 1191:
+                            raise
+                cursor.execute("SELECT * FROM productos WHERE nombre LIKE %s ORDER BY id LIMIT %s",
+                               (f'%{termino}%', limite))
+                return cursor.fetchall()
+        finally:
             conn.close()
-            
-            productos_por_categoria = {}
-            for cat in categorias:
-                productos_por_categoria[cat['categoria']] = cat['cantidad']
-            
-            return {
-                'total': total['total'] if total else 0,
-                'valor_total': valor['valor_total'] if valor and valor['valor_total'] else 0,
-                'productos_por_categoria': productos_por_categoria
-            }
+    
+    # Agregado por categoría calculado sobre la tabla productos (lectura completa)
+    SQL_ESTADISTICAS_CALCULADAS = """
+        SELECT categoria, COUNT(*) AS total, COALESCE(SUM(precio * cantidad), 0) AS valor_total
+        FROM productos GROUP BY categoria
+    """
+    
+    def obtener_estadisticas(self):
+        """
+        Obtener estadísticas del inventario.
+        Lee la tabla productos_estadisticas que mantienen los triggers (una
+        fila por categoría); si aún no existe, calcula todo con un único
+        GROUP BY en vez de tres consultas.
+        """
+        try:
+            return self.leer_estadisticas()
         except Exception as e:
             print(f"❌ Error obteniendo estadísticas: {e}")
-            return {'total': 0, 'valor_total': 0, 'productos_por_categoria': {}}
\ No newline at end of file
+            return {'total': 0, 'valor_total': 0, 'productos_por_categoria': {}}
+    
+    def leer_estadisticas(self):
+        """Como obtener_estadisticas, pero lanza si falla (lo usa RepositorioProductosMySQL)"""
+        db = MySQLConnection()
+        conn = db.conectar()
+        if not conn:
+            raise pymysql.err.OperationalError("No se pudo conectar a MySQL")
+        try:
+            with conn.cursor() as cursor:
+                try:
+                    cursor.execute("""
+                        SELECT categoria, total, valor_total FROM productos_estadisticas
+                        WHERE total > 0 ORDER BY categoria
+                    """)
+                except pymysql.MySQLError as e:
+                    # 1146: la tabla no existe (base creada antes de script_bd.txt actual)
+                    if e.args[0] != 1146:
+                        raise
+                    cursor.execute(self.SQL_ESTADISTICAS_CALCULADAS)
+                categorias = cursor.fetchall()
+        finally:
+            conn.close()
+        
+        productos_por_categoria = {}
+        for cat in categorias:
+            productos_por_categoria[cat['categoria']] = cat['total']
+        
+        return {
+            'total': sum(productos_por_categoria.values()),
+            'valor_total': sum(cat['valor_total'] for cat in categorias),
+            'productos_por_categoria': productos_por_categoria
+        }
+    
+    def comparar_estadisticas(self):
+        """
+        Compara la tabla productos_estadisticas con el cálculo sobre productos.
+        
+        Returns:
+            list: categorías con diferencias como (categoria, guardado, calculado);
+                  None si no se pudo conectar
+        """
+        db = MySQLConnection()
+        conn = db.conectar()
+        if not conn:
+            return None
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT categoria, total, valor_total FROM productos_estadisticas WHERE total <> 0")
+                guardadas = {f['categoria']: (f['total'], f['valor_total']) for f in cursor.fetchall()}
+                cursor.execute(self.SQL_ESTADISTICAS_CALCULADAS)
+                calculadas = {f['categoria']: (f['total'], f['valor_total']) for f in cursor.fetchall()}
+        finally:
+            conn.close()
+        return [(cat, guardadas.get(cat), calculadas.get(cat))
+                for cat in sorted(set(guardadas) | set(calculadas))
+                if guardadas.get(cat) != calculadas.get(cat)]
+    
+    def reconstruir_estadisticas(self):
+        """
+        Recalcula productos_estadisticas desde cero en una transacción.
+        Los lectores ven la versión anterior hasta el commit.
+        
+        Returns:
+            int: categorías guardadas, o None si no se pudo conectar
+        """
+        db = MySQLConnection()
+        conn = db.conectar()
+        if not conn:
+            return None
+        try:
+            with conn.cursor() as cursor:
+                conn.begin()
+                cursor.execute("DELETE FROM productos_estadisticas")
+                # INSERT ... SELECT bloquea en modo compartido las filas leídas,
+                # así ninguna escritura concurrente queda fuera del recálculo
+                cursor.execute(f"""
+                    INSERT INTO productos_estadisticas (categoria, total, valor_total)
+                    {self.SQL_ESTADISTICAS_CALCULADAS}
+                """)
+                categorias = cursor.rowcount
+            conn.commit()
+            return categorias
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+class ProductoServiceAsync(AdaptadorAsincrono):
+    """
+    Versión asyncio de ProductoService. pymysql es bloqueante, así que
+    cada método corre en un hilo del executor (una conexión por llamada)
+    y la cancelación se hace con KILL QUERY.
+    """
+    
+    TRABAJADORES_POR_DEFECTO = 10
+    
+    def __init__(self, trabajadores=None, servicio=None):
+        super().__init__(servicio or ProductoService(), trabajadores, nombre='mysql')
+    
+    def _preparar(self):
+        return threading.get_ident()
+    
+    def _interrumpir(self, hilo):
+        MySQLConnection().cancelar_consulta(hilo)
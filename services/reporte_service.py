@@ -11,7 +11,7 @@ from reportlab.pdfbase.ttfonts import TTFont # pyright: ignore[reportMissingModu
 from reportlab.lib.fonts import addMapping # pyright: ignore[reportMissingModuleSource]
 
 class ReporteService:
-    """Servicio para generar reportes en PDF"""
+    """Servicio para generar reportes en PDF (recibe registros de ProductoRepository)"""
     
     def __init__(self):
         self.reports_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'reports')
@@ -59,14 +59,14 @@ class ReporteService:
         
         for p in productos:
             data.append([
-                str(p.get('id', '')),
-                p.get('nombre', ''),
-                f"${p.get('precio', 0):.2f}",
-                str(p.get('cantidad', 0)),
-                p.get('categoria', ''),
-                p.get('descripcion', '')[:50] + ('...' if len(p.get('descripcion', '')) > 50 else '')
+                str(p.id),
+                p.nombre,
+                f"${p.precio:.2f}",
+                str(p.cantidad),
+                p.categoria,
+                (p.descripcion or '')[:50] + ('...' if len(p.descripcion or '') > 50 else '')
             ])
-            total_valor += p.get('precio', 0) * p.get('cantidad', 0)
+            total_valor += p.precio * p.cantidad
             total_productos += 1
         
         # Agregar fila de totales
@@ -143,11 +143,11 @@ class ReporteService:
         
         for p in productos:
             data.append([
-                str(p.get('id', '')),
-                p.get('nombre', ''),
-                str(p.get('cantidad', 0)),
-                f"${p.get('precio', 0):.2f}",
-                p.get('categoria', '')
+                str(p.id),
+                p.nombre,
+                str(p.cantidad),
+                f"${p.precio:.2f}",
+                p.categoria
             ])
         
         table = Table(data, colWidths=[50, 180, 70, 70, 90])
@@ -205,12 +205,12 @@ class ReporteService:
         total_valor = 0
         for p in productos:
             data.append([
-                str(p.get('id', '')),
-                p.get('nombre', ''),
-                f"${p.get('precio', 0):.2f}",
-                str(p.get('cantidad', 0))
+                str(p.id),
+                p.nombre,
+                f"${p.precio:.2f}",
+                str(p.cantidad)
             ])
-            total_valor += p.get('precio', 0) * p.get('cantidad', 0)
+            total_valor += p.precio * p.cantidad
         
         table = Table(data, colWidths=[50, 200, 80, 60])
         table.setStyle(TableStyle([
@@ -0,0 +1,326 @@
+# services/sincronizacion_service.py
+"""
+Sincronización incremental de productos entre SQLite y MySQL
+
+En vez de copiar tablas completas, cada pasada mueve solo lo que cambió
+desde la anterior, en ambos sentidos:
+
+  - Cada lado marca sus escrituras con actualizado_en (segundos desde 1970)
+    y origen (quién hizo el último cambio); los borrados dejan una lápida
+    en productos_borrados. Lo mantienen triggers en los dos motores
+    (migración 7 de SQLite y script_bd.txt en MySQL).
+  - Por cada flujo (productos y borrados, en cada sentido) se guarda una
+    marca de agua en sync_marcas (SQLite). Cada pasada lee lo posterior a
+    la marca menos un margen, para no perder transacciones que tomaron su
+    hora antes pero confirmaron después; releer el margen no cuesta
+    escrituras porque aplicar es idempotente.
+  - Conflictos: gana la última escritura (last-writer-wins). Un cambio se
+    aplica solo si es más nuevo que la fila o la lápida del destino; un
+    empate se omite.
+  - Sin eco: lo que se aplica en un lado queda con el origen del otro y la
+    lectura de cambios filtra por origen, así no se devuelve.
+
+Los relojes del servidor MySQL y del equipo con SQLite deben estar
+sincronizados (NTP): el margen y el desempate dependen de ello. Los ids
+son compartidos; crear el mismo id en los dos lados a la vez se resuelve
+como un conflicto más (queda la última versión).
+"""
+
+import time
+
+from database.conexion import MySQLConnection
+from database import paginacion
+
+# Columnas que se copian (id aparte); actualizado_en y origen las pone la sincronización
+COLUMNAS = ('nombre', 'precio', 'cantidad', 'categoria', 'descripcion')
+
+
+def _marca(valor):
+    """Normaliza la marca de tiempo (REAL en SQLite, DECIMAL en MySQL) para compararla"""
+    return round(float(valor), 6)
+
+
+def _evento(datos, id, valor):
+    """
+    Agrega la marca normalizada (para resolver conflictos) y la clave de
+    paginación con el valor tal como está guardado: redondeado podría
+    quedar por debajo y la página siguiente repetiría filas.
+    """
+    datos.update(id=id, marca=_marca(valor), clave=(valor, id))
+    return datos
+
+
+class LadoSQLite:
+    """Lectura y aplicación de cambios en la base SQLite"""
+
+    nombre = 'sqlite'
+
+    def __init__(self, db):
+        self.db = db
+
+    def cambios(self, desde, limite):
+        """Productos cambiados aquí después de desde = (marca, id), en orden"""
+        condicion, valores = paginacion.condicion_keyset('actualizado_en', desde)
+        filas = self.db.get_connection().execute(f'''
+            SELECT id, {', '.join(COLUMNAS)}, actualizado_en FROM productos
+            WHERE origen = 'sqlite' AND {condicion}
+            ORDER BY actualizado_en, id LIMIT ?
+        ''', valores + [limite]).fetchall()
+        return [_evento(dict(zip(COLUMNAS, f[1:-1])), f[0], f[-1]) for f in filas]
+
+    def borrados(self, desde, limite):
+        condicion, valores = paginacion.condicion_keyset('borrado_en', desde)
+        filas = self.db.get_connection().execute(f'''
+            SELECT id, borrado_en FROM productos_borrados
+            WHERE origen = 'sqlite' AND {condicion}
+            ORDER BY borrado_en, id LIMIT ?
+        ''', valores + [limite]).fetchall()
+        return [_evento({}, f[0], f[1]) for f in filas]
+
+    @staticmethod
+    def _marcas_actuales(cursor, ids):
+        """id -> marca más nueva del destino (fila o lápida)"""
+        marcadores = ','.join('?' * len(ids))
+        actuales = {}
+        for consulta in (f'SELECT id, actualizado_en FROM productos WHERE id IN ({marcadores})',
+                         f'SELECT id, borrado_en FROM productos_borrados WHERE id IN ({marcadores})'):
+            for id, marca in cursor.execute(consulta, ids).fetchall():
+                if marca is not None:
+                    actuales[id] = max(actuales.get(id, 0.0), _marca(marca))
+        return actuales
+
+    def aplicar(self, cambios, borrados, origen):
+        """
+        Aplica en una transacción los cambios y borrados que ganan por
+        marca de tiempo. Returns: (aplicados, omitidos)
+        """
+        eventos = cambios + borrados
+        with self.db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            actuales = self._marcas_actuales(cursor, [e['id'] for e in eventos])
+            cambios = [c for c in cambios if c['marca'] > actuales.get(c['id'], -1.0)]
+            borrados = [b for b in borrados if b['marca'] > actuales.get(b['id'], -1.0)]
+            if cambios:
+                asignaciones = ', '.join(f'{c} = excluded.{c}' for c in COLUMNAS + ('actualizado_en', 'origen'))
+                cursor.executemany(f'''
+                    INSERT INTO productos (id, {', '.join(COLUMNAS)}, actualizado_en, origen)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(id) DO UPDATE SET {asignaciones}
+                ''', [(c['id'], c['nombre'], float(c['precio']), c['cantidad'], c['categoria'],
+                       c['descripcion'], c['marca'], origen) for c in cambios])
+            if borrados:
+                # La lápida va antes del DELETE para que el trigger no genere otra
+                cursor.executemany(
+                    'INSERT OR REPLACE INTO productos_borrados (id, borrado_en, origen) VALUES (?, ?, ?)',
+                    [(b['id'], b['marca'], origen) for b in borrados]
+                )
+                cursor.executemany('DELETE FROM productos WHERE id = ?', [(b['id'],) for b in borrados])
+        aplicados = len(cambios) + len(borrados)
+        return aplicados, len(eventos) - aplicados
+
+
+class LadoMySQL:
+    """Lectura y aplicación de cambios en MySQL, con una conexión por pasada"""
+
+    nombre = 'mysql'
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def cambios(self, desde, limite):
+        condicion, valores = paginacion.condicion_keyset('actualizado_en', desde, marcador='%s')
+        with self.conn.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT id, {', '.join(COLUMNAS)}, actualizado_en FROM productos
+                WHERE origen = 'mysql' AND {condicion}
+                ORDER BY actualizado_en, id LIMIT %s
+            """, valores + [limite])
+            filas = cursor.fetchall()
+        self.conn.commit()  # cierra la instantánea de lectura
+        return [_evento(fila, fila['id'], fila.pop('actualizado_en')) for fila in filas]
+
+    def borrados(self, desde, limite):
+        condicion, valores = paginacion.condicion_keyset('borrado_en', desde, marcador='%s')
+        with self.conn.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT id, borrado_en FROM productos_borrados
+                WHERE origen = 'mysql' AND {condicion}
+                ORDER BY borrado_en, id LIMIT %s
+            """, valores + [limite])
+            filas = cursor.fetchall()
+        self.conn.commit()
+        return [_evento({}, f['id'], f['borrado_en']) for f in filas]
+
+    @staticmethod
+    def _marcas_actuales(cursor, ids):
+        marcadores = ', '.join(['%s'] * len(ids))
+        actuales = {}
+        for consulta in (f"SELECT id, actualizado_en AS marca FROM productos WHERE id IN ({marcadores}) FOR UPDATE",
+                         f"SELECT id, borrado_en AS marca FROM productos_borrados WHERE id IN ({marcadores}) FOR UPDATE"):
+            cursor.execute(consulta, ids)
+            for fila in cursor.fetchall():
+                if fila['marca'] is not None:
+                    actuales[fila['id']] = max(actuales.get(fila['id'], 0.0), _marca(fila['marca']))
+        return actuales
+
+    def aplicar(self, cambios, borrados, origen):
+        eventos = cambios + borrados
+        try:
+            with self.conn.cursor() as cursor:
+                self.conn.begin()
+                actuales = self._marcas_actuales(cursor, [e['id'] for e in eventos])
+                cambios = [c for c in cambios if c['marca'] > actuales.get(c['id'], -1.0)]
+                borrados = [b for b in borrados if b['marca'] > actuales.get(b['id'], -1.0)]
+                if cambios:
+                    valores = ', '.join(['(%s, %s, %s, %s, %s, %s, %s, %s)'] * len(cambios))
+                    parametros = []
+                    for c in cambios:
+                        parametros += [c['id'], c['nombre'], c['precio'], c['cantidad'], c['categoria'],
+                                       c['descripcion'], c['marca'], origen]
+                    asignaciones = ', '.join(f'{c} = VALUES({c})' for c in COLUMNAS + ('actualizado_en', 'origen'))
+                    cursor.execute(f"""
+                        INSERT INTO productos (id, {', '.join(COLUMNAS)}, actualizado_en, origen)
+                        VALUES {valores}
+                        ON DUPLICATE KEY UPDATE {asignaciones}
+                    """, parametros)
+                if borrados:
+                    valores = ', '.join(['(%s, %s, %s)'] * len(borrados))
+                    parametros = []
+                    for b in borrados:
+                        parametros += [b['id'], b['marca'], origen]
+                    cursor.execute(f"""
+                        INSERT INTO productos_borrados (id, borrado_en, origen) VALUES {valores}
+                        ON DUPLICATE KEY UPDATE borrado_en = VALUES(borrado_en), origen = VALUES(origen)
+                    """, parametros)
+                    ids = [b['id'] for b in borrados]
+                    cursor.execute(f"DELETE FROM productos WHERE id IN ({', '.join(['%s'] * len(ids))})", ids)
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        aplicados = len(cambios) + len(borrados)
+        return aplicados, len(eventos) - aplicados
+
+
+class SincronizadorProductos:
+    """
+    Mueve los cambios de productos entre SQLite y MySQL.
+
+    Uso:
+        sincronizador = SincronizadorProductos(DatabaseManager())
+        informe = sincronizador.sincronizar()   # una pasada
+        sincronizador.ejecutar(intervalo=5)      # bucle hasta Ctrl+C
+
+    'conectar' devuelve la conexión a MySQL de cada pasada (por defecto,
+    una del pool de MySQLConnection); se cierra al terminar la pasada.
+    """
+
+    TAMANO_LOTE = 500
+    # Segundos que se vuelven a leer antes de cada marca de agua
+    MARGEN = 5.0
+
+    def __init__(self, db, tamano_lote=None, margen=None, conectar=None):
+        self.db = db
+        self.tamano_lote = tamano_lote or self.TAMANO_LOTE
+        self.margen = self.MARGEN if margen is None else margen
+        self.conectar = conectar or (lambda: MySQLConnection().conectar())
+
+    # ----- MARCAS DE AGUA (en SQLite) -----
+
+    def marca_de_agua(self, flujo):
+        fila = self.db.get_connection().execute(
+            'SELECT marca FROM sync_marcas WHERE flujo = ?', (flujo,)
+        ).fetchone()
+        return fila[0] if fila else 0.0
+
+    def _guardar_marca(self, flujo, marca):
+        with self.db.get_connection() as conn:
+            conn.execute('''
+                INSERT INTO sync_marcas (flujo, marca) VALUES (?, ?)
+                ON CONFLICT(flujo) DO UPDATE SET marca = MAX(marca, excluded.marca),
+                                                 actualizado = CURRENT_TIMESTAMP
+            ''', (flujo, marca))
+
+    # ----- PASADAS -----
+
+    def _flujo(self, origen, destino, tipo, informe):
+        """Copia un flujo (productos o borrados) de origen a destino, lote por lote"""
+        flujo = f'{origen.nombre}>{destino.nombre}:{tipo}'
+        leer = origen.cambios if tipo == 'productos' else origen.borrados
+        marca_inicial = self.marca_de_agua(flujo)
+        desde = (marca_inicial - self.margen, 0)
+        nueva_marca = marca_inicial
+        while True:
+            eventos = leer(desde, self.tamano_lote)
+            if not eventos:
+                break
+            if tipo == 'productos':
+                aplicados, omitidos = destino.aplicar(eventos, [], origen.nombre)
+            else:
+                aplicados, omitidos = destino.aplicar([], eventos, origen.nombre)
+            ahora = time.time()
+            informe['leidos'] += len(eventos)
+            informe['aplicados'] += aplicados
+            informe['omitidos'] += omitidos
+            if marca_inicial < eventos[-1]['marca']:
+                # Retraso: cuánto tardó en llegar al destino el cambio más antiguo nuevo
+                nuevos = [e['marca'] for e in eventos if e['marca'] > marca_inicial]
+                informe['retraso_max_s'] = max(informe['retraso_max_s'], ahora - min(nuevos))
+            nueva_marca = max(nueva_marca, eventos[-1]['marca'])
+            desde = eventos[-1]['clave']
+            if len(eventos) < self.tamano_lote:
+                break
+        if nueva_marca > marca_inicial:
+            self._guardar_marca(flujo, nueva_marca)
+
+    def sincronizar(self):
+        """
+        Una pasada en ambos sentidos.
+
+        Returns:
+            dict: por sentido, filas leídas, aplicadas y omitidas (perdieron
+                  el conflicto o ya estaban), retraso máximo y filas por segundo
+        """
+        conn = self.conectar()
+        if not conn:
+            raise ConnectionError("No se pudo conectar a MySQL")
+        try:
+            return self.sincronizar_lados(LadoSQLite(self.db), LadoMySQL(conn))
+        finally:
+            conn.close()
+
+    def sincronizar_lados(self, sqlite, mysql):
+        """Una pasada entre dos lados ya abiertos (ver sincronizar)"""
+        informe = {}
+        for origen, destino in ((sqlite, mysql), (mysql, sqlite)):
+            sentido = f'{origen.nombre}>{destino.nombre}'
+            datos = {'leidos': 0, 'aplicados': 0, 'omitidos': 0, 'retraso_max_s': 0.0}
+            inicio = time.perf_counter()
+            for tipo in ('productos', 'borrados'):
+                self._flujo(origen, destino, tipo, datos)
+            duracion = time.perf_counter() - inicio
+            datos['duracion_s'] = round(duracion, 3)
+            datos['filas_por_s'] = round(datos['leidos'] / duracion) if duracion else 0
+            datos['retraso_max_s'] = round(datos['retraso_max_s'], 3)
+            informe[sentido] = datos
+        return informe
+
+    def ejecutar(self, intervalo=5.0, al_terminar=None, pasadas=None):
+        """
+        Repite sincronizar() cada 'intervalo' segundos. Un error (MySQL
+        caído) no detiene el bucle: se informa y se reintenta.
+        'al_terminar' recibe el informe (o la excepción) de cada pasada.
+        """
+        hechas = 0
+        while pasadas is None or hechas < pasadas:
+            inicio = time.monotonic()
+            try:
+                resultado = self.sincronizar()
+            except Exception as e:
+                resultado = e
+            if al_terminar:
+                al_terminar(resultado)
+            hechas += 1
+            if pasadas is None or hechas < pasadas:
+                time.sleep(max(0.0, intervalo - (time.monotonic() - inicio)))
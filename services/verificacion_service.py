@@ -0,0 +1,228 @@
+# services/verificacion_service.py
+"""
+Verificación de tablas copiadas (migraciones y espejos) por sumas de control
+
+Comparar solo COUNT(*) no detecta filas modificadas o dañadas en el
+camino. Traer las dos tablas completas para compararlas sí, pero cuesta
+lo mismo que copiarlas. Aquí cada lado calcula en su propio motor, por
+rangos de la clave primaria, la cantidad de filas y la suma de un CRC32
+por fila. Solo los rangos cuyo resumen difiere se vuelven a dividir
+(como un árbol de Merkle), hasta llegar a rangos chicos en los que se
+comparan los CRC fila por fila. Con pocas diferencias, verificar
+millones de filas cuesta unas pocas consultas por nivel.
+
+El CRC se calcula sobre una representación de texto común a ambos
+motores ('|' entre columnas, '\\N' para NULL, decimales con 2 cifras), así
+se puede comparar SQLite con MySQL o dos servidores MySQL entre sí. En
+MySQL lo calcula la función CRC32(); en SQLite, una función registrada
+con create_function que usa zlib.crc32.
+"""
+
+import math
+import time
+import zlib
+
+import pymysql
+
+# Columnas que se comparan (las fechas de alta y las marcas de sincronización
+# dependen de cada motor). Por tabla y motor: (clave primaria, [(columna, tipo)])
+ESQUEMAS = {
+    'productos': {
+        'sqlite': ('id', [('nombre', 'texto'), ('precio', 'decimal'), ('cantidad', 'entero'),
+                          ('categoria', 'texto'), ('descripcion', 'texto')]),
+        'mysql': ('id', [('nombre', 'texto'), ('precio', 'decimal'), ('cantidad', 'entero'),
+                         ('categoria', 'texto'), ('descripcion', 'texto')]),
+    },
+    'usuarios': {
+        'sqlite': ('id', [('nombre', 'texto'), ('email', 'texto'), ('password', 'texto'),
+                          ('fecha_nacimiento', 'texto'), ('proveedor', 'texto'), ('rol', 'texto')]),
+        'mysql': ('id_usuario', [('nombre', 'texto'), ('mail', 'texto'), ('password', 'texto'),
+                                 ('fecha_nacimiento', 'texto'), ('proveedor', 'texto'), ('rol', 'texto')]),
+    },
+}
+
+
+def crc32_texto(texto):
+    """CRC32 de los bytes UTF-8, igual que CRC32() de MySQL sobre utf8mb4"""
+    return None if texto is None else zlib.crc32(texto.encode('utf-8'))
+
+
+class LadoVerificacion:
+    """
+    Consultas de resumen sobre una tabla. Las subclases indican el
+    marcador de parámetros, la división entera y cómo se arma el CRC.
+    """
+
+    marcador = '?'
+    division = '/'
+
+    def __init__(self, tabla, clave, columnas):
+        self.tabla = tabla
+        self.clave = clave
+        self.columnas = columnas
+        self.consultas = 0
+
+    def _crc_fila(self):
+        raise NotImplementedError
+
+    def _ejecutar(self, sql, parametros=()):
+        raise NotImplementedError
+
+    def _consultar(self, sql, parametros=()):
+        self.consultas += 1
+        return self._ejecutar(sql.replace('?', self.marcador), parametros)
+
+    def rango(self):
+        """(mínimo, máximo, filas) de la clave primaria"""
+        minimo, maximo, filas = self._consultar(
+            f"SELECT MIN({self.clave}), MAX({self.clave}), COUNT(*) FROM {self.tabla}"
+        )[0]
+        return minimo, maximo, filas
+
+    def resumen_ramas(self, desde, hasta, ancho):
+        """
+        Divide [desde, hasta] en ramas de 'ancho' ids y devuelve
+        rama -> (filas, suma de CRC) de las ramas que tienen filas
+        """
+        filas = self._consultar(f"""
+            SELECT ({self.clave} - ?) {self.division} ? AS rama, COUNT(*), SUM({self._crc_fila()})
+            FROM {self.tabla} WHERE {self.clave} BETWEEN ? AND ?
+            GROUP BY rama
+        """, (desde, ancho, desde, hasta))
+        return {int(rama): (cantidad, int(suma)) for rama, cantidad, suma in filas}
+
+    def crc_filas(self, desde, hasta):
+        """id -> CRC de cada fila del rango (para los rangos hoja)"""
+        filas = self._consultar(
+            f"SELECT {self.clave}, {self._crc_fila()} FROM {self.tabla} WHERE {self.clave} BETWEEN ? AND ?",
+            (desde, hasta)
+        )
+        return dict(filas)
+
+
+class LadoSQLite(LadoVerificacion):
+    """Tabla de una conexión sqlite3 (p. ej. DatabaseManager.get_connection())"""
+
+    nombre = 'sqlite'
+
+    def __init__(self, conexion, tabla, clave, columnas):
+        super().__init__(tabla, clave, columnas)
+        self.conexion = conexion
+        conexion.create_function('crc32_texto', 1, crc32_texto, deterministic=True)
+
+    def _crc_fila(self):
+        partes = []
+        for columna, tipo in self.columnas:
+            if tipo == 'decimal':
+                valor = f"printf('%.2f', {columna})"
+            elif tipo == 'entero':
+                valor = f"CAST(CAST({columna} AS INTEGER) AS TEXT)"
+            else:
+                valor = f"CAST({columna} AS TEXT)"
+            partes.append(f"COALESCE({valor}, '\\N')")
+        separador = " || '|' || "
+        return f"crc32_texto({separador.join(partes)})"
+
+    def _ejecutar(self, sql, parametros=()):
+        return [tuple(fila) for fila in self.conexion.execute(sql, parametros).fetchall()]
+
+
+class LadoMySQL(LadoVerificacion):
+    """Tabla de una conexión pymysql (del pool o directa)"""
+
+    nombre = 'mysql'
+    marcador = '%s'
+    division = 'DIV'
+
+    def __init__(self, conexion, tabla, clave, columnas):
+        super().__init__(tabla, clave, columnas)
+        self.conexion = conexion
+
+    def _crc_fila(self):
+        partes = []
+        for columna, tipo in self.columnas:
+            if tipo == 'decimal':
+                valor = f"CAST(CAST({columna} AS DECIMAL(20,2)) AS CHAR)"
+            else:
+                valor = f"CAST({columna} AS CHAR)"
+            partes.append(f"COALESCE({valor}, '\\\\N')")
+        return f"CRC32(CONCAT_WS('|', {', '.join(partes)}))"
+
+    def _ejecutar(self, sql, parametros=()):
+        with self.conexion.cursor(pymysql.cursors.Cursor) as cursor:
+            cursor.execute(sql, parametros)
+            filas = cursor.fetchall()
+        # Cada consulta ve los datos confirmados más recientes
+        self.conexion.commit()
+        return filas
+
+
+class VerificadorTablas:
+    """
+    Compara una tabla entre dos lados y encuentra las filas distintas.
+
+    Args:
+        ramas (int): en cuántos rangos se divide un rango que no coincide
+        hoja (int): rangos con hasta esta cantidad de filas (o de ids) se
+            comparan fila por fila
+    """
+
+    RAMAS = 16
+    HOJA = 256
+
+    def __init__(self, origen, destino, ramas=None, hoja=None):
+        self.origen = origen
+        self.destino = destino
+        self.ramas = ramas or self.RAMAS
+        self.hoja = hoja or self.HOJA
+
+    def _comparar_filas(self, desde, hasta, informe):
+        filas_origen = self.origen.crc_filas(desde, hasta)
+        filas_destino = self.destino.crc_filas(desde, hasta)
+        for id in sorted(set(filas_origen) | set(filas_destino)):
+            if id not in filas_destino:
+                informe['solo_origen'].append(id)
+            elif id not in filas_origen:
+                informe['solo_destino'].append(id)
+            elif filas_origen[id] != filas_destino[id]:
+                informe['distintas'].append(id)
+
+    def verificar(self):
+        """
+        Returns:
+            dict: filas de cada lado, ids que faltan en el destino
+                  (solo_origen), que sobran (solo_destino) o que difieren
+                  (distintas), consultas hechas y duración
+        """
+        inicio = time.perf_counter()
+        min_o, max_o, filas_o = self.origen.rango()
+        min_d, max_d, filas_d = self.destino.rango()
+        informe = {'filas_origen': filas_o, 'filas_destino': filas_d,
+                   'solo_origen': [], 'solo_destino': [], 'distintas': [], 'niveles': 0}
+
+        # Rangos por revisar: (desde, hasta, filas del lado que más tiene)
+        minimos = [m for m in (min_o, min_d) if m is not None]
+        pendientes = [(min(minimos), max(m for m in (max_o, max_d) if m is not None),
+                       max(filas_o, filas_d))] if minimos else []
+        while pendientes:
+            informe['niveles'] += 1
+            siguientes = []
+            for desde, hasta, filas in pendientes:
+                # Un rango con pocas filas se compara directo aunque sus ids estén dispersos
+                if filas <= self.hoja or hasta - desde + 1 <= self.hoja:
+                    self._comparar_filas(desde, hasta, informe)
+                    continue
+                ancho = math.ceil((hasta - desde + 1) / self.ramas)
+                resumen_o = self.origen.resumen_ramas(desde, hasta, ancho)
+                resumen_d = self.destino.resumen_ramas(desde, hasta, ancho)
+                for rama in sorted(set(resumen_o) | set(resumen_d)):
+                    if resumen_o.get(rama) != resumen_d.get(rama):
+                        inicio_rama = desde + rama * ancho
+                        filas = max(resumen_o.get(rama, (0, 0))[0], resumen_d.get(rama, (0, 0))[0])
+                        siguientes.append((inicio_rama, min(hasta, inicio_rama + ancho - 1), filas))
+            pendientes = siguientes
+
+        informe['consultas'] = self.origen.consultas + self.destino.consultas
+        informe['duracion_s'] = round(time.perf_counter() - inicio, 3)
+        informe['coinciden'] = not (informe['solo_origen'] or informe['solo_destino'] or informe['distintas'])
+        return informe
@@ -0,0 +1,56 @@
+# sincronizar.py
+"""
+SCRIPT PARA SINCRONIZAR LOS PRODUCTOS ENTRE SQLITE Y MYSQL
+Mueve solo los cambios posteriores a la última pasada, en ambos sentidos
+(ver services/sincronizacion_service.py).
+
+Uso:
+    python sincronizar.py                  # una pasada
+    python sincronizar.py --intervalo 5    # repite cada 5 segundos hasta Ctrl+C
+"""
+
+import sys
+
+from database.db_manager import DatabaseManager
+from services.sincronizacion_service import SincronizadorProductos
+
+
+def mostrar(resultado):
+    if isinstance(resultado, Exception):
+        print(f"❌ Error en la sincronización: {resultado}")
+        return
+    for sentido, datos in resultado.items():
+        print(f"🔄 {sentido}: {datos['leidos']} leídos, {datos['aplicados']} aplicados, "
+              f"{datos['omitidos']} omitidos | retraso {datos['retraso_max_s']}s | "
+              f"{datos['filas_por_s']} filas/s")
+
+
+def main():
+    print("=" * 60)
+    print("🔄 SINCRONIZACIÓN DE PRODUCTOS SQLITE <-> MYSQL")
+    print("=" * 60)
+
+    sincronizador = SincronizadorProductos(DatabaseManager())
+    if '--intervalo' not in sys.argv:
+        try:
+            mostrar(sincronizador.sincronizar())
+        except Exception as e:
+            mostrar(e)
+            return 1
+        return 0
+
+    try:
+        intervalo = float(sys.argv[sys.argv.index('--intervalo') + 1])
+    except (IndexError, ValueError):
+        print("❌ Uso: python sincronizar.py --intervalo SEGUNDOS")
+        return 2
+    print(f"⏱️ Una pasada cada {intervalo}s (Ctrl+C para terminar)")
+    try:
+        sincronizador.ejecutar(intervalo, al_terminar=mostrar)
+    except KeyboardInterrupt:
+        print("\n👋 Sincronización detenida")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
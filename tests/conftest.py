@@ -0,0 +1,58 @@
+# tests/conftest.py
+"""
+Fixtures comunes de las pruebas automáticas.
+
+Ejecutar desde la raíz del proyecto: python -m pytest tests
+(los test_*.py de la raíz son scripts manuales contra MySQL)
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.conexion import Cortacircuitos
+from database.db_manager import DatabaseManager
+from models.inventario import Inventario
+from models.producto import Producto
+
+
+@pytest.fixture
+def db(tmp_path):
+    """DatabaseManager sobre una base SQLite vacía y temporal"""
+    Producto.ids_utilizados.clear()
+    db = DatabaseManager(str(tmp_path / 'tienda.db'))
+    yield db
+    db.cerrar_conexiones()
+    Producto.ids_utilizados.clear()
+
+
+@pytest.fixture
+def inventario(db):
+    return Inventario(db)
+
+
+class Reloj:
+    """Reloj manual para el cortacircuitos"""
+
+    def __init__(self):
+        self.ahora = 0.0
+
+    def __call__(self):
+        return self.ahora
+
+    def avanzar(self, segundos):
+        self.ahora += segundos
+
+
+@pytest.fixture
+def reloj():
+    return Reloj()
+
+
+@pytest.fixture
+def cortacircuitos(reloj):
+    """Se abre con 3 fallos; azar=1.0: la espera es exactamente 1s * 2^aperturas, hasta 4s"""
+    return Cortacircuitos(umbral_fallos=3, espera_base=1.0, espera_maxima=4.0, reloj=reloj, azar=lambda: 1.0)
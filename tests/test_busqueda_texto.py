@@ -0,0 +1,81 @@
+# tests/test_busqueda_texto.py
+"""
+Búsqueda de texto completo en productos (productos_fts): prefijos, tildes,
+relevancia, términos comunes y triggers que mantienen el índice al día.
+"""
+
+import pytest
+
+from database.registros import ProductoRegistro
+
+PRODUCTOS = [
+    (1, 'Audífonos Bluetooth', 'Cancelación de ruido'),
+    (2, 'Mouse Inalámbrico', 'Incluye audífonos de regalo'),
+    (3, 'Teclado Mecánico', 'Switches azules'),
+    (4, 'Audífonos Gamer', 'Micrófono desmontable'),
+    (5, 'Monitor 27"', 'Panel IPS'),
+]
+
+
+@pytest.fixture
+def tienda(db):
+    if not db.tiene_busqueda_texto():
+        pytest.skip("SQLite sin FTS5")
+    for id, nombre, descripcion in PRODUCTOS:
+        db.insertar_producto(ProductoRegistro(id, nombre, 10.0, 5, 'audio', descripcion))
+    return db
+
+
+def ids(filas):
+    return [fila.id for fila in filas]
+
+
+def test_prefijo_sin_tildes_y_sin_mayusculas(tienda):
+    assert set(ids(tienda.buscar_productos_texto('audif'))) == {1, 2, 4}
+    assert set(ids(tienda.buscar_productos_texto('AUDÍFONOS'))) == {1, 2, 4}
+    assert ids(tienda.buscar_productos_texto('mecanico')) == [3]
+
+
+def test_todas_las_palabras_deben_aparecer(tienda):
+    assert ids(tienda.buscar_productos_texto('audif gam')) == [4]
+    assert ids(tienda.buscar_productos_texto('audif teclado')) == []
+
+
+def test_el_nombre_pesa_mas_que_la_descripcion(tienda):
+    # El 2 solo menciona audífonos en la descripción
+    assert ids(tienda.buscar_productos_texto('audífonos'))[-1] == 2
+
+
+def test_limite_y_terminos_vacios(tienda):
+    assert len(tienda.buscar_productos_texto('audif', limite=2)) == 2
+    # Sin palabras, o solo con operadores de FTS5, no se consulta nada
+    assert tienda.buscar_productos_texto('') == []
+    assert tienda.buscar_productos_texto('" * ( )') == []
+    assert ids(tienda.buscar_productos_texto('monitor 27"')) == [5]
+
+
+def test_termino_comun_se_devuelve_por_id(tienda, monkeypatch):
+    monkeypatch.setattr(tienda, 'UMBRAL_RANKING_FTS', 3)
+    assert ids(tienda.buscar_productos_texto('audif')) == [1, 2, 4]
+    assert ids(tienda.buscar_productos_texto('audif', limite=2)) == [1, 2]
+
+
+def test_triggers_mantienen_el_indice(tienda):
+    tienda.actualizar_producto(3, nombre='Teclado Audífonos')
+    assert 3 in ids(tienda.buscar_productos_texto('audif'))
+    assert ids(tienda.buscar_productos_texto('mecanico')) == []
+
+    tienda.eliminar_producto(1)
+    assert 1 not in ids(tienda.buscar_productos_texto('audif'))
+
+    # Un cambio que no toca nombre ni descripción no altera el índice
+    tienda.actualizar_producto(4, precio=1.0)
+    assert ids(tienda.buscar_productos_texto('gamer')) == [4]
+
+    tienda.insertar_productos_lote([{'id': 6, 'nombre': 'Parlante', 'precio': 30.0,
+                                     'cantidad': 1, 'categoria': 'audio', 'descripcion': 'Portátil'}])
+    assert ids(tienda.buscar_productos_texto('portatil')) == [6]
+
+
+def test_obtener_por_nombre_usa_el_indice(tienda):
+    assert set(ids(tienda.obtener_productos_por_nombre('audif'))) == {1, 2, 4}
@@ -0,0 +1,276 @@
+# tests/test_cache.py
+"""
+CacheLRU (capacidad, TTL, invalidación y carga a través de la caché) y su
+uso en ProductoService: las lecturas se sirven desde memoria y cada
+escritura invalida solo las claves afectadas.
+
+MySQL se reemplaza por una base SQLite en memoria que acepta el SQL del
+servicio (%s, FOR UPDATE, @@SESSION).
+"""
+
+import sqlite3
+
+import pytest
+
+from services import producto_service
+from services.cache import CacheLRU
+from services.producto_service import ProductoService
+
+
+# ----- CACHE LRU -----
+
+@pytest.fixture
+def cache(reloj):
+    return CacheLRU(capacidad=3, ttl=10.0, reloj=reloj)
+
+
+def test_capacidad_desaloja_la_menos_usada(cache):
+    for i in (1, 2, 3):
+        cache.guardar(('id', i), i)
+    assert cache.obtener(('id', 1)) == 1      # el 1 pasa a ser el más reciente
+    cache.guardar(('id', 4), 4)
+    assert cache.obtener(('id', 2)) is None
+    assert [cache.obtener(('id', i)) for i in (1, 3, 4)] == [1, 3, 4]
+    assert len(cache) == 3
+    assert cache.estadisticas()['desalojos'] == 1
+
+    with pytest.raises(ValueError):
+        CacheLRU(capacidad=0)
+
+
+def test_ttl_vence_cada_clave(cache, reloj):
+    cache.guardar(('id', 1), 'uno')
+    cache.guardar(('id', 2), 'dos', ttl=30.0)
+    reloj.avanzar(9.9)
+    assert cache.obtener(('id', 1)) == 'uno'
+    reloj.avanzar(0.1)
+    assert cache.obtener(('id', 1), 'vencido') == 'vencido'
+    assert cache.obtener(('id', 2)) == 'dos'
+    assert cache.estadisticas()['expirados'] == 1
+    assert cache.claves_de('id') == [('id', 2)]
+
+
+def test_invalidar_y_claves_de_grupo(cache):
+    for clave in (('id', 1), ('categoria', 'audio'), ('categoria', 'gaming')):
+        cache.guardar(clave, [])
+    assert sorted(cache.claves_de('categoria')) == [('categoria', 'audio'), ('categoria', 'gaming')]
+
+    cache.invalidar(('categoria', 'audio'), ('id', 99))
+    assert cache.claves_de('categoria') == [('categoria', 'gaming')]
+    assert cache.obtener(('id', 1)) == []
+    assert cache.estadisticas()['invalidaciones'] == 1
+
+    cache.limpiar()
+    assert len(cache) == 0 and cache.claves_de('id') == []
+
+
+def test_estadisticas(cache):
+    assert cache.estadisticas()['tasa_aciertos'] is None
+    cache.guardar(('id', 1), 'uno')
+    cache.obtener(('id', 1))
+    cache.obtener(('id', 1))
+    cache.obtener(('id', 2))
+    estadisticas = cache.estadisticas()
+    assert (estadisticas['aciertos'], estadisticas['fallos']) == (2, 1)
+    assert estadisticas['tasa_aciertos'] == pytest.approx(2 / 3, abs=1e-4)
+    assert (estadisticas['tamano'], estadisticas['capacidad'], estadisticas['ttl']) == (1, 3, 10.0)
+
+
+def test_obtener_o_cargar(cache):
+    cargas = []
+
+    def cargar():
+        cargas.append(1)
+        return 'valor'
+
+    assert cache.obtener_o_cargar(('id', 1), cargar) == 'valor'
+    assert cache.obtener_o_cargar(('id', 1), cargar) == 'valor'
+    assert len(cargas) == 1
+
+    # Los errores no se guardan: la próxima lectura vuelve a cargar
+    def falla():
+        raise RuntimeError("sin conexión")
+    with pytest.raises(RuntimeError):
+        cache.obtener_o_cargar(('id', 2), falla)
+    assert cache.obtener_o_cargar(('id', 2), cargar) == 'valor'
+    assert len(cargas) == 2
+
+
+def test_invalidacion_durante_la_carga_no_guarda_el_valor(cache):
+    def cargar_mientras_otro_escribe():
+        cache.invalidar(('id', 1))
+        return 'anterior a la escritura'
+
+    assert cache.obtener_o_cargar(('id', 1), cargar_mientras_otro_escribe) == 'anterior a la escritura'
+    assert cache.obtener(('id', 1)) is None
+
+
+# ----- PRODUCTO SERVICE -----
+
+class MySQLSobreSQLite:
+    """Lo que ProductoService usa de MySQLConnection, sobre SQLite en memoria"""
+
+    def __init__(self):
+        self.conexion = sqlite3.connect(':memory:', isolation_level=None, check_same_thread=False)
+        self.conexion.row_factory = lambda cursor, fila: {
+            columna[0]: valor for columna, valor in zip(cursor.description, fila)
+        }
+        self.conexion.execute('''
+            CREATE TABLE productos (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, nombre TEXT, precio REAL,
+                cantidad INTEGER, categoria TEXT, descripcion TEXT
+            )
+        ''')
+
+    def conectar(self):
+        return ConexionFalsa(self.conexion)
+
+
+class ConexionFalsa:
+    def __init__(self, conexion):
+        self.conexion = conexion
+
+    def cursor(self):
+        return CursorFalso(self.conexion)
+
+    def begin(self):
+        self.conexion.execute('BEGIN')
+
+    def commit(self):
+        if self.conexion.in_transaction:
+            self.conexion.execute('COMMIT')
+
+    def rollback(self):
+        if self.conexion.in_transaction:
+            self.conexion.execute('ROLLBACK')
+
+    def close(self):
+        pass
+
+
+class CursorFalso:
+    def __init__(self, conexion):
+        self.cursor = conexion.cursor()
+        self.lastrowid = None
+        self.rowcount = -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    @staticmethod
+    def _sqlite(sql):
+        sql = sql.replace('%s', '?').replace('FOR UPDATE', '')
+        return sql.replace('@@SESSION.auto_increment_increment', '1')
+
+    def execute(self, sql, parametros=()):
+        self.cursor.execute(self._sqlite(sql), tuple(parametros or ()))
+        self.rowcount = self.cursor.rowcount
+        # Como MySQL: en un INSERT de varias filas, lastrowid es el id de la primera
+        if sql.lstrip().startswith('INSERT'):
+            self.lastrowid = self.cursor.lastrowid - self.rowcount + 1
+        return self.rowcount
+
+    def executemany(self, sql, filas):
+        self.cursor.executemany(self._sqlite(sql), filas)
+        self.rowcount = self.cursor.rowcount
+        return self.rowcount
+
+    def fetchone(self):
+        return self.cursor.fetchone()
+
+    def fetchall(self):
+        return self.cursor.fetchall()
+
+
+@pytest.fixture
+def mysql(monkeypatch):
+    mysql = MySQLSobreSQLite()
+    monkeypatch.setattr(producto_service, 'MySQLConnection', lambda: mysql)
+    return mysql
+
+
+@pytest.fixture
+def consultas(monkeypatch):
+    """Lecturas que llegan a MySQL, como (tipo de clave, argumento)"""
+    hechas = []
+    consultar = ProductoService._consultar
+
+    def contar(self, sql, params, uno=False):
+        tipo = next(t for t, (consulta, _) in self.CONSULTAS_CACHEADAS.items() if consulta == sql)
+        hechas.append((tipo, params[0]))
+        return consultar(self, sql, params, uno)
+
+    monkeypatch.setattr(ProductoService, '_consultar', contar)
+    return hechas
+
+
+def producto(nombre='Mouse', cantidad=10, categoria='perifericos'):
+    return {'nombre': nombre, 'precio': 15.0, 'cantidad': cantidad,
+            'categoria': categoria, 'descripcion': ''}
+
+
+@pytest.fixture
+def servicio(mysql):
+    servicio = ProductoService(cache=CacheLRU(capacidad=100, ttl=60.0))
+    assert servicio.crear_lote([producto('Mouse', 10), producto('Teclado', 2),
+                                producto('Audífonos', 1, 'audio')]) == [1, 2, 3]
+    return servicio
+
+
+def leer_todo(servicio):
+    servicio.obtener_por_id(1)
+    servicio.obtener_por_id(3)
+    servicio.obtener_por_categoria('perifericos')
+    servicio.obtener_por_categoria('audio')
+    servicio.obtener_con_bajo_stock(1)
+    servicio.obtener_con_bajo_stock(5)
+
+
+def test_lecturas_repetidas_no_van_a_mysql(servicio, consultas):
+    leer_todo(servicio)
+    leer_todo(servicio)
+    assert len(consultas) == 6
+    assert servicio.obtener_por_id(1)['nombre'] == 'Mouse'
+    assert [p['id'] for p in servicio.obtener_con_bajo_stock(5)] == [3, 2]
+
+
+def test_actualizar_invalida_solo_las_claves_afectadas(servicio, consultas):
+    leer_todo(servicio)
+    del consultas[:]
+
+    # El mouse pasa a audio con 4 unidades: cambian su id, ambas categorías
+    # y la lista de bajo stock con límite 5 (la de límite 1 no lo incluye)
+    assert servicio.actualizar(1, producto('Mouse', 4, 'audio'))
+    leer_todo(servicio)
+    assert sorted(consultas, key=str) == sorted([('id', 1), ('categoria', 'perifericos'),
+                                                 ('categoria', 'audio'), ('bajo_stock', 5)], key=str)
+    assert [p['id'] for p in servicio.obtener_por_categoria('audio')] == [1, 3]
+    assert servicio.obtener_por_id(1)['cantidad'] == 4
+
+
+def test_eliminar_y_escrituras_por_lote_invalidan(servicio, consultas):
+    leer_todo(servicio)
+    assert servicio.eliminar(3)
+    assert servicio.obtener_por_id(3) is None
+    assert servicio.obtener_por_categoria('audio') == []
+    assert servicio.obtener_con_bajo_stock(1) == []
+
+    assert servicio.crear_lote([producto('Parlante', 0, 'audio')]) == [4]
+    assert [p['id'] for p in servicio.obtener_por_categoria('audio')] == [4]
+    assert [p['id'] for p in servicio.obtener_con_bajo_stock(1)] == [4]
+
+    assert servicio.actualizar_lote([dict(producto('Mouse', 10), id=1, precio=99.0)]) == [True]
+    assert servicio.obtener_por_id(1)['precio'] == 99.0
+    assert servicio.eliminar_lote([1, 2]) == [True, True]
+    assert servicio.obtener_por_categoria('perifericos') == []
+
+
+def test_sin_cache_cada_lectura_consulta(mysql, consultas):
+    servicio = ProductoService()
+    servicio.crear(producto())
+    servicio.obtener_por_id(1)
+    servicio.obtener_por_id(1)
+    assert consultas == [('id', 1), ('id', 1)]
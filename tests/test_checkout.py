@@ -0,0 +1,109 @@
+# tests/test_checkout.py
+"""
+finalizar_compra: la venta, sus detalles, el descuento de stock y el
+cierre del carrito ocurren juntos en una transacción, o no ocurre nada.
+"""
+
+import threading
+
+import pytest
+
+from database.registros import ProductoRegistro
+
+
+@pytest.fixture
+def tienda(db):
+    db.insertar_producto(ProductoRegistro(1, 'Mouse', 10.0, 5, 'perifericos', ''))
+    db.insertar_producto(ProductoRegistro(2, 'Teclado', 25.0, 2, 'perifericos', ''))
+    return db
+
+
+def carrito_con(db, *items):
+    carrito_id = db.crear_carrito(usuario_id=1)
+    for producto_id, cantidad, precio in items:
+        db.agregar_item_carrito(carrito_id, producto_id, cantidad, precio)
+    return carrito_id
+
+
+def consultar(db, sql, parametros=()):
+    return db.get_connection().execute(sql, parametros).fetchall()
+
+
+def stock(db):
+    return {p.id: p.cantidad for p in db.obtener_todos_productos()}
+
+
+def estado_carrito(db, carrito_id):
+    return consultar(db, 'SELECT estado FROM carritos WHERE id = ?', (carrito_id,))[0][0]
+
+
+def test_compra_crea_venta_descuenta_stock_y_cierra_carrito(tienda):
+    # El mismo producto en dos líneas se descuenta sumado
+    carrito_id = carrito_con(tienda, (1, 2, 10.0), (2, 1, 25.0), (1, 1, 10.0))
+    venta_id = tienda.finalizar_compra(carrito_id, usuario_id=1)
+
+    assert stock(tienda) == {1: 2, 2: 1}
+    assert estado_carrito(tienda, carrito_id) == 'completado'
+    assert consultar(tienda, 'SELECT usuario_id, carrito_id, total FROM ventas WHERE id = ?',
+                     (venta_id,)) == [(1, carrito_id, 55.0)]
+    detalles = consultar(tienda, '''
+        SELECT producto_id, cantidad, precio_unitario, subtotal FROM venta_detalles
+        WHERE venta_id = ? ORDER BY producto_id
+    ''', (venta_id,))
+    assert detalles == [(1, 3, 10.0, 30.0), (2, 1, 25.0, 25.0)]
+
+
+def test_total_indicado_se_respeta(tienda):
+    carrito_id = carrito_con(tienda, (1, 1, 10.0))
+    venta_id = tienda.finalizar_compra(carrito_id, usuario_id=1, total=8.0)
+    assert consultar(tienda, 'SELECT total FROM ventas WHERE id = ?', (venta_id,)) == [(8.0,)]
+
+
+def test_sin_stock_suficiente_no_se_aplica_nada(tienda):
+    carrito_id = carrito_con(tienda, (1, 1, 10.0), (2, 3, 25.0))
+    with pytest.raises(ValueError, match='Stock insuficiente para: Teclado'):
+        tienda.finalizar_compra(carrito_id, usuario_id=1)
+
+    assert stock(tienda) == {1: 5, 2: 2}
+    assert estado_carrito(tienda, carrito_id) == 'activo'
+    assert consultar(tienda, 'SELECT COUNT(*) FROM ventas') == [(0,)]
+    assert consultar(tienda, 'SELECT COUNT(*) FROM venta_detalles') == [(0,)]
+
+
+def test_producto_inexistente_cuenta_como_sin_stock(tienda):
+    carrito_id = carrito_con(tienda, (99, 1, 10.0))
+    with pytest.raises(ValueError, match='ID 99'):
+        tienda.finalizar_compra(carrito_id, usuario_id=1)
+
+
+def test_carrito_vacio_o_ya_completado(tienda):
+    vacio = carrito_con(tienda)
+    with pytest.raises(ValueError, match='vacío'):
+        tienda.finalizar_compra(vacio, usuario_id=1)
+
+    carrito_id = carrito_con(tienda, (1, 1, 10.0))
+    tienda.finalizar_compra(carrito_id, usuario_id=1)
+    with pytest.raises(ValueError, match='no está activo'):
+        tienda.finalizar_compra(carrito_id, usuario_id=1)
+    assert stock(tienda)[1] == 4
+
+
+def test_compras_simultaneas_no_venden_de_mas(tienda):
+    # Diez carritos de 1 teclado contra un stock de 2
+    carritos = [carrito_con(tienda, (2, 1, 25.0)) for _ in range(10)]
+    ventas, errores = [], []
+
+    def comprar(carrito_id):
+        try:
+            ventas.append(tienda.finalizar_compra(carrito_id, usuario_id=1))
+        except ValueError as e:
+            errores.append(str(e))
+
+    hilos = [threading.Thread(target=comprar, args=(c,)) for c in carritos]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert (len(ventas), len(errores)) == (2, 8)
+    assert stock(tienda)[2] == 0
@@ -0,0 +1,57 @@
+# tests/test_coherencia_inventario.py
+"""
+Coherencia del Inventario con escrituras hechas fuera de él (otro worker,
+la consola, la sincronización): refrescar_cambios lee solo los ids
+cambiados y deja memoria, índices y base de acuerdo.
+"""
+
+from models.inventario import Inventario
+
+
+def productos_iniciales(cantidad):
+    return [{'id': id, 'nombre': f"Teclado {id}", 'precio': 10.0 + id, 'cantidad': id,
+             'categoria': Inventario.CATEGORIAS_VALIDAS[id % len(Inventario.CATEGORIAS_VALIDAS)],
+             'descripcion': ''}
+            for id in range(1, cantidad + 1)]
+
+
+def en_memoria(inventario):
+    return {p.id: (p.nombre, p.precio, p.cantidad, p.categoria) for p in inventario.obtener_todos()}
+
+
+def en_bd(inventario):
+    return {p.id: (p.nombre, p.precio, p.cantidad, p.categoria)
+            for p in inventario.db.obtener_todos_productos()}
+
+
+def test_refrescar_sin_cambios_externos_no_toca_nada(inventario):
+    inventario.agregar_productos_lote(productos_iniciales(20))
+    # Los cambios propios también figuran en la secuencia: releerlos no cambia nada
+    inventario.refrescar_cambios()
+    assert inventario.refrescar_cambios() == []
+    assert inventario.verificar_consistencia() == []
+    assert en_memoria(inventario) == en_bd(inventario)
+
+
+def test_refrescar_cambios_hechos_fuera_del_inventario(inventario):
+    inventario.agregar_productos_lote(productos_iniciales(20))
+    inventario.refrescar_cambios()
+
+    # Otro proceso escribe directo en la base
+    conexion = inventario.db.get_connection()
+    conexion.execute("UPDATE productos SET precio = 99.5, categoria = 'audio' WHERE id IN (1, 2, 3)")
+    conexion.execute("DELETE FROM productos WHERE id IN (4, 5)")
+    conexion.execute("INSERT INTO productos (id, nombre, precio, cantidad, categoria, descripcion) "
+                     "VALUES (100, 'Mouse externo', 12.5, 3, 'perifericos', '')")
+    conexion.commit()
+
+    assert sorted(inventario.refrescar_cambios()) == [1, 2, 3, 4, 5, 100]
+    assert inventario.refrescar_cambios() == []
+    assert [p.id for p in inventario.autocompletar('mouse ext')] == [100]
+    assert inventario.obtener_producto_por_id(4) is None
+    assert {p.id for p in inventario.obtener_por_categoria('audio')} >= {1, 2, 3}
+
+    assert inventario.verificar_consistencia() == []
+    assert en_memoria(inventario) == en_bd(inventario)
+    estadisticas = inventario.obtener_estadisticas()
+    assert estadisticas['total_productos'] == 19
@@ -0,0 +1,69 @@
+# tests/test_cortacircuitos.py
+"""
+Cortacircuitos de las llamadas a MySQL, con el reloj manual de conftest.py
+"""
+
+import pytest
+
+from database.conexion import CircuitoAbierto, Cortacircuitos
+
+
+def test_se_abre_tras_el_umbral_de_fallos(cortacircuitos):
+    for _ in range(2):
+        assert cortacircuitos.permitir() is False
+        cortacircuitos.registrar_fallo()
+    assert cortacircuitos.estado()['estado'] == Cortacircuitos.CERRADO
+
+    cortacircuitos.registrar_fallo()
+    assert cortacircuitos.estado()['estado'] == Cortacircuitos.ABIERTO
+    with pytest.raises(CircuitoAbierto):
+        cortacircuitos.permitir()
+    assert cortacircuitos.estado()['rechazadas'] == 1
+
+
+def test_un_exito_reinicia_los_fallos_consecutivos(cortacircuitos):
+    cortacircuitos.registrar_fallo()
+    cortacircuitos.registrar_fallo()
+    cortacircuitos.registrar_exito()
+    cortacircuitos.registrar_fallo()
+    cortacircuitos.registrar_fallo()
+    assert cortacircuitos.estado()['estado'] == Cortacircuitos.CERRADO
+
+
+def test_una_sola_prueba_en_semi_abierto(cortacircuitos, reloj):
+    for _ in range(3):
+        cortacircuitos.registrar_fallo()
+    reloj.avanzar(1.0)
+    assert cortacircuitos.permitir() is True
+    assert cortacircuitos.estado()['estado'] == Cortacircuitos.SEMI_ABIERTO
+    with pytest.raises(CircuitoAbierto):
+        cortacircuitos.permitir()
+
+    # Sin veredicto se permite otra prueba; un éxito de la prueba cierra
+    cortacircuitos.cancelar_sondeo()
+    assert cortacircuitos.permitir() is True
+    cortacircuitos.registrar_exito(sondeo=True)
+    assert cortacircuitos.estado()['estado'] == Cortacircuitos.CERRADO
+    assert cortacircuitos.permitir() is False
+
+
+def test_la_espera_crece_hasta_el_maximo(cortacircuitos, reloj):
+    for _ in range(3):
+        cortacircuitos.registrar_fallo()
+    esperas = []
+    for _ in range(4):
+        esperas.append(cortacircuitos.estado()['reabre_en_segundos'])
+        reloj.avanzar(esperas[-1])
+        assert cortacircuitos.permitir() is True
+        # La prueba falla: se vuelve a abrir con el doble de espera
+        cortacircuitos.registrar_fallo()
+    assert esperas == [1.0, 2.0, 4.0, 4.0]
+
+
+def test_un_exito_que_no_es_la_prueba_no_cierra(cortacircuitos, reloj):
+    for _ in range(3):
+        cortacircuitos.registrar_fallo()
+    reloj.avanzar(1.0)
+    cortacircuitos.permitir()
+    cortacircuitos.registrar_exito()
+    assert cortacircuitos.estado()['estado'] == Cortacircuitos.SEMI_ABIERTO
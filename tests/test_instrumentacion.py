@@ -0,0 +1,65 @@
+# tests/test_instrumentacion.py
+"""
+Cursores instrumentados de SQLite: métricas por sentencia, consultas
+lentas con su plan y cursores abandonados.
+"""
+
+import gc
+import logging
+import sqlite3
+
+import pytest
+
+from database import instrumentacion
+from database.instrumentacion import ConexionInstrumentada, MetricasConsultas
+
+
+@pytest.fixture
+def metricas(monkeypatch, tmp_path):
+    # Umbral 0: todas las consultas cuentan como lentas
+    metricas = MetricasConsultas(umbral_ms=0, archivo_lentas=str(tmp_path / 'lentas.jsonl'))
+    monkeypatch.setattr(instrumentacion, 'METRICAS', metricas)
+    return metricas
+
+
+@pytest.fixture
+def conexion():
+    conexion = sqlite3.connect(':memory:', factory=ConexionInstrumentada)
+    conexion.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, nombre TEXT)")
+    conexion.executemany("INSERT INTO t (nombre) VALUES (?)", [('a',), ('b',), ('c',)])
+    yield conexion
+    conexion.close()
+
+
+def test_agrupa_por_sentencia_y_cuenta_filas(metricas, conexion):
+    for id in (1, 2):
+        conexion.execute("SELECT * FROM t WHERE id IN (?, ?)", (id, id + 1)).fetchall()
+    datos = metricas.obtener()['sqlite']['SELECT * FROM t WHERE id IN (?...)']
+    assert (datos['ejecuciones'], datos['filas']) == (2, 4)
+
+
+def test_el_explain_de_una_lenta_no_se_instrumenta(metricas, conexion):
+    conexion.execute("SELECT nombre FROM t WHERE id = ?", (1,)).fetchall()
+    lenta = [e for e in metricas.lentas() if e['sentencia'].startswith('SELECT nombre')][0]
+    assert lenta['plan'] and 'No se pudo' not in str(lenta['plan'])
+    assert not any('EXPLAIN' in sentencia for sentencia in metricas.obtener()['sqlite'])
+
+
+def test_error_al_escribir_lentas_va_al_logger(metricas, conexion, tmp_path, caplog):
+    metricas.archivo_lentas = str(tmp_path / 'no_existe' / 'lentas.jsonl')
+    with caplog.at_level(logging.WARNING, logger=instrumentacion.logger.name):
+        conexion.execute("SELECT 1").fetchall()
+    assert any('No se pudo escribir' in r.getMessage() for r in caplog.records)
+
+
+def test_cursor_abandonado_solo_anota_el_tiempo(metricas, conexion, tmp_path):
+    cursor = conexion.execute("SELECT * FROM t")
+    cursor.fetchone()
+    lentas_antes = len(metricas.lentas())
+    del cursor
+    gc.collect()
+
+    # Ni plan ni archivo desde __del__; la ejecución se suma al consultar
+    assert len(metricas.lentas()) == lentas_antes
+    datos = metricas.obtener()['sqlite']['SELECT * FROM t']
+    assert (datos['ejecuciones'], datos['filas']) == (1, 1)
@@ -0,0 +1,111 @@
+# tests/test_inventario.py
+"""
+Operaciones CRUD y por lote al azar sobre el Inventario: después de cada
+una, los índices y totales mantenidos deben coincidir con un cálculo
+desde cero (verificar_consistencia) y con la base de datos.
+"""
+
+import random
+
+import pytest
+
+from models.inventario import Inventario
+
+CATEGORIAS = Inventario.CATEGORIAS_VALIDAS
+TIPOS = ['Audífonos', 'Mouse', 'Teclado Mecánico', 'Monitor', 'Laptop', 'Webcam']
+
+
+def datos_al_azar(azar, id=None):
+    datos = {
+        'nombre': f"{azar.choice(TIPOS)} {azar.randint(1, 999)}",
+        'precio': round(azar.uniform(1, 500), 2),
+        'cantidad': azar.randint(0, 30),
+        'categoria': azar.choice(CATEGORIAS),
+        'descripcion': azar.choice(["", "Producto de prueba"]),
+    }
+    if id is not None:
+        datos['id'] = id
+    return datos
+
+
+def cambios_al_azar(azar):
+    """Subconjunto no vacío de campos, como en actualizar_producto(**kwargs)"""
+    datos = datos_al_azar(azar)
+    campos = azar.sample(sorted(datos), azar.randint(1, len(datos)))
+    return {campo: datos[campo] for campo in campos}
+
+
+def comprobar(inventario):
+    assert inventario.verificar_consistencia() == []
+
+    productos = inventario.obtener_todos()
+    estadisticas = inventario.obtener_estadisticas()
+    assert estadisticas['total_productos'] == len(productos)
+    assert estadisticas['valor_total'] == pytest.approx(sum(p.precio * p.cantidad for p in productos))
+    por_categoria = {}
+    for p in productos:
+        por_categoria[p.categoria] = por_categoria.get(p.categoria, 0) + 1
+    assert estadisticas['productos_por_categoria'] == por_categoria
+
+    # La memoria refleja la base
+    en_bd = {p.id: (p.nombre, p.precio, p.cantidad, p.categoria)
+             for p in inventario.db.obtener_todos_productos()}
+    assert {p.id: (p.nombre, p.precio, p.cantidad, p.categoria) for p in productos} == en_bd
+
+
+@pytest.mark.parametrize('semilla', [1, 2, 3])
+def test_crud_al_azar_mantiene_indices(inventario, semilla):
+    azar = random.Random(semilla)
+    siguiente_id = 1
+    for _ in range(300):
+        ids = list(inventario.productos)
+        operacion = azar.choice(['agregar', 'agregar', 'actualizar', 'actualizar', 'eliminar'])
+        if operacion == 'agregar' or not ids:
+            inventario.agregar_producto(siguiente_id, **datos_al_azar(azar))
+            siguiente_id += 1
+        elif operacion == 'actualizar':
+            assert inventario.actualizar_producto(azar.choice(ids), **cambios_al_azar(azar))
+        else:
+            assert inventario.eliminar_producto(azar.choice(ids))
+        comprobar(inventario)
+
+
+@pytest.mark.parametrize('semilla', [1, 2])
+def test_lotes_al_azar_mantienen_indices(inventario, semilla):
+    azar = random.Random(semilla)
+    siguiente_id = 1
+    for _ in range(30):
+        ids = list(inventario.productos)
+        operacion = azar.choice(['agregar', 'actualizar', 'eliminar']) if ids else 'agregar'
+        cantidad = azar.randint(1, 40)
+        if operacion == 'agregar':
+            # Uno de cada diez con id repetido: se informa como conflicto
+            lote = []
+            for _ in range(cantidad):
+                if ids and azar.random() < 0.1:
+                    lote.append(datos_al_azar(azar, azar.choice(ids)))
+                else:
+                    lote.append(datos_al_azar(azar, siguiente_id))
+                    siguiente_id += 1
+            resumen = inventario.agregar_productos_lote(lote)
+        elif operacion == 'actualizar':
+            lote = [dict(cambios_al_azar(azar), id=azar.choice(ids + [-1])) for _ in range(cantidad)]
+            resumen = inventario.actualizar_productos_lote(lote)
+        else:
+            lote = azar.sample(ids, min(cantidad, len(ids))) + [-1]
+            resumen = inventario.eliminar_productos_lote(lote)
+        assert resumen['procesados'] == len(lote)
+        comprobar(inventario)
+
+
+def test_lote_grande_reconstruye_indices(inventario):
+    azar = random.Random(7)
+    total = Inventario.UMBRAL_RECONSTRUIR + 50
+    inventario.agregar_productos_lote([datos_al_azar(azar, id) for id in range(1, total + 1)])
+    comprobar(inventario)
+    inventario.actualizar_productos_lote([dict(cambios_al_azar(azar), id=id) for id in range(1, total + 1)])
+    comprobar(inventario)
+    inventario.eliminar_productos_lote(range(1, total, 2))
+    comprobar(inventario)
+    assert len(inventario) == total // 2
+
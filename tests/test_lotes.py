@@ -0,0 +1,102 @@
+# tests/test_lotes.py
+"""
+Altas, cambios y bajas por lote de productos (DatabaseManager e
+Inventario): conflictos por fila sin abortar el resto, partición en lotes
+y aviso de cada lote recién confirmado.
+"""
+
+import pytest
+
+
+def producto(id, nombre=None, precio=10.0, cantidad=5, categoria='perifericos'):
+    return {'id': id, 'nombre': nombre or f"Mouse {id}", 'precio': precio,
+            'cantidad': cantidad, 'categoria': categoria, 'descripcion': ''}
+
+
+def ids_en_bd(db):
+    return sorted(p.id for p in db.obtener_todos_productos())
+
+
+def test_insertar_lote_informa_ids_repetidos(db):
+    db.insertar_productos_lote([producto(1)])
+    resumen = db.insertar_productos_lote([producto(1), producto(2), producto(2), producto(3)])
+    assert (resumen['procesados'], resumen['insertados']) == (4, 2)
+    assert resumen['conflictos'] == [(1, 'El ID ya existe'), (2, 'El ID ya existe')]
+    assert ids_en_bd(db) == [1, 2, 3]
+
+
+def test_una_fila_invalida_no_aborta_su_lote(db):
+    # nombre NULL viola NOT NULL: el lote se repite fila por fila
+    resumen = db.insertar_productos_lote([producto(1), dict(producto(2), nombre=None), producto(3)])
+    assert resumen['insertados'] == 2
+    assert [id for id, _ in resumen['conflictos']] == [2]
+    assert 'NOT NULL' in resumen['conflictos'][0][1]
+    assert ids_en_bd(db) == [1, 3]
+
+
+def test_actualizar_y_eliminar_informan_ids_inexistentes(db):
+    db.insertar_productos_lote([producto(id) for id in (1, 2, 3)])
+
+    resumen = db.actualizar_productos_lote([{'id': 1, 'precio': 99.0}, {'id': 7, 'precio': 1.0},
+                                            {'id': 2, 'cantidad': 0, 'nombre': None}])
+    assert (resumen['procesados'], resumen['actualizados']) == (3, 2)
+    assert resumen['conflictos'] == [(7, 'El producto no existe')]
+    # Los campos ausentes o en None conservan su valor
+    uno, dos = db.obtener_producto_por_id(1), db.obtener_producto_por_id(2)
+    assert (uno.precio, uno.cantidad) == (99.0, 5)
+    assert (dos.nombre, dos.cantidad) == ('Mouse 2', 0)
+
+    # Un id repetido se elimina una vez y la repetición es un conflicto
+    resumen = db.eliminar_productos_lote([3, 8, 3])
+    assert (resumen['procesados'], resumen['eliminados']) == (3, 1)
+    assert resumen['conflictos'] == [(8, 'El producto no existe'), (3, 'El producto no existe')]
+    assert ids_en_bd(db) == [1, 2]
+
+
+def test_lotes_de_tamano_fijo_avisan_tras_el_commit(db):
+    avisos = []
+
+    def al_confirmar(filas):
+        # Se llama fuera de la transacción: lo avisado ya se lee confirmado
+        assert all(db.obtener_producto_por_id(f[0]) is not None for f in filas)
+        avisos.append([f[0] for f in filas])
+
+    resumen = db.insertar_productos_lote((producto(id) for id in range(1, 8)),
+                                         tamano_lote=3, al_confirmar_lote=al_confirmar)
+    assert resumen['insertados'] == 7
+    assert avisos == [[1, 2, 3], [4, 5, 6], [7]]
+
+    avisos = []
+    db.actualizar_productos_lote([{'id': id, 'cantidad': 0} for id in range(1, 6)],
+                                 tamano_lote=2, al_confirmar_lote=avisos.append)
+    assert avisos == [[(1, {'cantidad': 0}), (2, {'cantidad': 0})],
+                      [(3, {'cantidad': 0}), (4, {'cantidad': 0})],
+                      [(5, {'cantidad': 0})]]
+
+    avisos = []
+    db.eliminar_productos_lote([1, 2, 99, 3], tamano_lote=2, al_confirmar_lote=avisos.append)
+    assert avisos == [[1, 2], [3]]
+
+
+def test_sin_filas_aplicadas_no_hay_aviso(db):
+    avisos = []
+    resumen = db.eliminar_productos_lote([1, 2], al_confirmar_lote=avisos.append)
+    assert resumen['eliminados'] == 0 and avisos == []
+
+
+def test_error_al_aplicar_un_lote_resincroniza(inventario, monkeypatch):
+    inventario.agregar_productos_lote([producto(id) for id in range(1, 11)])
+
+    # Falla solo la primera vez: el lote queda a medio aplicar en memoria
+    indexar = inventario._indexar
+    def falla_una_vez(producto, campos=None):
+        monkeypatch.setattr(inventario, '_indexar', indexar)
+        raise RuntimeError("falla al indexar")
+    monkeypatch.setattr(inventario, '_indexar', falla_una_vez)
+    with pytest.raises(RuntimeError):
+        inventario.actualizar_productos_lote([{'id': 1, 'precio': 1.5}, {'id': 2, 'cantidad': 0}])
+
+    # El lote quedó confirmado en la base y la memoria se resincronizó
+    assert inventario.obtener_producto_por_id(1).precio == 1.5
+    assert inventario.obtener_producto_por_id(2).cantidad == 0
+    assert inventario.verificar_consistencia() == []
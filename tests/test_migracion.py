@@ -0,0 +1,166 @@
+# tests/test_migracion.py
+"""
+MigradorTablas y Checkpoint: copia por trozos, corte a mitad de tabla y
+reanudación desde el último trozo confirmado, filas que ya existían y
+filas nuevas en tablas terminadas.
+
+Origen y destino son bases SQLite que aceptan el SQL de MySQL del
+migrador (%s y ON DUPLICATE KEY UPDATE sin cambios).
+"""
+
+import json
+import re
+import sqlite3
+
+import pytest
+
+from services.migracion_service import Checkpoint, MigradorTablas, formato_duracion
+
+TABLAS = {
+    'productos': {'clave': 'id', 'columnas': ('id', 'nombre')},
+    'usuarios': {'clave': 'id_usuario', 'columnas': ('id_usuario', 'mail')},
+}
+
+
+class CursorFalso:
+    def __init__(self, conexion, inserts_permitidos):
+        self.cursor = conexion.cursor()
+        self.inserts_permitidos = inserts_permitidos
+        self.rowcount = -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, parametros=()):
+        sql = re.sub(r'ON DUPLICATE KEY UPDATE (\w+) = \1', 'ON CONFLICT DO NOTHING', sql.replace('%s', '?'))
+        if 'INSERT' in sql and self.inserts_permitidos is not None:
+            if self.inserts_permitidos[0] == 0:
+                raise sqlite3.OperationalError("Lost connection to MySQL server during query")
+            self.inserts_permitidos[0] -= 1
+        self.cursor.execute(sql, parametros)
+        self.rowcount = self.cursor.rowcount
+
+    def fetchone(self):
+        return self.cursor.fetchone()
+
+    def fetchall(self):
+        return self.cursor.fetchall()
+
+
+class ConexionFalsa:
+    def __init__(self, ruta, inserts_permitidos=None):
+        self.conexion = sqlite3.connect(ruta)
+        self.conexion.row_factory = lambda cursor, fila: {
+            columna[0]: valor for columna, valor in zip(cursor.description, fila)
+        }
+        self.inserts_permitidos = inserts_permitidos
+
+    def cursor(self):
+        return CursorFalso(self.conexion, self.inserts_permitidos)
+
+    def commit(self):
+        self.conexion.commit()
+
+    def rollback(self):
+        self.conexion.rollback()
+
+    def close(self):
+        self.conexion.close()
+
+
+def crear_base(ruta, productos=(), usuarios=()):
+    conexion = sqlite3.connect(ruta)
+    conexion.execute("CREATE TABLE productos (id INTEGER PRIMARY KEY, nombre TEXT)")
+    conexion.execute("CREATE TABLE usuarios (id_usuario INTEGER PRIMARY KEY, mail TEXT UNIQUE)")
+    conexion.executemany("INSERT INTO productos VALUES (?, ?)", productos)
+    conexion.executemany("INSERT INTO usuarios VALUES (?, ?)", usuarios)
+    conexion.commit()
+    conexion.close()
+
+
+def contar(ruta, tabla):
+    conexion = sqlite3.connect(ruta)
+    try:
+        return conexion.execute(f"SELECT COUNT(*) FROM {tabla}").fetchone()[0]
+    finally:
+        conexion.close()
+
+
+@pytest.fixture
+def bases(tmp_path):
+    origen, destino = str(tmp_path / 'origen.db'), str(tmp_path / 'destino.db')
+    crear_base(origen, productos=[(i, f"Producto {i}") for i in range(1, 2501)],
+               usuarios=[(i, f"u{i}@tienda.com") for i in range(1, 40)])
+    # En el destino ya hay un producto con el id 7 y otra cuenta con el mail de u5
+    crear_base(destino, productos=[(7, 'Ya migrado')], usuarios=[(100, 'u5@tienda.com')])
+    return origen, destino
+
+
+def migrador(bases, checkpoint, inserts_permitidos=None):
+    origen, destino = bases
+    return MigradorTablas(lambda: ConexionFalsa(origen),
+                          lambda: ConexionFalsa(destino, inserts_permitidos),
+                          checkpoint, tamano_trozo=1000, hilos=2)
+
+
+def test_copia_por_trozos_y_omite_lo_existente(bases, tmp_path):
+    resultados = migrador(bases, Checkpoint(str(tmp_path / 'avance.json'))).ejecutar(TABLAS)
+    assert resultados['productos'] == {'ultimo': 2500, 'copiadas': 2500, 'insertadas': 2499, 'terminada': True}
+    assert resultados['usuarios'] == {'ultimo': 39, 'copiadas': 39, 'insertadas': 38, 'terminada': True}
+    assert contar(bases[1], 'productos') == 2500
+    assert contar(bases[1], 'usuarios') == 39
+
+
+def test_corte_a_mitad_de_tabla_se_reanuda_desde_el_checkpoint(bases, tmp_path):
+    ruta = str(tmp_path / 'avance.json')
+    # Se confirma el primer trozo y se corta la conexión en el segundo
+    resultados = migrador(bases, Checkpoint(ruta), inserts_permitidos=[1]).ejecutar(
+        {'productos': TABLAS['productos']}
+    )
+    assert isinstance(resultados['productos'], sqlite3.OperationalError)
+    with open(ruta, encoding='utf-8') as archivo:
+        assert json.load(archivo)['productos'] == {'ultimo': 1000, 'copiadas': 1000,
+                                                   'insertadas': 999, 'terminada': False}
+    # El trozo cortado se deshizo entero
+    assert contar(bases[1], 'productos') == 1000
+
+    # Otra ejecución lee el archivo y sigue después del id 1000
+    resultados = migrador(bases, Checkpoint(ruta)).ejecutar(TABLAS)
+    assert resultados['productos'] == {'ultimo': 2500, 'copiadas': 2500, 'insertadas': 2499, 'terminada': True}
+    assert contar(bases[1], 'productos') == 2500
+
+
+def test_tabla_terminada_copia_solo_filas_nuevas(bases, tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / 'avance.json'))
+    migrador(bases, checkpoint).ejecutar(TABLAS)
+    assert migrador(bases, checkpoint).ejecutar(TABLAS)['productos']['copiadas'] == 2500
+
+    conexion = sqlite3.connect(bases[0])
+    conexion.executemany("INSERT INTO productos VALUES (?, ?)", [(i, f"Producto {i}") for i in range(2501, 2511)])
+    conexion.commit()
+    conexion.close()
+    avance = migrador(bases, checkpoint).ejecutar(TABLAS)['productos']
+    assert (avance['ultimo'], avance['copiadas'], avance['insertadas']) == (2510, 2510, 2509)
+    assert contar(bases[1], 'productos') == 2510
+
+
+def test_checkpoint_guarda_y_borra(tmp_path):
+    ruta = str(tmp_path / 'avance.json')
+    checkpoint = Checkpoint(ruta)
+    assert checkpoint.avance('productos') == {'ultimo': None, 'copiadas': 0, 'insertadas': 0, 'terminada': False}
+    checkpoint.guardar('productos', {'ultimo': 5, 'copiadas': 5, 'insertadas': 5, 'terminada': False})
+    assert Checkpoint(ruta).avance('productos')['ultimo'] == 5
+    assert not (tmp_path / 'avance.json.tmp').exists()
+
+    checkpoint.borrar()
+    assert not (tmp_path / 'avance.json').exists()
+    assert checkpoint.avance('productos')['ultimo'] is None
+
+
+def test_formato_duracion():
+    assert formato_duracion(12.5) == '12s'
+    assert formato_duracion(125) == '2m 05s'
+    assert formato_duracion(3725) == '1h 02m'
@@ -0,0 +1,110 @@
+# tests/test_outbox.py
+"""
+DespachadorOutbox contra una base SQLite temporal, con el manejador de
+MySQL reemplazado: lotes, reintentos, mensajes fallidos y conflictos de
+cuentas.
+"""
+
+import pymysql
+import pytest
+
+from database.db_manager import DatabaseManager
+from services.outbox_service import DespachadorOutbox, clasificar_usuarios
+
+
+def encolar(db, *cargas):
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        for carga in cargas:
+            DatabaseManager._encolar_outbox(cursor, 'usuario', carga)
+
+
+class MySQLFalso:
+    """Manejador de 'usuario' que registra lo aplicado y falla a pedido"""
+
+    def __init__(self):
+        self.aplicados = []
+        self.caido = False
+        self.rechazar = set()     # ids en conflicto con otra cuenta
+
+    def __call__(self, cargas):
+        if self.caido:
+            raise pymysql.err.OperationalError(2003, "Can't connect to MySQL server")
+        if any(c.get('mail_largo') for c in cargas):
+            raise pymysql.err.DataError(1406, "Data too long for column 'mail'")
+        rechazos = {i: f"El id {c['id']} ya es de otra cuenta"
+                    for i, c in enumerate(cargas) if c['id'] in self.rechazar}
+        self.aplicados += [c['id'] for i, c in enumerate(cargas) if i not in rechazos]
+        return rechazos
+
+
+@pytest.fixture
+def mysql():
+    return MySQLFalso()
+
+
+@pytest.fixture
+def despachador(db, mysql):
+    despachador = DespachadorOutbox(db, tamano_lote=10)
+    despachador.manejadores['usuario'] = mysql
+    # Sin espera: los reintentos quedan disponibles enseguida
+    despachador.ESPERA_BASE = 0.0
+    return despachador
+
+
+def test_un_lote_se_aplica_y_se_borra(db, despachador, mysql):
+    encolar(db, *({'id': i} for i in range(1, 6)))
+    assert despachador.despachar() == 5
+    assert mysql.aplicados == [1, 2, 3, 4, 5]
+    assert db.estado_outbox()['pendientes'] == 0
+
+
+def test_un_mensaje_malo_no_frena_a_su_lote(db, despachador, mysql):
+    encolar(db, {'id': 1}, {'id': 2, 'mail_largo': True}, {'id': 3})
+    assert despachador.despachar() == 2
+    assert mysql.aplicados == [1, 3]
+
+    # Se reintentó solo hasta MAX_INTENTOS y quedó fallido
+    estado = db.estado_outbox()
+    assert (estado['pendientes'], estado['fallidos']) == (0, 1)
+    assert estado['max_intentos'] == DespachadorOutbox.MAX_INTENTOS
+    assert db.reclamar_outbox() == []
+
+
+def test_sin_conexion_se_reintenta_sin_descartar(db, despachador, mysql):
+    encolar(db, {'id': 1}, {'id': 2})
+    mysql.caido = True
+    assert despachador.despachar() == 0
+    estado = db.estado_outbox()
+    assert (estado['pendientes'], estado['fallidos'], estado['max_intentos']) == (2, 0, 1)
+
+    mysql.caido = False
+    assert despachador.despachar() == 2
+
+
+def test_conflicto_de_cuenta_queda_fallido_y_se_puede_reactivar(db, despachador, mysql):
+    mysql.rechazar = {2}
+    encolar(db, {'id': 1}, {'id': 2})
+    assert despachador.despachar() == 1
+    assert db.estado_outbox()['fallidos'] == 1
+
+    mysql.rechazar = set()
+    assert db.reactivar_outbox() == 1
+    assert despachador.despachar() == 1
+    assert mysql.aplicados == [1, 2]
+
+
+def test_clasificar_usuarios_no_pisa_otras_cuentas():
+    existentes = [{'id_usuario': 1, 'mail': 'ana@tienda.com'},
+                  {'id_usuario': 2, 'mail': 'beto@tienda.com'}]
+    usuarios = [
+        {'id': 1, 'email': 'ANA@tienda.com'},     # misma cuenta
+        {'id': 2, 'email': 'otro@tienda.com'},    # id de otra cuenta
+        {'id': 3, 'email': 'beto@tienda.com'},    # mail de otra cuenta
+        {'id': 4, 'email': 'nuevo@tienda.com'},
+        {'id': 5, 'email': 'nuevo@tienda.com'},   # mismo mail que el anterior, en el mismo lote
+    ]
+    nuevos, propios, rechazos = clasificar_usuarios(usuarios, existentes)
+    assert [u['id'] for u in nuevos] == [4]
+    assert [u['id'] for u in propios] == [1]
+    assert sorted(rechazos) == [1, 2, 4]
@@ -0,0 +1,104 @@
+# tests/test_paginacion.py
+"""
+Paginación por clave (keyset): cursores, límites y recorrido completo de
+productos y usuarios sin filas repetidas ni salteadas.
+"""
+
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from database import paginacion
+
+
+def test_normalizar_limite_y_orden():
+    assert paginacion.normalizar_limite('20') == 20
+    assert paginacion.normalizar_limite('abc') == paginacion.LIMITE_POR_DEFECTO
+    assert paginacion.normalizar_limite(None) == paginacion.LIMITE_POR_DEFECTO
+    assert paginacion.normalizar_limite(0) == 1
+    assert paginacion.normalizar_limite(10_000) == paginacion.LIMITE_MAXIMO
+    assert paginacion.normalizar_orden('precio') == 'precio'
+    assert paginacion.normalizar_orden('nombre; DROP TABLE productos') == 'id'
+
+
+def test_cursores_ida_y_vuelta():
+    fila = {'id': 7, 'precio': 12.5, 'cantidad': 3}
+    for orden, esperado in (('id', (None, 7)), ('precio', (12.5, 7)), ('cantidad', (3, 7))):
+        assert paginacion.decodificar_cursor(paginacion.codificar_cursor(fila, orden), orden) == esperado
+    # Cursores ausentes o alterados: primera página
+    for after, orden in (('', 'id'), ('x', 'id'), ('12.5', 'precio'), ('a:b', 'cantidad')):
+        assert paginacion.decodificar_cursor(after, orden) is None
+
+
+def test_condicion_keyset():
+    assert paginacion.condicion_keyset('id', None) == ('', [])
+    assert paginacion.condicion_keyset('id', (None, 4)) == ('id > ?', [4])
+    assert paginacion.condicion_keyset('precio', (9.5, 4), marcador='%s') == (
+        'precio >= %s AND (precio > %s OR id > %s)', [9.5, 9.5, 4])
+
+
+def test_siguiente_pagina_recorta_la_fila_extra():
+    filas = [{'id': i} for i in (1, 2, 3)]
+    assert paginacion.siguiente_pagina(filas, 2, 'id') == (filas[:2], '2')
+    assert paginacion.siguiente_pagina(filas, 3, 'id') == (filas, None)
+
+
+@pytest.fixture
+def catalogo(db):
+    # Precios y cantidades con muchos empates: el id debe desempatar
+    azar = random.Random(3)
+    db.insertar_productos_lote(
+        {'id': id, 'nombre': f"Mouse {id}", 'precio': azar.choice([5.0, 9.99, 10.0, 25.5]),
+         'cantidad': azar.randint(0, 4), 'categoria': azar.choice(['audio', 'perifericos']),
+         'descripcion': ''}
+        for id in range(1, 58)
+    )
+    return db
+
+
+def recorrer(obtener_pagina, **filtros):
+    vistas, after, paginas = [], None, 0
+    while True:
+        filas, after = obtener_pagina(after=after, **filtros)
+        vistas += filas
+        paginas += 1
+        if after is None:
+            return vistas, paginas
+
+
+@pytest.mark.parametrize('orden', paginacion.ORDENES_PRODUCTOS)
+def test_recorrer_productos_por_cada_orden(catalogo, orden):
+    vistas, paginas = recorrer(catalogo.obtener_productos_pagina, limite=10, orden=orden)
+    assert paginas == 6
+    assert sorted(p.id for p in vistas) == list(range(1, 58))
+    clave = (lambda p: p.id) if orden == 'id' else (lambda p: (getattr(p, orden), p.id))
+    assert vistas == sorted(vistas, key=clave)
+
+
+@pytest.mark.parametrize('orden', paginacion.ORDENES_PRODUCTOS)
+def test_recorrer_con_filtros_y_columnas(catalogo, orden):
+    vistas, _ = recorrer(catalogo.obtener_productos_pagina, limite=4, orden=orden,
+                         categoria='audio', stock_maximo=2, columnas=('nombre',))
+    esperados = {p.id for p in catalogo.obtener_todos_productos()
+                 if p.categoria == 'audio' and p.cantidad <= 2}
+    assert sorted(p.id for p in vistas) == sorted(esperados)
+    assert [(getattr(p, orden), p.id) for p in vistas] == sorted((getattr(p, orden), p.id) for p in vistas)
+    # La proyección agrega el id y la columna de orden, que hacen falta para el cursor
+    assert set(vistas[0]._fields) == {'id', orden, 'nombre'}
+
+
+def test_pagina_exacta_no_deja_cursor(catalogo):
+    filas, after = catalogo.obtener_productos_pagina(limite=57)
+    assert len(filas) == 57 and after is None
+
+
+def test_recorrer_usuarios_sin_password(db):
+    for i in range(1, 24):
+        db.insertar_usuario(SimpleNamespace(nombre=f"Usuario {i}", email=f"u{i}@tienda.com",
+                                            password='secreta', fecha_nacimiento='2000-01-01',
+                                            proveedor='local'))
+    vistos, paginas = recorrer(db.obtener_usuarios_pagina, limite=5)
+    assert paginas == 5
+    assert [u.id for u in vistos] == list(range(1, 24))
+    assert 'password' not in vistos[0]._fields
@@ -0,0 +1,143 @@
+# tests/test_pool.py
+"""
+PoolMySQL sin servidor: la función que abre conexiones se reemplaza por
+un doble de prueba y el cortacircuitos usa el reloj manual de conftest.py.
+"""
+
+import pymysql
+import pytest
+from pymysql.constants import SERVER_STATUS
+
+from database.conexion import CircuitoAbierto, Cortacircuitos, PoolAgotado, PoolMySQL
+
+
+class ConexionFalsa:
+    """Lo que el pool usa de una conexión de pymysql"""
+
+    def __init__(self):
+        self.open = True
+        self.server_status = 0
+        self.caida = False
+        self.pings = 0
+        self.rollbacks = 0
+
+    def ping(self, reconnect=False):
+        self.pings += 1
+        if self.caida:
+            self.open = False
+            raise pymysql.err.OperationalError(2013, "Lost connection to MySQL server")
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.server_status = 0
+
+    def close(self):
+        self.open = False
+
+
+class Servidor:
+    """Función conectar del pool: abre ConexionFalsa o falla si está caído"""
+
+    def __init__(self):
+        self.caido = False
+        self.conexiones = []
+
+    def __call__(self, **config):
+        if self.caido:
+            raise pymysql.err.OperationalError(2003, "Can't connect to MySQL server")
+        conexion = ConexionFalsa()
+        self.conexiones.append(conexion)
+        return conexion
+
+
+@pytest.fixture
+def servidor():
+    return Servidor()
+
+
+@pytest.fixture
+def pool(servidor, cortacircuitos):
+    return PoolMySQL({}, minimo=0, maximo=2, timeout=0, ping_tras=0, conectar=servidor,
+                     cortacircuitos=cortacircuitos, reintentos=0)
+
+
+def test_reutiliza_la_conexion_devuelta(pool, servidor):
+    with pool.obtener():
+        pass
+    with pool.obtener():
+        pass
+    assert len(servidor.conexiones) == 1
+    assert pool.estadisticas()['prestamos'] == 2
+
+
+def test_sin_conexiones_libres_se_agota(pool):
+    prestadas = [pool.obtener(), pool.obtener()]
+    with pytest.raises(PoolAgotado):
+        pool.obtener()
+    prestadas[0].close()
+    pool.obtener().close()
+    prestadas[1].close()
+
+
+def test_descarta_la_conexion_que_no_responde_al_ping(pool, servidor):
+    pool.obtener().close()
+    servidor.conexiones[0].caida = True
+    with pool.obtener():
+        pass
+    assert len(servidor.conexiones) == 2
+    assert pool.estadisticas()['descartadas'] == 1
+
+
+def test_deshace_la_transaccion_abierta_al_devolver(pool, servidor):
+    prestada = pool.obtener()
+    servidor.conexiones[0].server_status = SERVER_STATUS.SERVER_STATUS_IN_TRANS
+    prestada.close()
+    assert servidor.conexiones[0].rollbacks == 1
+
+
+def test_fallos_al_conectar_abren_el_circuito(pool, servidor, cortacircuitos):
+    servidor.caido = True
+    for _ in range(3):
+        with pytest.raises(pymysql.err.OperationalError):
+            pool.obtener()
+    intentos = len(servidor.conexiones)
+    with pytest.raises(CircuitoAbierto):
+        pool.obtener()
+    assert cortacircuitos.estado()['estado'] == Cortacircuitos.ABIERTO
+    assert pool.estadisticas()['abiertas'] == 0
+    assert len(servidor.conexiones) == intentos
+
+
+def test_prestar_no_cuenta_como_exito(pool, cortacircuitos):
+    # MySQL acepta conexiones pero las consultas vencen: pymysql las cierra
+    for _ in range(3):
+        prestada = pool.obtener()
+        prestada._conexion.open = False
+        prestada.close()
+    assert cortacircuitos.estado()['estado'] == Cortacircuitos.ABIERTO
+    with pytest.raises(CircuitoAbierto):
+        pool.obtener()
+
+
+def test_la_prueba_hace_ping_y_cierra_el_circuito(pool, servidor, cortacircuitos, reloj):
+    pool.obtener().close()
+    for _ in range(3):
+        cortacircuitos.registrar_fallo()
+    reloj.avanzar(1.0)
+    pings = servidor.conexiones[0].pings
+    with pool.obtener():
+        pass
+    assert servidor.conexiones[0].pings == pings + 1
+    assert cortacircuitos.estado()['estado'] == Cortacircuitos.CERRADO
+
+
+def test_la_prueba_sin_conexion_vuelve_a_abrir(pool, servidor, cortacircuitos, reloj):
+    for _ in range(3):
+        cortacircuitos.registrar_fallo()
+    reloj.avanzar(1.0)
+    servidor.caido = True
+    with pytest.raises(pymysql.err.OperationalError):
+        pool.obtener()
+    assert cortacircuitos.estado()['estado'] == Cortacircuitos.ABIERTO
+    assert cortacircuitos.estado()['reabre_en_segundos'] == 2.0
+
@@ -0,0 +1,96 @@
+# tests/test_producto_service.py
+"""
+ProductoService sin servidor: MySQLConnection se reemplaza por una
+conexión falsa que simula el AUTO_INCREMENT de la tabla productos.
+"""
+
+import pytest
+
+from services import producto_service
+from services.producto_service import ProductoService
+
+
+class ServidorFalso:
+    """Lo que crear_lote usa de MySQL: auto_increment_increment y lastrowid"""
+
+    def __init__(self, incremento=1):
+        self.incremento = incremento
+        self.siguiente_id = 1
+        self.inserts = []
+        self.confirmado = False
+
+    def conectar(self):
+        return ConexionFalsa(self)
+
+
+class ConexionFalsa:
+    def __init__(self, servidor):
+        self.servidor = servidor
+
+    def cursor(self):
+        return CursorFalso(self.servidor)
+
+    def begin(self):
+        pass
+
+    def commit(self):
+        self.servidor.confirmado = True
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class CursorFalso:
+    def __init__(self, servidor):
+        self.servidor = servidor
+        self.lastrowid = None
+        self._fila = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, parametros=None):
+        servidor = self.servidor
+        if '@@SESSION.auto_increment_increment' in sql:
+            self._fila = {'incremento': servidor.incremento}
+            return 1
+        filas = len(parametros) // 5
+        servidor.inserts.append(filas)
+        # Como InnoDB: ids separados por el incremento; lastrowid es el primero
+        self.lastrowid = servidor.siguiente_id
+        servidor.siguiente_id += filas * servidor.incremento
+        return filas
+
+    def fetchone(self):
+        return self._fila
+
+
+def productos(n):
+    return [{'nombre': f"Mouse {i}", 'precio': 10.0, 'cantidad': 1, 'categoria': 'perifericos'}
+            for i in range(n)]
+
+
+@pytest.fixture
+def servidor(monkeypatch):
+    servidor = ServidorFalso()
+    monkeypatch.setattr(producto_service, 'MySQLConnection', lambda: servidor)
+    return servidor
+
+
+def test_crear_lote_con_ids_consecutivos_usa_insert_de_varias_filas(servidor, monkeypatch):
+    monkeypatch.setattr(ProductoService, 'TAMANO_LOTE', 2)
+    assert ProductoService().crear_lote(productos(5)) == [1, 2, 3, 4, 5]
+    assert servidor.inserts == [2, 2, 1]
+    assert servidor.confirmado
+
+
+def test_crear_lote_con_incremento_mayor_que_uno_inserta_fila_por_fila(servidor):
+    servidor.incremento = 3
+    assert ProductoService().crear_lote(productos(3)) == [1, 4, 7]
+    assert servidor.inserts == [1, 1, 1]
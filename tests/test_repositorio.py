@@ -0,0 +1,84 @@
+# tests/test_repositorio.py
+"""
+ProductoRepository: el motor SQLite contra una base temporal y el de
+MySQL con un ProductoService falso (sin servidor).
+"""
+
+from decimal import Decimal
+
+import pytest
+
+from database.registros import ProductoRegistro
+from database.repositorio import (ProductoRepository, RepositorioProductosMySQL,
+                                  crear_repositorio)
+
+
+@pytest.fixture
+def repositorio(db):
+    repositorio = crear_repositorio('sqlite', db=db)
+    for i, (categoria, cantidad) in enumerate([('audio', 2), ('audio', 9), ('perifericos', 4)], start=1):
+        db.insertar_producto(ProductoRegistro(i, f"Audífonos {i}", 10.0 * i, cantidad, categoria, ''))
+    return repositorio
+
+
+def test_sqlite_cumple_el_protocolo(repositorio):
+    assert isinstance(repositorio, ProductoRepository)
+
+
+def test_sqlite_pagina_con_filtros(repositorio):
+    productos, siguiente = repositorio.obtener_pagina(limite=1, categoria='audio')
+    assert [p.id for p in productos] == [1]
+    productos, siguiente = repositorio.obtener_pagina(after=siguiente, limite=1, categoria='audio')
+    assert ([p.id for p in productos], siguiente) == ([2], None)
+    productos, _ = repositorio.obtener_pagina(orden='cantidad', stock_maximo=5)
+    assert [p.id for p in productos] == [1, 3]
+
+
+def test_sqlite_lecturas_de_las_rutas(repositorio):
+    assert [p.id for p in repositorio.iterar_todos()] == [1, 2, 3]
+    assert [p.id for p in repositorio.obtener_por_categoria('audio')] == [1, 2]
+    assert [p.id for p in repositorio.obtener_con_bajo_stock(4)] == [1, 3]
+    assert len(repositorio.buscar('audif', limite=2)) == 2
+    assert repositorio.obtener_estadisticas() == {
+        'total': 3, 'valor_total': 10 * 2 + 20 * 9 + 30 * 4,
+        'productos_por_categoria': {'audio': 2, 'perifericos': 1},
+    }
+
+
+class ServicioFalso:
+    """Lo que RepositorioProductosMySQL usa de ProductoService para leer"""
+
+    def __init__(self, filas):
+        self.filas = filas
+        self.lecturas = []
+
+    def leer(self, tipo, argumento):
+        self.lecturas.append((tipo, argumento))
+        if tipo == 'id':
+            return next((f for f in self.filas if f['id'] == argumento), None)
+        if tipo == 'categoria':
+            return [f for f in self.filas if f['categoria'] == argumento]
+        return [f for f in self.filas if f['cantidad'] <= argumento]
+
+    def leer_estadisticas(self):
+        return {'total': len(self.filas), 'valor_total': sum(f['precio'] * f['cantidad'] for f in self.filas),
+                'productos_por_categoria': {'audio': len(self.filas)}}
+
+    def iterar_todos(self, columnas, convertir):
+        return map(convertir, self.filas)
+
+
+def test_mysql_lee_por_el_servicio_y_devuelve_registros():
+    # SELECT * trae columnas de más (fecha_creacion); el DECIMAL pasa a float
+    filas = [{'id': 1, 'nombre': 'Mouse', 'precio': Decimal('12.50'), 'cantidad': 3,
+              'categoria': 'audio', 'descripcion': '', 'fecha_creacion': None}]
+    servicio = ServicioFalso(filas)
+    repositorio = RepositorioProductosMySQL(servicio)
+
+    assert repositorio.obtener_por_id(1) == ProductoRegistro(1, 'Mouse', 12.5, 3, 'audio', '')
+    assert repositorio.obtener_por_id(2) is None
+    assert repositorio.obtener_por_categoria('audio') == [ProductoRegistro(1, 'Mouse', 12.5, 3, 'audio', '')]
+    assert repositorio.obtener_con_bajo_stock(5)[0].precio == 12.5
+    assert servicio.lecturas == [('id', 1), ('id', 2), ('categoria', 'audio'), ('bajo_stock', 5)]
+    assert [tuple(p) for p in repositorio.iterar_todos(('id', 'precio'))] == [(1, 12.5)]
+    assert repositorio.obtener_estadisticas()['valor_total'] == 37.5
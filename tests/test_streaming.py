@@ -0,0 +1,75 @@
+# tests/test_streaming.py
+"""
+ResultadoStreaming sin servidor: el cursor sin buffer y la conexión
+prestada del pool se reemplazan por dobles de prueba.
+"""
+
+from database.conexion import ResultadoStreaming
+
+
+class CursorFalso:
+    """fetchmany sobre una lista, como un SSCursor"""
+
+    def __init__(self, filas):
+        self.filas = list(filas)
+        self.pedidos = 0
+        self.cerrado = False
+
+    def fetchmany(self, n):
+        self.pedidos += 1
+        trozo, self.filas = self.filas[:n], self.filas[n:]
+        return trozo
+
+    def close(self):
+        self.cerrado = True
+
+
+class PrestadaFalsa:
+    """Conexión prestada: close() la devuelve al pool, descartar() la cierra"""
+
+    def __init__(self):
+        self.devuelta = False
+        self.descartada = False
+
+    def close(self):
+        self.devuelta = True
+
+    def descartar(self):
+        self.descartada = True
+
+
+def test_vacio_es_falso_y_devuelve_la_conexion():
+    conexion, cursor = PrestadaFalsa(), CursorFalso([])
+    resultado = ResultadoStreaming(conexion, cursor, tamano_trozo=2)
+    assert not resultado
+    assert list(resultado) == []
+    assert cursor.cerrado and conexion.devuelta
+
+
+def test_adelanta_la_primera_fila_y_lee_por_trozos():
+    conexion, cursor = PrestadaFalsa(), CursorFalso(range(5))
+    resultado = ResultadoStreaming(conexion, cursor, tamano_trozo=2)
+    assert resultado
+    assert resultado
+    assert cursor.pedidos == 1
+    assert list(resultado) == [0, 1, 2, 3, 4]
+    assert not resultado
+    assert conexion.devuelta and not conexion.descartada
+
+
+def test_cerrar_sin_terminar_descarta_la_conexion():
+    conexion, cursor = PrestadaFalsa(), CursorFalso(range(10))
+    with ResultadoStreaming(conexion, cursor, tamano_trozo=3) as resultado:
+        assert next(resultado) == 0
+    # Quedan filas sin leer en el socket: la conexión no vuelve al pool
+    assert conexion.descartada and not conexion.devuelta
+    # Lo ya recibido se puede terminar de leer, pero no se pide más
+    assert list(resultado) == [1, 2]
+    assert cursor.pedidos == 1
+
+
+def test_convierte_cada_fila():
+    filas = [{'id': 1}, {'id': 2}, {'id': 3}]
+    resultado = ResultadoStreaming(PrestadaFalsa(), CursorFalso(filas), tamano_trozo=2,
+                                   convertir=lambda fila: fila['id'])
+    assert list(resultado) == [1, 2, 3]
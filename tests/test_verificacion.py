@@ -0,0 +1,107 @@
+# tests/test_verificacion.py
+"""
+VerificadorTablas entre dos bases SQLite: tablas iguales se confirman
+con pocas consultas y las filas que faltan, sobran o difieren se
+encuentran bajando solo por los rangos que no coinciden.
+"""
+
+import random
+import sqlite3
+
+import pytest
+
+from services.verificacion_service import ESQUEMAS, LadoSQLite, VerificadorTablas, crc32_texto
+
+TOTAL = 5000
+
+
+def base(filas):
+    conexion = sqlite3.connect(':memory:')
+    conexion.execute('''
+        CREATE TABLE productos (
+            id INTEGER PRIMARY KEY, nombre TEXT, precio REAL,
+            cantidad INTEGER, categoria TEXT, descripcion TEXT
+        )
+    ''')
+    conexion.executemany('INSERT INTO productos VALUES (?, ?, ?, ?, ?, ?)', filas)
+    return conexion
+
+
+def catalogo():
+    azar = random.Random(21)
+    return [(id, f"Producto {id}", round(azar.uniform(1, 500), 2), azar.randint(0, 50),
+             azar.choice(['audio', 'perifericos', 'gaming']), azar.choice(['', None, 'Oferta']))
+            for id in range(1, TOTAL + 1)]
+
+
+def lado(conexion):
+    return LadoSQLite(conexion, 'productos', *ESQUEMAS['productos']['sqlite'])
+
+
+@pytest.fixture
+def origen():
+    return base(catalogo())
+
+
+@pytest.fixture
+def destino():
+    return base(catalogo())
+
+
+def verificar(origen, destino, **opciones):
+    return VerificadorTablas(lado(origen), lado(destino), **opciones).verificar()
+
+
+def test_crc_igual_al_de_mysql():
+    # Ejemplo del manual de MySQL: SELECT CRC32('MySQL') -> 3259397556
+    assert crc32_texto('MySQL') == 3259397556
+    assert crc32_texto(None) is None
+
+    # La fila se resume como en CONCAT_WS('|', ...) de MySQL, con '\N' para NULL
+    conexion = base([(1, 'Mouse', 10, 5, 'perifericos', None)])
+    assert lado(conexion).crc_filas(1, 1) == {1: crc32_texto('Mouse|10.00|5|perifericos|\\N')}
+
+
+def test_tablas_iguales_con_pocas_consultas(origen, destino):
+    informe = verificar(origen, destino)
+    assert informe['coinciden']
+    assert (informe['filas_origen'], informe['filas_destino']) == (TOTAL, TOTAL)
+    # Rango y un resumen por lado; nada más
+    assert (informe['consultas'], informe['niveles']) == (4, 1)
+
+
+def test_encuentra_filas_faltantes_sobrantes_y_distintas(origen, destino):
+    destino.execute('DELETE FROM productos WHERE id IN (17, 3001)')
+    destino.execute("INSERT INTO productos VALUES (9000, 'Intruso', 1.0, 1, 'audio', '')")
+    destino.execute('UPDATE productos SET precio = precio + 0.01 WHERE id = 1234')
+    destino.execute("UPDATE productos SET descripcion = CASE WHEN descripcion IS NULL THEN '' "
+                    "ELSE NULL END WHERE id = 4321")
+
+    informe = verificar(origen, destino)
+    assert not informe['coinciden']
+    assert informe['solo_origen'] == [17, 3001]
+    assert informe['solo_destino'] == [9000]
+    assert informe['distintas'] == [1234, 4321]
+    # Mucho menos que comparar las filas una por una
+    assert informe['consultas'] < 40
+
+
+def test_precios_se_comparan_con_dos_decimales(origen, destino):
+    destino.execute('UPDATE productos SET precio = precio + 0.001 WHERE id = 10')
+    assert verificar(origen, destino)['coinciden']
+
+
+def test_ramas_y_hoja_configurables(origen, destino):
+    destino.execute('UPDATE productos SET cantidad = cantidad + 1 WHERE id = 2500')
+    informe = verificar(origen, destino, ramas=2, hoja=8)
+    assert informe['distintas'] == [2500]
+    assert informe['niveles'] > verificar(origen, destino)['niveles']
+
+
+def test_tablas_vacias(origen):
+    informe = verificar(base([]), base([]))
+    assert informe['coinciden'] and informe['niveles'] == 0
+
+    informe = verificar(origen, base([]))
+    assert informe['solo_origen'] == list(range(1, TOTAL + 1))
+    assert informe['filas_destino'] == 0